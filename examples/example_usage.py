@@ -60,7 +60,7 @@ def example_batch_processing():
 
     # 批量处理多个PDF
     # pdf_files = ["file1.pdf", "file2.pdf", "file3.pdf"]
-    # results = agent.batch_extract(pdf_files)
+    # results = agent.batch_extract(pdf_files, max_concurrency=4)
     #
     # for result in results:
     #     print(f"{result['pdf']}: {result['status']}")
@@ -75,11 +75,10 @@ def example_programmatic_usage():
     from src.pdf_parser import PDFParser
     from src.heading_detector import HeadingDetector
     from src.output_formatter import OutputFormatter
-    import yaml
+    from src.config import load_config
 
     # 加载配置
-    with open("config.yaml", "r", encoding="utf-8") as f:
-        config = yaml.safe_load(f)
+    config = load_config("config.yaml")
 
     # 创建组件
     parser = PDFParser(config)
@@ -25,24 +25,37 @@ import sys
 import json
 import argparse
 from pathlib import Path
-from collections import Counter
+
+try:
+    import orjson
+except ImportError:  # optional: falls back to the stdlib json module
+    orjson = None
 
 # Add parent directories to path
 skill_dir = Path(__file__).parent.parent
 project_root = skill_dir.parent.parent
 sys.path.insert(0, str(project_root))
 
-try:
-    from src.tools.pdf_reader import PDFReaderTool
-    from src.tools.text_extractor import TextExtractorTool
-except ImportError as e:
-    print(f"Error: Cannot import required modules. Make sure you're running from the correct directory.")
-    print(f"Details: {e}")
-    sys.exit(1)
+
+def load_tools():
+    """Import the PDF tools on demand so --help and argument errors stay fast."""
+    try:
+        from src.tools.pdf_reader import PDFReaderTool
+        from src.tools.text_extractor import TextExtractorTool
+    except ImportError as e:
+        print(f"Error: Cannot import required modules. Make sure you're running from the correct directory.")
+        print(f"Details: {e}")
+        sys.exit(1)
+
+    return PDFReaderTool, TextExtractorTool
 
 
 def analyze_pdf(pdf_path: str, args) -> dict:
     """Analyze PDF structure."""
+    import numpy as np
+
+    PDFReaderTool, TextExtractorTool = load_tools()
+
     config = {}
     pdf_reader = PDFReaderTool(config)
     text_extractor = TextExtractorTool(config)
@@ -55,11 +68,26 @@ def analyze_pdf(pdf_path: str, args) -> dict:
 
     # Analyze bookmarks
     bookmarks = pdf_info.get('bookmarks', [])
-    bookmark_levels = Counter(b['level'] for b in bookmarks) if bookmarks else {}
-
-    # Analyze fonts
-    font_sizes = [block.font_size for block in text_blocks if hasattr(block, 'font_size')]
-    font_size_dist = Counter(font_sizes) if font_sizes else {}
+    bookmark_levels = {}
+    if bookmarks:
+        levels = np.fromiter((b['level'] for b in bookmarks), dtype=np.int32, count=len(bookmarks))
+        level_counts = np.bincount(levels)
+        present = np.flatnonzero(level_counts)
+        bookmark_levels = dict(zip(present.tolist(), level_counts[present].tolist()))
+
+    # Analyze fonts (top 10 sizes by frequency)
+    font_size_dist = {}
+    if text_blocks:
+        font_sizes = np.fromiter((block.font_size for block in text_blocks),
+                                 dtype=np.float64, count=len(text_blocks))
+        sizes, first_seen, counts = np.unique(font_sizes, return_index=True, return_counts=True)
+        # Most frequent first; ties keep document order like Counter.most_common.
+        # Both keys fold into one unique int so argpartition selects the top 10
+        # in O(N) and only those 10 get sorted.
+        rank = (len(font_sizes) - counts.astype(np.int64)) * (len(font_sizes) + 1) + first_seen
+        top = np.argpartition(rank, 9)[:10] if len(rank) > 10 else np.arange(len(rank))
+        top = top[np.argsort(rank[top])]
+        font_size_dist = dict(zip(sizes[top].tolist(), counts[top].tolist()))
 
     # Build analysis result
     analysis = {
@@ -69,7 +97,7 @@ def analyze_pdf(pdf_path: str, args) -> dict:
         'bookmark_count': len(bookmarks),
         'bookmark_levels': dict(bookmark_levels),
         'text_blocks': len(text_blocks),
-        'font_sizes': dict(sorted(font_size_dist.items(), key=lambda x: x[1], reverse=True)[:10]),
+        'font_sizes': font_size_dist,
         'metadata': pdf_info.get('metadata', {})
     }
 
@@ -86,48 +114,63 @@ def analyze_pdf(pdf_path: str, args) -> dict:
     return analysis
 
 
+def write_json(analysis: dict):
+    """Write the analysis as indented JSON straight to the binary stdout."""
+    if orjson is not None:
+        payload = orjson.dumps(analysis, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+    else:
+        payload = json.dumps(analysis, indent=2, ensure_ascii=False).encode("utf-8")
+
+    sys.stdout.flush()
+    sys.stdout.buffer.write(payload + b"\n")
+    sys.stdout.buffer.flush()
+
+
 def display_analysis(analysis: dict, args):
     """Display analysis results."""
     if args.output == 'json':
-        print(json.dumps(analysis, indent=2, ensure_ascii=False))
+        write_json(analysis)
         return
 
-    # Text format
-    print(f"\n📄 PDF 文档分析")
-    print(f"{'=' * 60}")
-    print(f"文档: {analysis['document']}")
-    print(f"总页数: {analysis['total_pages']}")
-    print(f"文本块: {analysis['text_blocks']}")
-
-    print(f"\n📑 书签信息")
-    print(f"{'─' * 60}")
+    # Text format: collect lines and write them in one go
+    lines = [
+        f"\n📄 PDF 文档分析",
+        f"{'=' * 60}",
+        f"文档: {analysis['document']}",
+        f"总页数: {analysis['total_pages']}",
+        f"文本块: {analysis['text_blocks']}",
+        f"\n📑 书签信息",
+        f"{'─' * 60}",
+    ]
     if analysis['has_bookmarks']:
-        print(f"✓ 包含书签: {analysis['bookmark_count']} 个")
-        print(f"\n层级分布:")
+        lines.append(f"✓ 包含书签: {analysis['bookmark_count']} 个")
+        lines.append(f"\n层级分布:")
         for level, count in sorted(analysis['bookmark_levels'].items()):
-            print(f"  Level {level}: {count} 个")
+            lines.append(f"  Level {level}: {count} 个")
 
         if args.show_bookmarks and 'bookmarks' in analysis:
-            print(f"\n前 20 个书签:")
+            lines.append(f"\n前 20 个书签:")
             for b in analysis['bookmarks']:
                 indent = "  " * b['level']
-                print(f"  {indent}• {b['text']} (页 {b['page']})")
+                lines.append(f"  {indent}• {b['text']} (页 {b['page']})")
     else:
-        print("✗ 无书签（需要使用 LLM 提取）")
+        lines.append("✗ 无书签（需要使用 LLM 提取）")
 
     if analysis['font_sizes']:
-        print(f"\n🔤 字体大小分布 (Top 10)")
-        print(f"{'─' * 60}")
+        lines.append(f"\n🔤 字体大小分布 (Top 10)")
+        lines.append(f"{'─' * 60}")
         for size, count in list(analysis['font_sizes'].items())[:10]:
-            print(f"  {size:.1f}pt: {count} 次")
+            lines.append(f"  {size:.1f}pt: {count} 次")
 
     metadata = analysis.get('metadata', {})
     if metadata:
-        print(f"\n📋 文档元数据")
-        print(f"{'─' * 60}")
+        lines.append(f"\n📋 文档元数据")
+        lines.append(f"{'─' * 60}")
         for key, value in metadata.items():
             if value:
-                print(f"  {key}: {value}")
+                lines.append(f"  {key}: {value}")
+
+    sys.stdout.write("\n".join(lines) + "\n")
 
 
 def main():
@@ -3,13 +3,19 @@
 Extract multi-level headings from PDF documents.
 
 Usage:
-    python extract_headings.py <pdf_path> [options]
+    python extract_headings.py <pdf_path> [<pdf_path> ...] [options]
 
 Options:
     --filter-financial    Extract only financial statement headings
     --no-reflection       Disable reflection phase (faster)
     --output-dir DIR      Output directory (default: output/)
     --config FILE         Config file (default: config.yaml)
+    --concurrency N       Max PDFs processed in parallel when several are given
+    --force-llm           Run the LLM pipeline even when bookmarks cover the document
+    --batch-mode          Send LLM requests through the Message Batches API (cheaper, slower)
+    --output FORMAT       Summary format: text (default), json
+    --quiet               Only report warnings and errors
+    --pretty              Rich-formatted progress output
     --verbose             Show detailed logs
 
 Examples:
@@ -21,6 +27,12 @@ Examples:
 
     # Fast mode (no reflection)
     python extract_headings.py document.pdf --no-reflection
+
+    # Batch mode, 4 PDFs in flight at a time
+    python extract_headings.py a.pdf b.pdf c.pdf --concurrency 4
+
+    # Machine-readable summary on stdout, progress on stderr
+    python extract_headings.py a.pdf b.pdf --output json --quiet
 """
 
 import sys
@@ -33,12 +45,87 @@ skill_dir = Path(__file__).parent.parent
 project_root = skill_dir.parent.parent
 sys.path.insert(0, str(project_root))
 
+from src.log import logger, setup_cli_logging
+
+try:
+    import orjson
+except ImportError:  # optional: falls back to the stdlib json module
+    orjson = None
+
 try:
-    from src.agent import PDFHeadingExtractorAgent
-except ImportError as e:
-    print(f"Error: Cannot import PDFHeadingExtractorAgent. Make sure you're running from the correct directory.")
-    print(f"Details: {e}")
-    sys.exit(1)
+    import msgspec
+except ImportError:  # optional: summaries are then decoded with orjson/json
+    msgspec = None
+
+
+if msgspec is not None:
+    class ExtractionSummary(msgspec.Struct):
+        """The part of a headings file the summary needs; other fields are skipped."""
+        statistics: dict = msgspec.field(default_factory=dict)
+
+    _summary_decoder = msgspec.json.Decoder(ExtractionSummary)
+
+
+def load_agent_class():
+    """Import the agent on demand so --help and argument errors stay fast."""
+    try:
+        from src.agent import PDFHeadingExtractorAgent
+    except ImportError as e:
+        logger.error(f"Error: Cannot import PDFHeadingExtractorAgent. Make sure you're running from the correct directory.\n"
+                     f"Details: {e}")
+        sys.exit(1)
+
+    return PDFHeadingExtractorAgent
+
+
+def load_summary(agent, pdf_path: Path) -> dict:
+    """Read the statistics block of an extracted headings file."""
+    output_file = agent.formatter.output_dir / f"{pdf_path.stem}_headings.json"
+
+    raw = output_file.read_bytes()
+    if msgspec is not None:
+        # Typed decode: the (large) headings list is validated but never built as dicts
+        statistics = _summary_decoder.decode(raw).statistics
+    else:
+        data = orjson.loads(raw) if orjson is not None else json.loads(raw)
+        statistics = data.get('statistics', {})
+
+    return {
+        'pdf': str(pdf_path),
+        'status': 'success',
+        'output_file': str(output_file),
+        'statistics': statistics,
+    }
+
+
+def log_summary(summary: dict, verbose: bool):
+    """Report one extraction summary through the CLI logger."""
+    stats = summary['statistics']
+    lines = [
+        f"\n✅ 提取完成！{Path(summary['pdf']).name}",
+        f"   📊 总标题数: {stats.get('total_headings', 0)}",
+        f"   📑 顶级标题: {stats.get('top_level_headings', 0)}",
+        f"   📏 最大层级: {stats.get('max_depth', 0)}",
+        f"   📁 输出文件: {summary['output_file']}",
+    ]
+
+    if verbose:
+        lines.append(f"\n   数据来源:")
+        for source, count in stats.get('by_source', {}).items():
+            lines.append(f"     • {source}: {count}")
+
+    logger.info("\n".join(lines))
+
+
+def write_json(summaries: list):
+    """Emit all summaries as one JSON document on stdout."""
+    if orjson is not None:
+        payload = orjson.dumps(summaries, option=orjson.OPT_INDENT_2)
+    else:
+        payload = json.dumps(summaries, indent=2, ensure_ascii=False).encode("utf-8")
+
+    sys.stdout.buffer.write(payload + b"\n")
+    sys.stdout.buffer.flush()
 
 
 def main():
@@ -47,7 +134,7 @@ def main():
         formatter_class=argparse.RawDescriptionHelpFormatter,
         epilog=__doc__
     )
-    parser.add_argument("pdf_path", help="Path to PDF file")
+    parser.add_argument("pdf_paths", nargs="+", help="Path(s) to PDF file(s)")
     parser.add_argument("--filter-financial", action="store_true",
                        help="Extract only financial statement headings (recommended for annual reports)")
     parser.add_argument("--no-reflection", action="store_true",
@@ -56,64 +143,91 @@ def main():
                        help="Output directory (default: output/)")
     parser.add_argument("--config", default="config.yaml",
                        help="Config file path (default: config.yaml)")
+    parser.add_argument("--concurrency", type=int, default=None,
+                       help="Max PDFs processed in parallel (default: performance.max_workers)")
+    parser.add_argument("--force-llm", action="store_true",
+                       help="Run the LLM pipeline even when bookmarks already cover the document")
+    parser.add_argument("--batch-mode", action="store_true",
+                       help="Send heading identification through the Message Batches API "
+                            "(about half the cost, results arrive when the batch finishes)")
+    parser.add_argument("--output", choices=['text', 'json'], default='text',
+                       help="Summary format (default: text)")
+    parser.add_argument("--quiet", action="store_true",
+                       help="Only report warnings and errors")
+    parser.add_argument("--pretty", action="store_true",
+                       help="Rich-formatted progress output")
     parser.add_argument("--verbose", action="store_true",
                        help="Show detailed logs")
 
     args = parser.parse_args()
+    setup_cli_logging(quiet=args.quiet, pretty=args.pretty, verbose=args.verbose)
 
-    # Validate PDF path
-    pdf_path = Path(args.pdf_path)
-    if not pdf_path.exists():
-        print(f"❌ Error: PDF file not found: {args.pdf_path}")
-        return 1
+    # Validate PDF paths
+    pdf_paths = [Path(p) for p in args.pdf_paths]
+    for pdf_path in pdf_paths:
+        if not pdf_path.exists():
+            logger.error(f"❌ Error: PDF file not found: {pdf_path}")
+            return 1
 
     # Validate config
     config_path = Path(args.config)
     if not config_path.exists():
-        print(f"❌ Error: Config file not found: {args.config}")
-        print(f"   Please ensure config.yaml exists in the project root")
+        logger.error(f"❌ Error: Config file not found: {args.config}\n"
+                     f"   Please ensure config.yaml exists in the project root")
         return 1
 
+    PDFHeadingExtractorAgent = load_agent_class()
+
     try:
         # Initialize Agent
-        print(f"🔧 Initializing PDF Heading Extractor Agent...")
+        logger.info(f"🔧 Initializing PDF Heading Extractor Agent...")
+        # Agent progress goes to stderr; --quiet silences it as well
+        from src.agent import set_quiet
+        set_quiet(args.quiet)
         agent = PDFHeadingExtractorAgent(config_path=str(config_path))
 
         # Configure options
         if args.no_reflection:
             agent.enable_reflection = False
-            if args.verbose:
-                print("   → Reflection disabled (faster mode)")
-
-        # Extract headings
-        print(f"📄 Processing: {pdf_path.name}")
-        headings = agent.extract_headings(str(pdf_path))
-
-        # Get output file path
-        output_file = agent.formatter.output_dir / f"{pdf_path.stem}_headings.json"
-
-        # Load and display summary
-        with open(output_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-
-        stats = data.get('statistics', {})
-
-        print(f"\n✅ 提取完成！")
-        print(f"   📊 总标题数: {stats.get('total_headings', 0)}")
-        print(f"   📑 顶级标题: {stats.get('top_level_headings', 0)}")
-        print(f"   📏 最大层级: {stats.get('max_depth', 0)}")
-        print(f"   📁 输出文件: {output_file}")
-
-        if args.verbose:
-            by_source = stats.get('by_source', {})
-            print(f"\n   数据来源:")
-            for source, count in by_source.items():
-                print(f"     • {source}: {count}")
-
-        return 0
+            logger.debug("   → Reflection disabled (faster mode)")
+
+        if args.force_llm:
+            agent.force_llm = True
+            logger.debug("   → Bookmark fast path disabled")
+
+        if args.batch_mode:
+            agent.batch_mode = True
+            logger.debug("   → Batch API mode enabled")
+
+        if len(pdf_paths) == 1:
+            # Extract headings
+            logger.info(f"📄 Processing: {pdf_paths[0].name}")
+            agent.extract_headings(str(pdf_paths[0]))
+            results = [{'status': 'success'}]
+        else:
+            # Batch extraction
+            logger.info(f"📄 Processing {len(pdf_paths)} files...")
+            results = agent.batch_extract([str(p) for p in pdf_paths],
+                                          max_concurrency=args.concurrency)
+
+        summaries = []
+        for pdf_path, result in zip(pdf_paths, results):
+            if result['status'] == 'success':
+                summary = load_summary(agent, pdf_path)
+                if args.output == 'text':
+                    log_summary(summary, args.verbose)
+            else:
+                summary = {'pdf': str(pdf_path), 'status': 'failed', 'error': result['error']}
+                logger.error(f"\n❌ 处理失败: {pdf_path.name}: {result['error']}")
+            summaries.append(summary)
+
+        if args.output == 'json':
+            write_json(summaries)
+
+        return 1 if any(s['status'] == 'failed' for s in summaries) else 0
 
     except Exception as e:
-        print(f"\n❌ 处理失败: {e}")
+        logger.error(f"\n❌ 处理失败: {e}")
         if args.verbose:
             import traceback
             traceback.print_exc()
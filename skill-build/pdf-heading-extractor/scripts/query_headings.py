@@ -25,70 +25,256 @@ Examples:
 
     # Show page ranges
     python query_headings.py output/report_headings.json --show-range
+
+Queries run against a SQLite index (<json_file stem>.db, next to the JSON)
+that is built on first use and rebuilt whenever the JSON file changes.
 """
 
 import json
+import os
+import sqlite3
 import sys
 import argparse
+from functools import lru_cache
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+
+try:
+    import orjson
+except ImportError:  # optional: falls back to the stdlib json module
+    orjson = None
+
+
+# Bump when the index layout changes so stale databases get rebuilt
+INDEX_VERSION = 2
+
+INDEX_SCHEMA = """
+CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE headings (
+    seq INTEGER PRIMARY KEY,
+    id INTEGER,
+    level INTEGER,
+    page INTEGER,
+    page_end INTEGER,
+    parent_id INTEGER,
+    text TEXT,
+    text_lower TEXT,
+    data TEXT
+);
+CREATE INDEX idx_headings_level_page ON headings(level, page);
+CREATE INDEX idx_headings_page ON headings(page);
+"""
+
+# Trigram tokenizer gives case-insensitive substring matching, which also
+# works for CJK text (the default unicode61 tokenizer would not split it).
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE headings_fts USING fts5(
+    text, content='headings', content_rowid='seq', tokenize='trigram'
+);
+INSERT INTO headings_fts(headings_fts) VALUES('rebuild');
+"""
 
 
 def load_headings(json_file: str) -> Dict[str, Any]:
     """Load headings from JSON file."""
+    if orjson is not None:
+        with open(json_file, 'rb') as f:
+            return orjson.loads(f.read())
+
     with open(json_file, 'r', encoding='utf-8') as f:
         return json.load(f)
 
 
-def filter_headings(headings: List[Dict], args) -> List[Dict]:
-    """Apply filters to headings."""
-    results = headings
+def _dumps(obj: Any) -> str:
+    if orjson is not None:
+        return orjson.dumps(obj).decode('utf-8')
+    return json.dumps(obj, ensure_ascii=False)
+
+
+def _loads(text: str) -> Any:
+    if orjson is not None:
+        return orjson.loads(text)
+    return json.loads(text)
+
+
+def _source_signature(json_file: str) -> str:
+    """Identify the JSON file version an index was built from."""
+    st = os.stat(json_file)
+    return f"{INDEX_VERSION}:{st.st_mtime_ns}:{st.st_size}"
+
+
+def _build_index(conn: sqlite3.Connection, data: Dict[str, Any], signature: str):
+    """Populate an empty database from the loaded headings JSON."""
+    headings = data.get('headings', [])
+
+    parent_of = {}
+    for h in headings:
+        for child_id in h.get('children', []):
+            parent_of[child_id] = h.get('id')
+
+    conn.executescript(INDEX_SCHEMA)
+
+    document = {k: v for k, v in data.items() if k != 'headings'}
+    conn.executemany(
+        "INSERT INTO meta(key, value) VALUES (?, ?)",
+        [('signature', signature), ('document', _dumps(document))]
+    )
+    conn.executemany(
+        "INSERT INTO headings(seq, id, level, page, page_end, parent_id, text, text_lower, data) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        (
+            (
+                seq,
+                h.get('id'),
+                h.get('level'),
+                h.get('page'),
+                (h.get('page_range') or {}).get('end'),
+                parent_of.get(h.get('id')),
+                h.get('text', ''),
+                h.get('text', '').lower(),
+                _dumps(h),
+            )
+            for seq, h in enumerate(headings)
+        )
+    )
+
+    try:
+        conn.executescript(FTS_SCHEMA)
+    except sqlite3.OperationalError:
+        # SQLite built without FTS5/trigram: searches fall back to a table scan
+        pass
+
+    conn.commit()
+
+
+def open_index(json_file: str) -> sqlite3.Connection:
+    """
+    Open the SQLite index for a headings JSON file, (re)building it if needed.
+
+    The index lives next to the JSON file. If that directory is not writable,
+    an in-memory index is built for this run instead.
+    """
+    db_path = Path(json_file).with_suffix('.db')
+    signature = _source_signature(json_file)
+
+    if db_path.exists():
+        conn = sqlite3.connect(str(db_path))
+        try:
+            row = conn.execute("SELECT value FROM meta WHERE key = 'signature'").fetchone()
+            if row and row[0] == signature:
+                return conn
+        except sqlite3.DatabaseError:
+            pass
+        conn.close()
+
+    data = load_headings(json_file)
+
+    tmp_path = db_path.with_suffix(f'.db.{os.getpid()}.tmp')
+    try:
+        conn = sqlite3.connect(str(tmp_path))
+        _build_index(conn, data, signature)
+        conn.close()
+        os.replace(tmp_path, db_path)
+        return sqlite3.connect(str(db_path))
+    except (OSError, sqlite3.OperationalError):
+        if tmp_path.exists():
+            tmp_path.unlink()
+        conn = sqlite3.connect(':memory:')
+        _build_index(conn, data, signature)
+        return conn
+
+
+def _has_fts(conn: sqlite3.Connection) -> bool:
+    row = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'headings_fts'"
+    ).fetchone()
+    return row is not None
+
+
+def read_document(conn: sqlite3.Connection) -> Dict[str, Any]:
+    """Return the document-level fields (everything except the headings)."""
+    row = conn.execute("SELECT value FROM meta WHERE key = 'document'").fetchone()
+    return _loads(row[0]) if row else {}
+
+
+def count_headings(conn: sqlite3.Connection) -> int:
+    return conn.execute("SELECT COUNT(*) FROM headings").fetchone()[0]
+
+
+def filter_headings(conn: sqlite3.Connection, args) -> List[Dict]:
+    """Apply filters to headings with a single indexed query."""
+    clauses = []
+    params = []
 
     if args.search:
         keyword = args.search.lower()
-        results = [h for h in results if keyword in h['text'].lower()]
+        # Trigram FTS needs at least 3 characters; shorter keywords scan
+        if len(keyword) >= 3 and _has_fts(conn):
+            clauses.append("seq IN (SELECT rowid FROM headings_fts WHERE headings_fts MATCH ?)")
+            params.append('"' + keyword.replace('"', '""') + '"')
+        else:
+            # text_lower is lowercased once at index build time
+            clauses.append("instr(text_lower, ?) > 0")
+            params.append(keyword)
 
     if args.level:
-        results = [h for h in results if h['level'] == args.level]
+        clauses.append("level = ?")
+        params.append(args.level)
 
     if args.page:
-        results = [h for h in results if h['page'] == args.page]
+        clauses.append("page = ?")
+        params.append(args.page)
 
-    return results
+    sql = "SELECT data FROM headings"
+    if clauses:
+        sql += " WHERE " + " AND ".join(clauses)
+    sql += " ORDER BY seq"
 
+    return [_loads(row[0]) for row in conn.execute(sql, params)]
 
-def format_heading(h: Dict, show_range: bool = False, show_children: bool = False,
-                   heading_map: Dict = None) -> str:
-    """Format a single heading for display."""
-    indent = "  " * (h['level'] - 1)
-    text = h['text']
-    page = h['page']
 
+# Indent strings for levels 0-9, built once instead of per heading
+_INDENT = ["  " * i for i in range(10)]
+
+
+@lru_cache(maxsize=4096)
+def _format_line(level: int, text: str, page: int, end: Any, child_count: Optional[int]) -> str:
+    """Render one heading line; `end`/`child_count` are None when not shown."""
+    indent = _INDENT[level - 1] if 0 < level <= len(_INDENT) else "  " * (level - 1)
     output = f"{indent}• {text} (页 {page}"
 
-    if show_range and h.get('page_range'):
-        pr = h['page_range']
-        end = pr['end'] if pr['end'] is not None else '?'
+    if end is not None:
         output += f"-{end}"
 
     output += ")"
 
-    if show_children and h.get('children') and heading_map:
-        child_count = len(h['children'])
+    if child_count is not None:
         output += f" [{child_count} 个子标题]"
 
     return output
 
 
-def display_results(results: List[Dict], args, all_headings: List[Dict]):
+def format_heading(h: Dict, show_range: bool = False, show_children: bool = False,
+                   heading_map: Dict = None) -> str:
+    """Format a single heading for display."""
+    end = None
+    if show_range and h.get('page_range'):
+        pr = h['page_range']
+        end = pr['end'] if pr['end'] is not None else '?'
+
+    child_count = None
+    if show_children and h.get('children') and heading_map:
+        child_count = len(h['children'])
+
+    return _format_line(h['level'], h['text'], h['page'], end, child_count)
+
+
+def display_results(results: List[Dict], args, heading_map: Optional[Dict] = None):
     """Display query results."""
     if not results:
         print("\n未找到匹配的标题")
         return
 
-    # Build heading map for children lookup
-    heading_map = {h['id']: h for h in all_headings}
-
     print(f"\n找到 {len(results)} 个匹配的标题:\n")
 
     if args.format == 'json':
@@ -145,11 +331,11 @@ def main():
         return 1
 
     try:
-        # Load data
-        data = load_headings(args.json_file)
-        headings = data.get('headings', [])
+        # Open (or build) the query index
+        conn = open_index(args.json_file)
+        data = read_document(conn)
 
-        if not headings:
+        if not count_headings(conn):
             print("⚠️  Warning: No headings found in JSON file")
             return 0
 
@@ -160,10 +346,13 @@ def main():
                 return 0
 
         # Apply filters
-        results = filter_headings(headings, args)
+        results = filter_headings(conn, args)
+
+        # Build heading map for children lookup (only needed for --show-children)
+        heading_map = {h['id']: h for h in results} if args.show_children else None
 
         # Display results
-        display_results(results, args, headings)
+        display_results(results, args, heading_map)
 
         return 0
 
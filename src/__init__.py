@@ -5,6 +5,13 @@ PDF标题提取Agent - LLM驱动版本
 __version__ = "2.0.0"
 __author__ = "PDF Heading Extractor Team"
 
-from .agent import PDFHeadingExtractorAgent
-
 __all__ = ["PDFHeadingExtractorAgent"]
+
+
+def __getattr__(name):
+    # 延迟导入：导入 src.tools 等子模块时不必加载Agent及其全部依赖
+    if name == "PDFHeadingExtractorAgent":
+        from .agent import PDFHeadingExtractorAgent
+
+        return PDFHeadingExtractorAgent
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
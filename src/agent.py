@@ -2,22 +2,134 @@
 PDF标题提取Agent - 核心类 (基于LLM)
 """
 
+import asyncio
+import hashlib
 import logging
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from itertools import islice
 from pathlib import Path
-from typing import Dict, Any, List, Optional
-import yaml
+from typing import Callable, Dict, Any, List, Optional
 import json
-from rich.console import Console
-from rich.progress import Progress, SpinnerColumn, TextColumn
 
-from .llm import LLMClient, PromptManager, ResponseParser
+import numpy as np
+
+from .config import load_config
+from .llm import LLMClient, PromptManager, ResponseParser, JSONArrayStream
 from .tools import PDFReaderTool, TextExtractorTool, StructureAnalyzerTool
 from .memory.context_manager import ContextManager
+from .agent_pool import AgentPool
+from .agent_batch import BatchLLM
+from .async_utils import run_sync
+from .memory.result_cache import ResultCache
+from .fingerprint import pdf_fingerprint
 from .output.formatter import OutputFormatter
 
+try:
+    import ahocorasick
+except ImportError:  # 可选依赖，未安装时使用正则匹配
+    ahocorasick = None
+
 
 logger = logging.getLogger(__name__)
-console = Console()
+
+
+# 是否静默Agent的终端进度输出（set_quiet 设置）
+_console_quiet = False
+
+
+@lru_cache(maxsize=1)
+def _get_console():
+    """首次输出时才导入rich并创建Console，导入本模块时不加载rich；进度输出到stderr，stdout留给结果数据"""
+    from rich.console import Console
+
+    return Console(stderr=True, quiet=_console_quiet)
+
+
+def set_quiet(quiet: bool = True):
+    """
+    静默Agent的终端输出：关闭进度显示，控制台日志只保留警告和错误（日志文件不受影响）
+
+    Args:
+        quiet: 是否静默
+    """
+    global _console_quiet
+    _console_quiet = quiet
+    if _get_console.cache_info().currsize:
+        _get_console().quiet = quiet
+
+    for handler in logging.getLogger().handlers:
+        if type(handler) is logging.StreamHandler:
+            handler.setLevel(logging.WARNING if quiet else logging.NOTSET)
+
+
+class _LazyConsole:
+    """转发到 _get_console() 的代理，模块内沿用 console.print(...) 写法"""
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(_get_console(), name)
+
+
+console = _LazyConsole()
+
+# 财务报表相关标题关键词，合并为一个正则，每个标题只扫描一次
+FINANCIAL_STATEMENT_KEYWORDS = [
+    "合并资产负债表",
+    "合并利润表",
+    "合并现金流量表",
+    "合并财务报表项目注释",
+    "财务报表附注",
+    "报表附注",
+    "附注"
+]
+FINANCIAL_STATEMENT_PATTERN = re.compile("|".join(map(re.escape, FINANCIAL_STATEMENT_KEYWORDS)))
+
+if ahocorasick is not None:
+    # Aho-Corasick自动机：单遍扫描同时匹配所有关键词
+    _financial_automaton = ahocorasick.Automaton()
+    for _keyword in FINANCIAL_STATEMENT_KEYWORDS:
+        _financial_automaton.add_word(_keyword, _keyword)
+    _financial_automaton.make_automaton()
+else:
+    _financial_automaton = None
+
+
+def is_financial_statement_title(text: str) -> bool:
+    """
+    判断标题是否包含财务报表相关关键词
+
+    Args:
+        text: 标题文本
+
+    Returns:
+        是否匹配任一关键词
+    """
+    if _financial_automaton is not None:
+        return next(_financial_automaton.iter(text), None) is not None
+    return FINANCIAL_STATEMENT_PATTERN.search(text) is not None
+
+
+# 标题预筛选条件：文本长度在 (MIN, MAX) 之间且字体大于 MIN_FONT_SIZE
+PREFILTER_MIN_LENGTH = 5
+PREFILTER_MAX_LENGTH = 100
+PREFILTER_MIN_FONT_SIZE = 10
+
+# 每篇文档最多交给LLM识别的候选标题数
+MAX_IDENTIFY_CANDIDATES = 50
+
+
+@lru_cache(maxsize=16)
+def _prompt_digest(model: str, model_fast: str, prompts_fingerprint: str) -> str:
+    """模型名 + 全部Prompt指纹的摘要"""
+    prompt_digest = hashlib.blake2b(digest_size=16)
+    prompt_digest.update(model.encode("utf-8"))
+    # 快速模型与主模型相同时不计入
+    if model_fast != model:
+        prompt_digest.update(f"\0{model_fast}".encode("utf-8"))
+    prompt_digest.update(prompts_fingerprint.encode("utf-8"))
+    return prompt_digest.hexdigest()
 
 
 class PDFHeadingExtractorAgent:
@@ -40,6 +152,7 @@ class PDFHeadingExtractorAgent:
             config_path: 配置文件路径
         """
         # 加载配置
+        self.config_path = config_path
         self.config = self._load_config(config_path)
 
         # 设置日志
@@ -48,6 +161,9 @@ class PDFHeadingExtractorAgent:
         # 初始化LLM客户端
         self.llm_client = LLMClient(self.config)
 
+        # 初始化批量调用器（Message Batches API，仅在批量模式下使用）
+        self.batch_llm = BatchLLM(self.llm_client, self.config)
+
         # 初始化Prompt管理器
         self.prompt_manager = PromptManager(self.config)
 
@@ -62,6 +178,10 @@ class PDFHeadingExtractorAgent:
         # 初始化记忆管理器
         self.memory = ContextManager(self.config)
 
+        # 初始化结果缓存（整篇文档 / 按页段）
+        self.result_cache = ResultCache(self.config)
+        self.range_cache = ResultCache(self.config, namespace="page_ranges")
+
         # 初始化输出格式化器
         self.formatter = OutputFormatter(self.config)
 
@@ -70,6 +190,17 @@ class PDFHeadingExtractorAgent:
         self.max_iterations = self.agent_config.get("max_iterations", 10)
         self.enable_reflection = self.agent_config.get("enable_reflection", True)
         self.verbose = self.agent_config.get("enable_verbose", True)
+        self._enable_cache = self.config.get("performance", {}).get("enable_cache", True)
+        self.max_workers = self.config.get("performance", {}).get("max_workers", 4)
+        self.pages_per_task = self.config.get("pdf", {}).get("batch_size", 10)
+        self.identification_batch_size = max(
+            1, self.config.get("prompts", {}).get("identification_batch_size", 25)
+        )
+        self.batch_mode = False
+        self.force_llm = False
+        self.bookmark_fastpath_min = self.agent_config.get("bookmark_fastpath_min", 5)
+        self.bookmark_fastpath_coverage = self.agent_config.get("bookmark_fastpath_coverage", 0.6)
+        self.batch_threshold = self.config.get("llm", {}).get("batch", {}).get("threshold", 20)
 
         # 统计信息
         self.stats = {
@@ -77,20 +208,26 @@ class PDFHeadingExtractorAgent:
             "tokens_used": 0,
             "tool_calls": 0,
         }
+        self._stats_lock = threading.Lock()
 
-        logger.info("PDF标题提取Agent初始化完成")
+        # 批量处理时复用的Agent对象池（首次批量处理时创建）
+        self._agent_pool: Optional[AgentPool] = None
 
-    def _load_config(self, config_path: str) -> Dict[str, Any]:
-        """加载配置文件"""
-        config_file = Path(config_path)
+        logger.info("PDF标题提取Agent初始化完成")
 
-        if not config_file.exists():
-            raise FileNotFoundError(f"配置文件不存在: {config_path}")
+    @property
+    def enable_cache(self) -> bool:
+        """是否启用缓存（结果缓存、页段缓存和LLM响应缓存）"""
+        return self._enable_cache
 
-        with open(config_file, "r", encoding="utf-8") as f:
-            config = yaml.safe_load(f)
+    @enable_cache.setter
+    def enable_cache(self, value: bool):
+        self._enable_cache = value
+        self.llm_client.enable_cache = value
 
-        return config
+    def _load_config(self, config_path: str) -> Dict[str, Any]:
+        """加载配置文件"""
+        return load_config(config_path)
 
     def _setup_logging(self):
         """设置日志"""
@@ -106,7 +243,10 @@ class PDFHeadingExtractorAgent:
         handlers = [logging.FileHandler(log_file, encoding="utf-8")]
 
         if log_config.get("console", True):
-            handlers.append(logging.StreamHandler())
+            stream_handler = logging.StreamHandler()
+            if _console_quiet:
+                stream_handler.setLevel(logging.WARNING)
+            handlers.append(stream_handler)
 
         logging.basicConfig(
             level=getattr(logging, level),
@@ -133,26 +273,26 @@ class PDFHeadingExtractorAgent:
         try:
             # Phase 1: 文档分析
             console.print("\n[bold cyan]Phase 1:[/] 文档分析...")
-            pdf_info, text_blocks = self._phase_document_analysis(pdf_path)
+            pdf_info, text_blocks = self._phase_document_reading(pdf_path)
 
-            # Phase 2: 标题识别
-            console.print("\n[bold cyan]Phase 2:[/] 标题识别...")
-            candidate_headings = self._phase_heading_identification(
-                text_blocks, pdf_info
-            )
-
-            # Phase 3: 层级判定
-            console.print("\n[bold cyan]Phase 3:[/] 层级判定...")
-            headings_with_level = self._phase_level_determination(candidate_headings)
+            if not self.force_llm and self._bookmarks_cover_document(pdf_info):
+                # 快速路径：书签已覆盖全文，直接由书签构建标题树，跳过文本提取和所有LLM调用
+                console.print(f"  ✓ 书签覆盖全文，跳过文本提取和LLM分析")
+                heading_tree = self._build_tree_from_bookmarks(pdf_info)
+            else:
+                if text_blocks is None:
+                    text_blocks = self._extract_text_blocks(pdf_path)
 
-            # Phase 4: 关系构建
-            console.print("\n[bold cyan]Phase 4:[/] 关系构建...")
-            heading_tree = self._phase_relationship_building(headings_with_level)
+                # 相同文档（文本内容一致）直接复用缓存结果，跳过所有LLM调用
+                cache_key = self._get_cache_key(pdf_info, text_blocks)
+                heading_tree = self.result_cache.get(cache_key) if self.enable_cache else None
 
-            # Phase 5: 反思验证（可选）
-            if self.enable_reflection:
-                console.print("\n[bold cyan]Phase 5:[/] 反思验证...")
-                heading_tree = self._phase_reflection(heading_tree, pdf_info)
+                if heading_tree is not None:
+                    console.print(f"  ✓ 命中结果缓存，跳过LLM分析")
+                else:
+                    heading_tree = self._run_llm_pipeline(pdf_info, text_blocks)
+                    if self.enable_cache:
+                        self.result_cache.set(cache_key, heading_tree)
 
             # 保存结果
             self._save_results(heading_tree, pdf_path, pdf_info)
@@ -168,21 +308,263 @@ class PDFHeadingExtractorAgent:
             logger.error(f"处理失败: {e}", exc_info=True)
             raise
 
-    def _phase_document_analysis(
-        self, pdf_path: str
-    ) -> tuple[Dict[str, Any], List[Any]]:
-        """Phase 1: 文档分析"""
+    def batch_extract(
+        self, pdf_paths: List[str], max_concurrency: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        批量提取多个PDF的标题（同步入口）
+
+        Args:
+            pdf_paths: PDF文件路径列表
+            max_concurrency: 最大并发数，None表示使用配置中的 performance.max_workers
+
+        Returns:
+            每个PDF的处理结果列表，顺序与输入一致
+        """
+        return run_sync(self.batch_extract_async(pdf_paths, max_concurrency))
+
+    async def batch_extract_async(
+        self, pdf_paths: List[str], max_concurrency: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        并发批量提取多个PDF的标题
+
+        使用信号量限制同时处理的PDF数量，单个PDF失败不会影响其他PDF。
+
+        Args:
+            pdf_paths: PDF文件路径列表
+            max_concurrency: 最大并发数，None表示使用配置中的 performance.max_workers
+
+        Returns:
+            每个PDF的处理结果列表，格式为
+            {"pdf": 路径, "status": "success"/"failed", "headings"/"error": ...}
+        """
+        if max_concurrency is None:
+            max_concurrency = self.config.get("performance", {}).get("max_workers", 4)
+        max_concurrency = max(1, max_concurrency)
+        semaphore = asyncio.Semaphore(max_concurrency)
+        pool = self._get_agent_pool(max_concurrency)
+
+        # 预读：后台线程按顺序读取后续PDF并计算内容指纹，最多领先已完成数量 并发数+2 个文件，
+        # 使处理开始时文件已在页缓存中、解析缓存的指纹也已算好
+        read_ahead = asyncio.Semaphore(max_concurrency + 2)
+
+        async def prefetch():
+            for pdf_path in pdf_paths:
+                await read_ahead.acquire()
+                try:
+                    await asyncio.to_thread(pdf_fingerprint, pdf_path)
+                except OSError:
+                    pass  # 文件问题由提取流程报告
+
+        async def extract_one(pdf_path: str) -> Dict[str, Any]:
+            async with semaphore:
+                try:
+                    # LLM调用为阻塞的网络IO，放到线程中执行以便多个PDF重叠等待
+                    headings = await asyncio.to_thread(self._extract_with_pool, pool, pdf_path)
+                    return {"pdf": pdf_path, "status": "success", "headings": headings}
+                except Exception as e:
+                    return {"pdf": pdf_path, "status": "failed", "error": str(e)}
+                finally:
+                    read_ahead.release()
+
+        logger.info(f"批量处理 {len(pdf_paths)} 个PDF，并发数: {max_concurrency}")
+        prefetcher = asyncio.create_task(prefetch())
+        try:
+            return await asyncio.gather(*(extract_one(p) for p in pdf_paths))
+        finally:
+            prefetcher.cancel()
+
+    def _get_agent_pool(self, size: int) -> AgentPool:
+        """
+        获取Agent对象池，池容量不小于并发数
+
+        池中Agent按需以相同配置创建，并在多次批量处理之间复用，从而避免重复加载配置、
+        创建LLM客户端和工具。自身不放入池中：池中Agent的统计信息只在锁内汇总到自身，
+        不会与并发任务的写入交错。
+        """
+        if self._agent_pool is None:
+            self._agent_pool = AgentPool(
+                lambda: PDFHeadingExtractorAgent(self.config_path), max_size=size
+            )
+        else:
+            self._agent_pool.max_size = max(self._agent_pool.max_size, size)
+        return self._agent_pool
+
+    def _extract_with_pool(self, pool: AgentPool, pdf_path: str) -> List[Dict[str, Any]]:
+        """从对象池借出一个Agent处理单个PDF（并发任务各自独占一个Agent，互不干扰）"""
+        with pool.acquire() as agent:
+            # 同步运行时覆盖的选项（如命令行的 --no-reflection / --no-cache）
+            agent.enable_reflection = self.enable_reflection
+            agent.enable_cache = self.enable_cache
+            agent.batch_mode = self.batch_mode
+            agent.force_llm = self.force_llm
+            agent.memory.clear()
+
+            try:
+                return agent.extract_headings(pdf_path)
+            finally:
+                # 汇总统计信息到当前Agent
+                with self._stats_lock:
+                    for key, value in agent.stats.items():
+                        self.stats[key] += value
+                agent.stats = dict.fromkeys(agent.stats, 0)
+
+    def _run_llm_pipeline(
+        self, pdf_info: Dict[str, Any], text_blocks: List[Any]
+    ) -> List[Dict[str, Any]]:
+        """执行LLM驱动的分析流程（Phase 1 LLM分析 ~ Phase 5）"""
+        # 书签足够时Phase 2不会使用LLM分析结果，省去这一次LLM调用
+        if self._has_enough_bookmarks(pdf_info):
+            self.memory.add_context("document_analysis", "书签数量充足，未进行LLM分析")
+        else:
+            self._analyze_document_structure(pdf_info, text_blocks)
+
+        # Phase 2: 标题识别
+        console.print("\n[bold cyan]Phase 2:[/] 标题识别...")
+        candidate_headings = self._phase_heading_identification(
+            text_blocks, pdf_info
+        )
+
+        # Phase 3: 层级判定
+        console.print("\n[bold cyan]Phase 3:[/] 层级判定...")
+        headings_with_level = self._phase_level_determination(candidate_headings)
+
+        # Phase 4: 关系构建
+        console.print("\n[bold cyan]Phase 4:[/] 关系构建...")
+        heading_tree = self._phase_relationship_building(headings_with_level)
+
+        # Phase 5: 反思验证（可选）
+        if self.enable_reflection:
+            console.print("\n[bold cyan]Phase 5:[/] 反思验证...")
+            heading_tree = self._phase_reflection(heading_tree, pdf_info)
+
+        return heading_tree
+
+    def _get_cache_key(self, pdf_info: Dict[str, Any], text_blocks: List[Any]) -> str:
+        """
+        计算结果缓存键
+
+        由文档指纹（文本块内容 + 页数）、Prompt指纹（模型 + 全部Prompt）和影响结果的流程设置
+        （是否反思、PDF分批配置、候选筛选条件）组成，任一变化都会使缓存失效。
+        """
+        doc_digest = hashlib.sha256()
+        for block in text_blocks:
+            doc_digest.update(block.text.encode("utf-8"))
+            doc_digest.update(b"\n")
+        doc_digest.update(str(pdf_info.get("total_pages", 0)).encode("utf-8"))
+
+        return self.result_cache.make_key(
+            doc_digest.hexdigest(), self._prompt_fingerprint(), self._pipeline_settings()
+        )
+
+    def _prompt_fingerprint(self) -> str:
+        """计算Prompt指纹（模型 + 全部Prompt），每个页段都会用到，按输入缓存"""
+        return _prompt_digest(
+            self.llm_client.model, self.llm_client.model_fast, self.prompt_manager.fingerprint()
+        )
+
+    def _pipeline_settings(self) -> str:
+        """影响标题结果的流程设置（序列化为字符串参与结果缓存键）"""
+        return json.dumps(
+            {
+                "enable_reflection": self.enable_reflection,
+                "pdf": self.config.get("pdf", {}),
+                "prefilter": [PREFILTER_MIN_LENGTH, PREFILTER_MAX_LENGTH, PREFILTER_MIN_FONT_SIZE],
+                "max_candidates": MAX_IDENTIFY_CANDIDATES,
+            },
+            ensure_ascii=False,
+            sort_keys=True,
+            default=str,
+        )
+
+    def _phase_document_analysis(self, pdf_path: str) -> Dict[str, Any]:
+        """Phase 1: 文档分析（读取PDF信息）"""
         self.stats["tool_calls"] += 1
 
         # 使用工具读取PDF信息
         pdf_info = self.pdf_reader.read_pdf_info(pdf_path)
         console.print(f"  ✓ PDF信息: {pdf_info['total_pages']}页")
 
-        # 提取文本块
+        return pdf_info
+
+    def _phase_document_reading(self, pdf_path: str) -> tuple[Dict[str, Any], Optional[List[Any]]]:
+        """
+        Phase 1: 读取PDF信息，必要时同时提取文本块
+
+        强制LLM分析时一定需要文本块，与读取PDF信息并行进行；否则先读取PDF信息，
+        书签覆盖全文时可以完全跳过文本提取。
+
+        Args:
+            pdf_path: PDF文件路径
+
+        Returns:
+            (PDF信息, 文本块列表)；未提取文本块时为None
+        """
+        if not self.force_llm:
+            return self._phase_document_analysis(pdf_path), None
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            text_future = executor.submit(self.text_extractor.extract_text_blocks, pdf_path)
+            pdf_info = self._phase_document_analysis(pdf_path)
+            text_blocks = text_future.result()
+
+        self.stats["tool_calls"] += 1
+        console.print(f"  ✓ 提取文本块: {len(text_blocks)}个")
+
+        return pdf_info, text_blocks
+
+    def _extract_text_blocks(self, pdf_path: str) -> List[Any]:
+        """Phase 1: 文档分析（提取文本块）"""
         self.stats["tool_calls"] += 1
         text_blocks = self.text_extractor.extract_text_blocks(pdf_path)
         console.print(f"  ✓ 提取文本块: {len(text_blocks)}个")
 
+        return text_blocks
+
+    def _bookmarks_cover_document(self, pdf_info: Dict[str, Any]) -> bool:
+        """
+        判断书签是否足以直接作为标题结果
+
+        书签数量不少于 agent.bookmark_fastpath_min，且最后一个书签所在页
+        达到总页数的 agent.bookmark_fastpath_coverage 比例。
+        """
+        bookmarks = pdf_info.get("bookmarks", [])
+        total_pages = pdf_info.get("total_pages", 0)
+        if len(bookmarks) < self.bookmark_fastpath_min or total_pages <= 0:
+            return False
+
+        coverage = max(b["page"] for b in bookmarks) / total_pages
+        return coverage > self.bookmark_fastpath_coverage
+
+    def _build_tree_from_bookmarks(self, pdf_info: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """由书签直接构建标题树（不调用LLM）"""
+        self.memory.add_context("document_analysis", "书签覆盖全文，未进行LLM分析")
+
+        headings = self._bookmarks_to_headings(pdf_info.get("bookmarks", []))
+        return self._phase_relationship_building(headings)
+
+    def _has_enough_bookmarks(self, pdf_info: Dict[str, Any]) -> bool:
+        """书签数量是否足以在Phase 2中直接作为候选标题（超过10个）"""
+        return len(pdf_info.get("bookmarks", [])) > 10
+
+    def _bookmarks_to_headings(self, bookmarks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """将书签转换为候选标题"""
+        return [
+            {
+                "text": bookmark["text"],
+                "page": bookmark["page"],
+                "level": bookmark["level"],
+                "confidence": 1.0,
+                "source": "bookmark",
+            }
+            for bookmark in bookmarks
+        ]
+
+    def _analyze_document_structure(
+        self, pdf_info: Dict[str, Any], text_blocks: List[Any]
+    ):
+        """Phase 1: 文档分析（结构分析 + LLM整体分析）"""
         # 结构分析
         self.stats["tool_calls"] += 1
         doc_summary = self.structure_analyzer.get_document_summary(
@@ -210,31 +592,18 @@ class PDFHeadingExtractorAgent:
         # 记忆保存
         self.memory.add_context("document_analysis", analysis)
 
-        return pdf_info, text_blocks
-
     def _phase_heading_identification(
         self, text_blocks: List[Any], pdf_info: Dict[str, Any]
     ) -> List[Dict[str, Any]]:
         """Phase 2: 标题识别"""
-        candidate_headings = []
-
         # 如果有书签，优先使用
         bookmarks = pdf_info.get("bookmarks", [])
+        candidate_headings = self._bookmarks_to_headings(bookmarks)
         if bookmarks:
             console.print(f"  ✓ 使用PDF书签: {len(bookmarks)}个")
-            for bookmark in bookmarks:
-                candidate_headings.append(
-                    {
-                        "text": bookmark["text"],
-                        "page": bookmark["page"],
-                        "level": bookmark["level"],
-                        "confidence": 1.0,
-                        "source": "bookmark",
-                    }
-                )
 
         # 如果书签足够，直接返回
-        if len(candidate_headings) > 10:
+        if self._has_enough_bookmarks(pdf_info):
             console.print(f"  ✓ 书签数量充足，跳过LLM分析")
             return candidate_headings
 
@@ -249,62 +618,313 @@ class PDFHeadingExtractorAgent:
         console.print(f"  → 使用LLM分析候选文本块...")
 
         # 预筛选：只分析可能是标题的文本块
-        candidates = []
-        for i, block in enumerate(text_blocks):
-            # 标题特征：短文本、大字体、独立行
-            if 5 < len(block.text) < 100 and block.font_size > 10:
-                candidates.append((i, block))
+        candidates = [(i, text_blocks[i]) for i in self._prefilter_candidates(text_blocks)]
 
         console.print(f"  → 预筛选出 {len(candidates)} 个候选文本块")
 
+        # 去重：相同文本（页眉、页脚、重复的栏目名等）只交给LLM判断一次
+        first_by_text = {}
+        for i, block in candidates:
+            first_by_text.setdefault(block.text, (i, block))
+        unique_candidates = list(first_by_text.values())
+        if len(unique_candidates) < len(candidates):
+            console.print(f"  → 去重后剩余 {len(unique_candidates)} 个不同文本")
+
         # 限制分析数量
-        max_analyze = min(len(candidates), 50)
-
-        with Progress(
-            SpinnerColumn(),
-            TextColumn("[progress.description]{task.description}"),
-            console=console,
-        ) as progress:
-            task = progress.add_task("识别中...", total=max_analyze)
-
-            for idx, (i, block) in enumerate(candidates[:max_analyze]):
-                # 获取上下文
-                context = self.text_extractor.get_context(text_blocks, i, window=2)
-
-                # 使用LLM判断
-                heading_prompt = self.prompt_manager.get_heading_identification_prompt(
-                    block.text, context
-                )
+        max_analyze = min(len(unique_candidates), MAX_IDENTIFY_CANDIDATES)
+        analyzed = unique_candidates[:max_analyze]
+
+        # 按页段分组（每组 pdf.batch_size 页），各页段并发交给LLM识别
+        page_ranges = {}
+        for i, block in analyzed:
+            range_index = (block.page - 1) // self.pages_per_task
+            page_ranges.setdefault(range_index, []).append((i, block))
+        range_groups = [page_ranges[k] for k in sorted(page_ranges)]
+
+        # 一次性计算所有待分析候选的上下文，供各页段构建Prompt
+        contexts = self.text_extractor.get_contexts(
+            text_blocks, [i for i, _ in analyzed], window=2
+        )
 
-                try:
-                    self.stats["llm_calls"] += 1
-                    response = self.llm_client.invoke(
-                        self.prompt_manager.get_system_prompt(), heading_prompt
+        console.print(f"  → 分为 {len(range_groups)} 个页段并发识别")
+
+        partials = None
+
+        # 批量模式：候选足够多时通过Batch API一次提交，费用减半但需等待批次完成
+        if self.batch_mode and max_analyze >= self.batch_threshold:
+            try:
+                partials = self._identify_ranges_with_batch_api(contexts, range_groups)
+            except Exception as e:
+                logger.warning(f"Batch API调用失败，改用实时调用: {e}")
+
+        if partials is None:
+            from rich.progress import Progress, SpinnerColumn, TextColumn
+
+            # rich同一时间只允许一个动态显示，批量并发处理时（工作线程中）关闭进度条
+            with Progress(
+                SpinnerColumn(),
+                TextColumn("[progress.description]{task.description}"),
+                console=_get_console(),
+                disable=threading.current_thread() is not threading.main_thread(),
+            ) as progress:
+                task = progress.add_task("识别中...", total=max_analyze)
+
+                partials = run_sync(
+                    self._identify_ranges_async(
+                        contexts,
+                        range_groups,
+                        lambda group: progress.update(task, advance=len(group)),
                     )
+                )
 
-                    # 解析响应
-                    result = self.response_parser.extract_json_from_text(response)
-
-                    if result and result.get("is_heading"):
-                        candidate_headings.append(
-                            {
-                                "text": block.text,
-                                "page": block.page,
-                                "level": result.get("level_guess", 0),
-                                "confidence": result.get("confidence", 0.5),
-                                "source": "llm",
-                                "font_size": block.font_size,
-                            }
-                        )
+        identified = {}
+        for headings, llm_calls in partials:
+            for heading in headings:
+                identified[heading["text"]] = heading
+            self.stats["llm_calls"] += llm_calls
+
+        # 将识别结果分发给所有同文本的候选文本块（按文档顺序）
+        analyzed_texts = {block.text for _, block in analyzed}
+        for i, block in candidates:
+            heading = identified.get(block.text) if block.text in analyzed_texts else None
+            if heading:
+                candidate_headings.append(
+                    {**heading, "page": block.page, "font_size": block.font_size}
+                )
 
+        console.print(f"  ✓ 识别候选标题: {len(candidate_headings)}个")
+
+        return candidate_headings
+
+    def _prefilter_candidates(self, text_blocks: List[Any]) -> List[int]:
+        """
+        预筛选可能是标题的文本块（标题特征：短文本、大字体）
+
+        文本长度与字体大小转为数组后一次性比较，避免逐块的Python分支判断。
+
+        Args:
+            text_blocks: 全部文本块
+
+        Returns:
+            候选文本块的索引（升序）
+        """
+        n = len(text_blocks)
+        lengths = np.fromiter((len(block.text) for block in text_blocks), dtype=np.int64, count=n)
+        font_sizes = np.fromiter((block.font_size for block in text_blocks), dtype=np.float64, count=n)
+
+        mask = (
+            (lengths > PREFILTER_MIN_LENGTH)
+            & (lengths < PREFILTER_MAX_LENGTH)
+            & (font_sizes > PREFILTER_MIN_FONT_SIZE)
+        )
+        return np.flatnonzero(mask).tolist()
+
+    async def _identify_ranges_async(
+        self,
+        contexts: Dict[int, str],
+        range_groups: List[List[tuple]],
+        on_range_done: Callable[[List[tuple]], None],
+    ) -> List[tuple[List[Dict[str, Any]], int]]:
+        """
+        并发识别所有页段，同时进行的LLM调用不超过 performance.max_workers 个
+
+        Args:
+            contexts: 候选文本块索引 -> 上下文文本
+            range_groups: 按页段分组的 (索引, 文本块) 列表
+            on_range_done: 每个页段完成后的回调（用于更新进度）
+
+        Returns:
+            与range_groups一一对应的 (识别出的标题列表, LLM调用次数) 列表
+        """
+        semaphore = asyncio.Semaphore(self.max_workers)
+
+        async def identify(group: List[tuple]):
+            result = await self._identify_page_range(contexts, group, semaphore)
+            on_range_done(group)
+            return result
+
+        try:
+            return await asyncio.gather(*(identify(group) for group in range_groups))
+        finally:
+            await self.llm_client.aclose()
+
+    async def _identify_page_range(
+        self,
+        contexts: Dict[int, str],
+        candidates: List[tuple],
+        semaphore: asyncio.Semaphore,
+    ) -> tuple[List[Dict[str, Any]], int]:
+        """
+        识别一个页段内的候选文本块
+
+        候选按 prompts.identification_batch_size 分块，每块一次LLM调用，各块并发请求。
+        页段结果按候选文本及其上下文的指纹缓存，重复运行时跳过已完成的页段。
+
+        Args:
+            contexts: 候选文本块索引 -> 上下文文本
+            candidates: 该页段内的 (索引, 文本块) 列表
+            semaphore: 限制同时进行的LLM调用数
+
+        Returns:
+            (识别出的标题列表, LLM调用次数)
+        """
+        system_prompt = self.prompt_manager.get_system_prompt()
+        batches = self._build_identification_prompts(contexts, candidates)
+
+        cache_key = self.range_cache.make_key(
+            self._prompt_fingerprint(), *(prompt for _, prompt in batches)
+        )
+        if self.enable_cache:
+            cached = self.range_cache.get(cache_key)
+            if cached is not None:
+                return cached, 0
+
+        async def identify(chunk: List[tuple], batch_prompt: str):
+            # 使用LLM判断
+            async with semaphore:
+                response = await self.llm_client.ainvoke(
+                    system_prompt, batch_prompt, model=self.llm_client.model_fast
+                )
+            return self._parse_identification(chunk, response)
+
+        outcomes = await asyncio.gather(
+            *(identify(chunk, batch_prompt) for chunk, batch_prompt in batches),
+            return_exceptions=True,
+        )
+
+        headings = []
+        failed = False
+        for outcome in outcomes:
+            if isinstance(outcome, Exception):
+                failed = True
+                logger.warning(f"LLM识别失败: {outcome}")
+                continue
+
+            chunk_headings, complete = outcome
+            headings.extend(chunk_headings)
+            failed = failed or not complete
+
+        # 有调用失败的页段不缓存，下次运行时重试
+        if self.enable_cache and not failed:
+            self.range_cache.set(cache_key, headings)
+
+        return headings, len(batches)
+
+    def _identify_ranges_with_batch_api(
+        self, contexts: Dict[int, str], range_groups: List[List[tuple]]
+    ) -> List[tuple[List[Dict[str, Any]], int]]:
+        """
+        通过Batch API识别所有页段（未命中缓存的页段合并为一个批次提交）
+
+        Args:
+            contexts: 候选文本块索引 -> 上下文文本
+            range_groups: 按页段分组的 (索引, 文本块) 列表
+
+        Returns:
+            与range_groups一一对应的 (识别出的标题列表, LLM调用次数) 列表
+        """
+        system_prompt = self.prompt_manager.get_system_prompt()
+        prompt_fingerprint = self._prompt_fingerprint()
+        results = [([], 0)] * len(range_groups)
+        pending = []
+        requests = []
+
+        for group_index, group in enumerate(range_groups):
+            batches = self._build_identification_prompts(contexts, group)
+            cache_key = self.range_cache.make_key(
+                prompt_fingerprint, *(prompt for _, prompt in batches)
+            )
+            cached = self.range_cache.get(cache_key) if self.enable_cache else None
+            if cached is not None:
+                results[group_index] = (cached, 0)
+                continue
+
+            pending.append((group_index, batches, cache_key))
+            requests.extend(
+                (f"{group_index}-{n}", system_prompt, prompt)
+                for n, (_, prompt) in enumerate(batches)
+            )
+
+        if not requests:
+            return results
+
+        console.print(f"  → 通过Batch API提交 {len(requests)} 个请求，等待处理完成...")
+        responses = self.batch_llm.run(requests, model=self.llm_client.model_fast)
+
+        for group_index, batches, cache_key in pending:
+            headings = []
+            failed = False
+            for n, (chunk, _) in enumerate(batches):
+                response = responses.get(f"{group_index}-{n}")
+                if response is None:
+                    failed = True
+                    continue
+                try:
+                    chunk_headings, complete = self._parse_identification(chunk, response)
                 except Exception as e:
-                    logger.warning(f"LLM识别失败: {e}")
+                    failed = True
+                    logger.warning(f"LLM识别结果解析失败: {e}")
+                    continue
+                headings.extend(chunk_headings)
+                failed = failed or not complete
 
-                progress.update(task, advance=1)
+            # 有请求失败的页段不缓存，下次运行时重试
+            if self.enable_cache and not failed:
+                self.range_cache.set(cache_key, headings)
 
-        console.print(f"  ✓ 识别候选标题: {len(candidate_headings)}个")
+            results[group_index] = (headings, len(batches))
 
-        return candidate_headings
+        return results
+
+    def _build_identification_prompts(
+        self, contexts: Dict[int, str], candidates: List[tuple]
+    ) -> List[tuple[List[tuple], str]]:
+        """
+        将候选文本块分块，为每块构建一个批量标题识别Prompt（含上下文）
+
+        Returns:
+            (该块的 (索引, 文本块) 列表, Prompt) 列表
+        """
+        batches = []
+        iterator = iter(candidates)
+        while chunk := list(islice(iterator, self.identification_batch_size)):
+            items = [(block.text, contexts[i]) for i, block in chunk]
+            batches.append(
+                (chunk, self.prompt_manager.get_batch_heading_identification_prompt(items))
+            )
+        return batches
+
+    def _parse_identification(
+        self, chunk: List[tuple], response: str
+    ) -> tuple[List[Dict[str, Any]], bool]:
+        """
+        解析批量标题识别响应，按编号与候选文本块对应
+
+        Returns:
+            (识别出的标题列表, 响应是否覆盖了所有编号)
+        """
+        results = self.response_parser.parse_batch_heading_identification(response)
+
+        headings = []
+        for n, (i, block) in enumerate(chunk, 1):
+            result = results.get(n)
+            if result and result.get("is_heading"):
+                headings.append(
+                    {
+                        "text": block.text,
+                        "page": block.page,
+                        "level": result.get("level_guess", 0),
+                        "confidence": result.get("confidence", 0.5),
+                        "source": "llm",
+                        "font_size": block.font_size,
+                    }
+                )
+
+        complete = all(n in results for n in range(1, len(chunk) + 1))
+        if not complete:
+            logger.warning(f"批量识别响应缺少部分编号: {len(results)}/{len(chunk)}")
+
+        return headings, complete
 
     def _phase_level_determination(
         self, candidate_headings: List[Dict[str, Any]]
@@ -321,20 +941,22 @@ class PDFHeadingExtractorAgent:
         console.print(f"  → 使用LLM判定层级（分批处理）...")
 
         batch_size = 50
-        all_results = []
-
-        for i in range(0, len(candidate_headings), batch_size):
-            batch = candidate_headings[i:i+batch_size]
-            console.print(f"  → 处理批次 {i//batch_size + 1}/{(len(candidate_headings)-1)//batch_size + 1}")
+        batches = [
+            candidate_headings[i:i+batch_size]
+            for i in range(0, len(candidate_headings), batch_size)
+        ]
+        console.print(f"  → 并发处理 {len(batches)} 个批次")
 
-            level_prompt = self.prompt_manager.get_level_determination_prompt(batch)
+        self.stats["llm_calls"] += len(batches)
+        responses = run_sync(self._determine_levels_async(batches))
 
-            self.stats["llm_calls"] += 1
-            response = self.llm_client.invoke(
-                self.prompt_manager.get_system_prompt(), level_prompt
-            )
+        all_results = []
+        for batch, (streamed, response) in zip(batches, responses):
+            # 流式解析已得到完整的headings数组时直接使用，否则整体解析响应
+            if streamed is not None:
+                all_results.extend(streamed)
+                continue
 
-            # 解析响应
             result = self.response_parser.extract_json_from_text(response)
 
             if result and "headings" in result:
@@ -345,6 +967,42 @@ class PDFHeadingExtractorAgent:
         console.print(f"  ✓ 层级判定完成: {len(all_results)}个标题")
         return all_results
 
+    async def _determine_levels_async(
+        self, batches: List[List[Dict[str, Any]]]
+    ) -> List[tuple[Optional[List[Dict[str, Any]]], str]]:
+        """
+        并发请求各批次的层级判定，同时进行的LLM调用不超过 performance.max_workers 个
+
+        响应以流式接收，headings数组中的元素在到达时即被解析，与网络接收重叠。
+
+        Args:
+            batches: 分批的候选标题
+
+        Returns:
+            与batches一一对应的 (流式解析出的标题列表, 完整响应文本) 列表；
+            未能流式解析出完整数组时标题列表为None
+        """
+        system_prompt = self.prompt_manager.get_system_prompt()
+        semaphore = asyncio.Semaphore(self.max_workers)
+
+        async def determine(batch: List[Dict[str, Any]]):
+            level_prompt = self.prompt_manager.get_level_determination_prompt(batch)
+            stream = JSONArrayStream("headings")
+            headings = []
+            parts = []
+            async with semaphore:
+                async for chunk in self.llm_client.astream(
+                    system_prompt, level_prompt, model=self.llm_client.model_fast
+                ):
+                    parts.append(chunk)
+                    headings.extend(stream.feed(chunk))
+            return (headings if stream.closed else None), "".join(parts)
+
+        try:
+            return await asyncio.gather(*(determine(batch) for batch in batches))
+        finally:
+            await self.llm_client.aclose()
+
     def _phase_relationship_building(
         self, headings: List[Dict[str, Any]]
     ) -> List[Dict[str, Any]]:
@@ -357,28 +1015,41 @@ class PDFHeadingExtractorAgent:
             heading["id"] = idx
             heading["children"] = []
 
-        # 构建父子关系
+        # 单遍扫描同时完成：父子关系、下一个同级标题、顶级标题数、最大层级。
+        # 栈中是当前节点的祖先链；被弹出的节点若与当前节点同级，当前节点就是它的
+        # 下一个同级标题（两者的父节点相同）；被更高层级（层级数更小）的标题弹出的节点没有后续同级标题
         stack = []  # 用于追踪父节点
-        for heading in headings:
+        next_sibling_index = [None] * len(headings)
+        top_level_count = 0
+        max_level = 0
+        for j, heading in enumerate(headings):
             level = heading.get("level", 1)
+            max_level = max(max_level, level)
 
             # 找到父节点：弹出所有层级>=当前层级的节点
             while stack and stack[-1]["level"] >= level:
-                stack.pop()
+                popped = stack.pop()
+                if popped.get("level", 1) == level:
+                    next_sibling_index[popped["id"]] = j
 
             if stack:
                 # 添加到父节点的children
                 parent = stack[-1]
                 parent["children"].append(heading["id"])
+            else:
+                top_level_count += 1
 
             stack.append(heading)
 
         # 在过滤前添加页码范围信息（基于所有节点，包括将被过滤的节点）
         # 这样可以保留原始的章节边界信息
-        self._add_page_ranges(headings)
+        self._add_page_ranges(headings, next_sibling_index)
 
-        # 统计顶级标题数量
-        top_level_count = sum(1 for h in headings if not any(h["id"] in other.get("children", []) for other in headings))
+        # 统计信息供Phase 5直接使用，无需再次遍历
+        self.memory.add_context(
+            "tree_stats",
+            {"total": len(headings), "top_level": top_level_count, "max_level": max_level},
+        )
 
         console.print(f"  ✓ 关系构建完成: {top_level_count}个顶级标题, 共{len(headings)}个标题")
         return headings
@@ -387,10 +1058,16 @@ class PDFHeadingExtractorAgent:
         self, heading_tree: List[Dict[str, Any]], pdf_info: Dict[str, Any]
     ) -> List[Dict[str, Any]]:
         """Phase 5: 反思验证（简化版）"""
-        # 统计验证
+        # 统计验证（优先使用Phase 4构建时已得到的统计）
         total_headings = len(heading_tree)
-        top_level = sum(1 for h in heading_tree if not any(h["id"] in other.get("children", []) for other in heading_tree))
-        max_level = max(h.get("level", 1) for h in heading_tree) if heading_tree else 0
+        tree_stats = self.memory.get_context("tree_stats")
+        if tree_stats and tree_stats["total"] == total_headings:
+            top_level = tree_stats["top_level"]
+            max_level = tree_stats["max_level"]
+        else:
+            child_ids = {child_id for h in heading_tree for child_id in h.get("children", [])}
+            top_level = sum(1 for h in heading_tree if h["id"] not in child_ids)
+            max_level = max(h.get("level", 1) for h in heading_tree) if heading_tree else 0
 
         # 简单的完整性检查
         is_complete = total_headings > 0 and top_level > 0
@@ -416,38 +1093,20 @@ class PDFHeadingExtractorAgent:
         console.print(f"\n[bold green]✓ 结果已保存到:[/] {output_path}")
         console.print(f"  → 过滤后保留 {len(filtered_tree)} 个财务报表相关节点")
 
-    def _add_page_ranges(self, headings: List[Dict[str, Any]]):
-        """为每个标题添加页码范围信息（下一个同级标题的页码）"""
-        # 构建父子关系映射
-        parent_map = {}  # {child_id: parent_id}
-        for heading in headings:
-            for child_id in heading.get("children", []):
-                parent_map[child_id] = heading["id"]
-
-        # 为每个标题找到下一个同级标题
-        for i, heading in enumerate(headings):
-            heading_id = heading["id"]
-            heading_level = heading.get("level", 1)
-            parent_id = parent_map.get(heading_id)
-
-            # 查找下一个同级标题
-            next_sibling_page = None
-
-            # 从当前标题之后开始查找
-            for j in range(i + 1, len(headings)):
-                next_heading = headings[j]
-                next_id = next_heading["id"]
-                next_level = next_heading.get("level", 1)
-                next_parent_id = parent_map.get(next_id)
-
-                # 判断是否为同级标题（相同父节点和相同层级）
-                if next_level == heading_level and next_parent_id == parent_id:
-                    next_sibling_page = next_heading.get("page")
-                    break
-
-                # 如果遇到更高层级的标题，说明当前标题没有后续同级标题了
-                if next_level < heading_level:
-                    break
+    def _add_page_ranges(
+        self, headings: List[Dict[str, Any]], next_sibling_index: List[Optional[int]]
+    ):
+        """
+        为每个标题添加页码范围信息（下一个同级标题的页码）
+
+        Args:
+            headings: 标题列表
+            next_sibling_index: 每个标题的下一个同级标题（相同父节点和相同层级）的索引，没有时为None
+        """
+        for heading, sibling_index in zip(headings, next_sibling_index):
+            next_sibling_page = (
+                headings[sibling_index].get("page") if sibling_index is not None else None
+            )
 
             # 添加页码范围信息
             heading["next_sibling_page"] = next_sibling_page
@@ -485,37 +1144,18 @@ class PDFHeadingExtractorAgent:
 
     def _filter_financial_statements(self, headings: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """过滤出财务报表相关的节点"""
-        keywords = [
-            "合并资产负债表",
-            "合并利润表",
-            "合并现金流量表",
-            "合并财务报表项目注释",
-            "财务报表附注",
-            "报表附注",
-            "附注"
-        ]
-
-        # 构建ID到标题的映射
-        heading_map = {h["id"]: h for h in headings}
+        # 构建ID到子节点列表的映射
+        children_map = {h["id"]: h.get("children", []) for h in headings}
 
-        # 找到匹配的节点及其所有子孙节点
+        # 找到匹配的节点，再用显式栈收集其所有子孙节点
+        stack = [h["id"] for h in headings if is_financial_statement_title(h.get("text", ""))]
         result_ids = set()
-
-        def add_node_and_children(node_id):
-            """递归添加节点及其所有子节点"""
+        while stack:
+            node_id = stack.pop()
             if node_id in result_ids:
-                return
+                continue
             result_ids.add(node_id)
-            node = heading_map.get(node_id)
-            if node:
-                for child_id in node.get("children", []):
-                    add_node_and_children(child_id)
-
-        # 查找匹配的节点
-        for heading in headings:
-            text = heading.get("text", "")
-            if any(kw in text for kw in keywords):
-                add_node_and_children(heading["id"])
+            stack.extend(children_map.get(node_id, ()))
 
         # 返回过滤后的节点
         return [h for h in headings if h["id"] in result_ids]
@@ -0,0 +1,128 @@
+"""
+批量LLM调用（Anthropic Message Batches API）
+一次提交大量相互独立的请求，异步等待处理完成后统一取回结果。
+费用约为实时调用的一半，但结果延迟较高（分钟级），适合离线批量处理。
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from .async_utils import run_sync
+
+
+logger = logging.getLogger(__name__)
+
+
+class BatchLLM:
+    """Message Batches API封装 - 提交、轮询、取回结果"""
+
+    def __init__(self, llm_client: Any, config: Dict[str, Any]):
+        """
+        初始化批量调用器
+
+        Args:
+            llm_client: LLMClient实例（复用其SDK客户端和模型参数）
+            config: 配置字典
+        """
+        self.llm_client = llm_client
+        self.config = config
+        self.batch_config = config.get("llm", {}).get("batch", {})
+        self.poll_interval = self.batch_config.get("poll_interval", 10)
+        self.max_poll_interval = self.batch_config.get("max_poll_interval", 300)
+        self.timeout = self.batch_config.get("timeout", 86400)
+
+    def submit(self, requests: List[Tuple[str, str, str]], model: Optional[str] = None) -> str:
+        """
+        提交一批请求
+
+        Args:
+            requests: (custom_id, 系统提示词, 用户消息) 列表，custom_id 只能包含字母、数字、-和_
+            model: 使用的模型，默认为主模型
+
+        Returns:
+            批次ID
+        """
+        client = self.llm_client
+        model = model or client.model
+        batch = client.client.messages.batches.create(
+            requests=[
+                {
+                    "custom_id": custom_id,
+                    "params": {
+                        "model": model,
+                        "max_tokens": client.max_tokens,
+                        "temperature": client.temperature,
+                        "system": client.build_system(system_prompt),
+                        "messages": [{"role": "user", "content": user_message}],
+                    },
+                }
+                for custom_id, system_prompt, user_message in requests
+            ]
+        )
+        logger.info(f"已提交Batch: {batch.id} ({len(requests)} 个请求)")
+        return batch.id
+
+    async def poll(self, batch_id: str) -> Any:
+        """
+        轮询直到批次处理结束（轮询间隔指数退避）
+
+        Args:
+            batch_id: 批次ID
+
+        Returns:
+            处理结束的批次对象
+
+        Raises:
+            TimeoutError: 超过配置的等待时间
+        """
+        batches = self.llm_client.client.messages.batches
+        interval = self.poll_interval
+        deadline = time.monotonic() + self.timeout
+
+        while True:
+            batch = await asyncio.to_thread(batches.retrieve, batch_id)
+            if batch.processing_status == "ended":
+                logger.info(f"Batch处理完成: {batch_id}")
+                return batch
+
+            if time.monotonic() + interval > deadline:
+                raise TimeoutError(f"Batch等待超时: {batch_id}")
+
+            logger.debug(f"Batch处理中: {batch_id}，{interval}秒后重试")
+            await asyncio.sleep(interval)
+            interval = min(interval * 2, self.max_poll_interval)
+
+    def collect(self, batch_id: str) -> Dict[str, str]:
+        """
+        取回批次结果
+
+        Args:
+            batch_id: 批次ID
+
+        Returns:
+            custom_id -> 响应文本；失败的请求不在结果中
+        """
+        results = {}
+        for entry in self.llm_client.client.messages.batches.results(batch_id):
+            if entry.result.type == "succeeded":
+                results[entry.custom_id] = entry.result.message.content[0].text
+            else:
+                logger.warning(f"Batch请求未成功: {entry.custom_id} ({entry.result.type})")
+        return results
+
+    def run(self, requests: List[Tuple[str, str, str]], model: Optional[str] = None) -> Dict[str, str]:
+        """
+        提交并等待一批请求完成（同步入口）
+
+        Args:
+            requests: (custom_id, 系统提示词, 用户消息) 列表
+            model: 使用的模型，默认为主模型
+
+        Returns:
+            custom_id -> 响应文本
+        """
+        batch_id = self.submit(requests, model)
+        run_sync(self.poll(batch_id))
+        return self.collect(batch_id)
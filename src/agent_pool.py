@@ -0,0 +1,81 @@
+"""
+Agent对象池
+批量处理时复用已初始化的Agent，避免为每个PDF重复加载配置、创建LLM客户端和工具
+"""
+
+import logging
+import queue
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator
+
+
+logger = logging.getLogger(__name__)
+
+
+class AgentPool:
+    """
+    Agent对象池（线程安全）
+
+    空闲Agent保存在后进先出队列中，优先复用最近用过的Agent（其HTTP连接仍然活跃）。
+    池中Agent数量达到上限后，acquire会阻塞直到有Agent被归还。
+    """
+
+    def __init__(self, factory: Callable[[], Any], max_size: int = 4):
+        """
+        初始化对象池
+
+        Args:
+            factory: 创建新Agent的函数
+            max_size: 池中最多创建的Agent数量
+        """
+        self.factory = factory
+        self.max_size = max_size
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def acquire(self) -> Iterator[Any]:
+        """
+        借出一个Agent，退出with块时自动归还
+
+        Yields:
+            Agent实例
+        """
+        agent = self._take()
+        try:
+            yield agent
+        finally:
+            self.release(agent)
+
+    def release(self, agent: Any):
+        """归还Agent"""
+        self._idle.put(agent)
+
+    def _take(self) -> Any:
+        """取出空闲Agent，没有空闲且未达上限时新建一个"""
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            can_create = self._created < self.max_size
+            if can_create:
+                self._created += 1
+
+        if not can_create:
+            return self._idle.get()
+
+        try:
+            logger.info("Agent对象池创建新Agent")
+            return self.factory()
+        except Exception:
+            with self._lock:
+                self._created -= 1
+            raise
+
+    def __len__(self) -> int:
+        """已创建的Agent数量"""
+        return self._created
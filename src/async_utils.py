@@ -0,0 +1,34 @@
+"""
+同步入口调用协程
+Agent的同步方法内部用asyncio并发调用LLM；调用方自身运行在事件循环中时（Jupyter、异步Web服务），
+asyncio.run 不能在该线程使用，改在独立线程的新事件循环中执行
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Coroutine, TypeVar
+
+
+T = TypeVar("T")
+
+
+def run_sync(coro: Coroutine[Any, Any, T]) -> T:
+    """
+    在同步代码中运行协程并返回结果
+
+    当前线程没有运行中的事件循环时直接 asyncio.run；否则在工作线程中运行，
+    调用方线程阻塞等待（与同步方法的语义一致）。
+
+    Args:
+        coro: 协程对象
+
+    Returns:
+        协程的返回值
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+
+    with ThreadPoolExecutor(max_workers=1, thread_name_prefix="run_sync") as executor:
+        return executor.submit(asyncio.run, coro).result()
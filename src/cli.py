@@ -0,0 +1,309 @@
+"""
+命令行入口 (LLM驱动版本)
+
+子命令:
+  extract  提取一个或多个PDF的标题
+  batch    批量提取目录下的所有PDF（同一进程内复用Agent）
+
+用法:
+  python -m src.cli extract document.pdf
+  python -m src.cli batch examples/ --concurrency 4
+"""
+
+import os
+import sys
+import argparse
+import logging
+from pathlib import Path
+from typing import List, Optional, TYPE_CHECKING
+
+from .log import logger, setup_cli_logging
+
+if TYPE_CHECKING:
+    from .agent import PDFHeadingExtractorAgent
+
+
+def _add_common_arguments(parser: argparse.ArgumentParser):
+    """添加extract/batch共用的参数"""
+    parser.add_argument(
+        "-c",
+        "--config",
+        default="config.yaml",
+        help="配置文件路径（默认: config.yaml）",
+    )
+
+    parser.add_argument(
+        "--no-reflection",
+        action="store_true",
+        help="禁用反思验证阶段",
+    )
+
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="禁用结果缓存，强制重新执行LLM分析",
+    )
+
+    parser.add_argument(
+        "--force-llm",
+        action="store_true",
+        help="即使书签已覆盖全文也使用LLM分析",
+    )
+
+    parser.add_argument(
+        "--batch-mode",
+        action="store_true",
+        help="候选文本块较多时通过Batch API提交LLM请求（费用减半，需等待批次完成）",
+    )
+
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=None,
+        help="批量处理时的最大并发数（默认: 配置中的 performance.max_workers）",
+    )
+
+    parser.add_argument(
+        "-v",
+        "--verbose",
+        action="store_true",
+        help="显示详细日志",
+    )
+
+    parser.add_argument(
+        "-q",
+        "--quiet",
+        action="store_true",
+        help="只输出警告和错误（适合批量任务）",
+    )
+
+    parser.add_argument(
+        "--pretty",
+        action="store_true",
+        help="使用rich美化命令行输出",
+    )
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """构建命令行解析器"""
+    parser = argparse.ArgumentParser(
+        description="PDF多级标题提取Agent (基于LLM)",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+示例:
+  # 提取PDF标题
+  python -m src.cli extract document.pdf
+
+  # 使用自定义配置
+  python -m src.cli extract document.pdf --config custom_config.yaml
+
+  # 禁用反思验证（加快速度）
+  python -m src.cli extract document.pdf --no-reflection
+
+  # 忽略结果缓存，强制重新调用LLM
+  python -m src.cli extract document.pdf --no-cache
+
+  # 批量并发处理多个PDF
+  python -m src.cli extract a.pdf b.pdf c.pdf --concurrency 4
+
+  # 批量处理目录下的所有PDF
+  python -m src.cli batch examples/
+
+  # 查看详细日志
+  python -m src.cli extract document.pdf --verbose
+        """,
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    extract_parser = subparsers.add_parser("extract", help="提取PDF标题")
+    extract_parser.add_argument(
+        "pdf_files",
+        nargs="+",
+        help="PDF文件路径（可指定多个，批量处理）",
+    )
+    _add_common_arguments(extract_parser)
+    extract_parser.add_argument(
+        "--show-reasoning",
+        action="store_true",
+        help="显示Agent的推理过程",
+    )
+
+    batch_parser = subparsers.add_parser("batch", help="批量提取目录下的所有PDF")
+    batch_parser.add_argument(
+        "directory",
+        help="PDF所在目录",
+    )
+    _add_common_arguments(batch_parser)
+
+    return parser
+
+
+def _create_agent(args) -> "PDFHeadingExtractorAgent":
+    """初始化Agent并应用命令行覆盖的配置"""
+    # 延迟导入：--help 和参数错误时无需加载PDF/LLM相关依赖
+    from .agent import PDFHeadingExtractorAgent, set_quiet
+
+    logger.info(f"\n正在初始化Agent...")
+    set_quiet(args.quiet)
+    agent = PDFHeadingExtractorAgent(config_path=args.config)
+
+    # 覆盖配置
+    if args.no_reflection:
+        agent.enable_reflection = False
+        logger.info("  → 已禁用反思验证")
+
+    if args.no_cache:
+        agent.enable_cache = False
+        logger.info("  → 已禁用结果缓存")
+
+    if args.force_llm:
+        agent.force_llm = True
+        logger.info("  → 已禁用书签快速路径")
+
+    if args.batch_mode:
+        agent.batch_mode = True
+        logger.info("  → 已启用Batch API模式")
+
+    if args.verbose:
+        logging.getLogger().setLevel(logging.DEBUG)
+
+    return agent
+
+
+def _run_batch(
+    agent: "PDFHeadingExtractorAgent", pdf_files: List[str], concurrency: Optional[int]
+) -> int:
+    """批量并发处理并打印每个文件的结果，返回处理失败的文件数"""
+    logger.info(f"\n开始批量处理: {len(pdf_files)} 个文件")
+    results = agent.batch_extract(pdf_files, max_concurrency=concurrency)
+
+    failures = 0
+    logger.info("\n" + "=" * 60)
+    for result in results:
+        if result["status"] == "success":
+            logger.info(f"✓ {result['pdf']}: 提取了 {len(result['headings'])} 个标题")
+        else:
+            failures += 1
+            logger.error(f"✗ {result['pdf']}: {result['error']}")
+    if failures:
+        logger.error(f"共 {failures}/{len(results)} 个文件处理失败")
+    logger.info("=" * 60)
+    return failures
+
+
+def _print_tool_usage(agent: "PDFHeadingExtractorAgent"):
+    """打印工具使用统计"""
+    usage = agent.get_tool_usage()
+    logger.info(f"\n工具使用情况:")
+    logger.info(f"  - LLM调用: {usage['llm_calls']} 次")
+    logger.info(f"  - PDF阅读器: {usage['pdf_reader']} 次")
+    logger.info(f"  - 文本提取器: {usage['text_extractor']} 次")
+    logger.info(f"  - 结构分析器: {usage['structure_analyzer']} 次")
+
+
+def run_extract(args) -> int:
+    """extract子命令，返回处理失败的文件数"""
+    # 检查PDF文件
+    for pdf_file in args.pdf_files:
+        if not Path(pdf_file).exists():
+            logger.error(f"\n错误: PDF文件不存在: {pdf_file}")
+            sys.exit(1)
+
+    agent = _create_agent(args)
+
+    failures = 0
+    if len(args.pdf_files) > 1:
+        # 批量并发处理
+        failures = _run_batch(agent, args.pdf_files, args.concurrency)
+    else:
+        # 执行提取
+        pdf_file = args.pdf_files[0]
+        logger.info(f"\n开始处理: {pdf_file}")
+        headings = agent.extract_headings(pdf_file)
+
+        # 显示推理过程
+        if args.show_reasoning:
+            logger.info("\n" + "=" * 60)
+            logger.info("Agent推理过程:")
+            logger.info("=" * 60)
+            reasoning = agent.get_reasoning_trace()
+            for key, value in reasoning.items():
+                logger.info(f"\n【{key}】")
+                logger.info(value)
+
+        logger.info("\n" + "=" * 60)
+        logger.info(f"✓ 完成! 提取了 {len(headings)} 个顶级标题")
+        logger.info("=" * 60)
+
+    _print_tool_usage(agent)
+    return failures
+
+
+def run_batch(args) -> int:
+    """
+    batch子命令：同一进程内处理目录下的所有PDF（大文件优先），Agent只初始化一次
+
+    Returns:
+        处理失败的文件数
+    """
+    directory = Path(args.directory)
+    if not directory.is_dir():
+        logger.error(f"\n错误: 目录不存在: {args.directory}")
+        sys.exit(1)
+
+    # 单次scandir读取目录项类型，按文件大小降序排列：大文件先开始，减少批次末尾的长尾等待
+    with os.scandir(directory) as entries:
+        pdf_entries = [
+            (entry.stat().st_size, entry.path) for entry in entries
+            if entry.is_file() and entry.name.lower().endswith(".pdf")
+        ]
+    pdf_files = [path for _, path in sorted(pdf_entries, key=lambda item: (-item[0], item[1]))]
+    if not pdf_files:
+        logger.error(f"\n错误: 目录中没有PDF文件: {args.directory}")
+        sys.exit(1)
+
+    agent = _create_agent(args)
+    failures = _run_batch(agent, pdf_files, args.concurrency)
+    _print_tool_usage(agent)
+    return failures
+
+
+def main(argv: Optional[List[str]] = None):
+    """主函数"""
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    setup_cli_logging(quiet=args.quiet, pretty=args.pretty, verbose=args.verbose)
+
+    # 加载环境变量
+    from dotenv import load_dotenv
+
+    load_dotenv()
+
+    try:
+        logger.info("=" * 60)
+        logger.info("PDF多级标题提取Agent (LLM驱动)")
+        logger.info("=" * 60)
+
+        if args.command == "batch":
+            failures = run_batch(args)
+        else:
+            failures = run_extract(args)
+
+    except FileNotFoundError as e:
+        logger.error(f"\n错误: {e}")
+        sys.exit(1)
+    except Exception as e:
+        logger.error(f"\n发生错误: {e}")
+        if args.verbose:
+            import traceback
+
+            traceback.print_exc()
+        sys.exit(1)
+
+    # 有文件处理失败时以非零状态退出，便于脚本和CI判断
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
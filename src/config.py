@@ -0,0 +1,87 @@
+"""
+配置加载
+解析结果按（路径, 修改时间）缓存，同一进程内多次创建Agent时不重复解析YAML
+"""
+
+import copy
+import os
+import sys
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict
+
+
+def load_config(config_path: str = "config.yaml") -> Dict[str, Any]:
+    """
+    加载YAML配置文件
+
+    Args:
+        config_path: 配置文件路径
+
+    Returns:
+        配置字典（副本，调用方可以随意修改）
+
+    Raises:
+        FileNotFoundError: 配置文件不存在
+    """
+    config_file = Path(config_path)
+
+    if not config_file.exists():
+        raise FileNotFoundError(f"配置文件不存在: {config_path}")
+
+    resolved = str(config_file.resolve())
+    config = copy.deepcopy(_load_config_cached(resolved, os.path.getmtime(resolved)))
+
+    # 相对路径的缓存目录按配置文件所在目录解析，不随当前工作目录变化
+    performance = config.get("performance") or {}
+    cache_dir = performance.get("cache_dir")
+    if cache_dir and not Path(cache_dir).expanduser().is_absolute():
+        performance["cache_dir"] = str(Path(resolved).parent / cache_dir)
+
+    return config
+
+
+def default_cache_dir() -> Path:
+    """
+    默认缓存目录（当前用户的缓存目录下），不使用当前工作目录，
+    避免在不受信任的目录中运行时加载其中的pickle缓存
+
+    Returns:
+        缓存目录路径
+    """
+    if sys.platform == "win32":
+        base = os.environ.get("LOCALAPPDATA") or Path.home() / "AppData" / "Local"
+    elif sys.platform == "darwin":
+        base = Path.home() / "Library" / "Caches"
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(base) / "pdf_heading_extractor"
+
+
+def get_cache_dir(config: Dict[str, Any]) -> Path:
+    """
+    缓存根目录：performance.cache_dir，未配置时为 default_cache_dir()
+
+    Args:
+        config: 配置字典
+
+    Returns:
+        缓存目录路径
+    """
+    cache_dir = config.get("performance", {}).get("cache_dir")
+    return Path(cache_dir).expanduser() if cache_dir else default_cache_dir()
+
+
+@lru_cache(maxsize=8)
+def _load_config_cached(config_path: str, mtime: float) -> Dict[str, Any]:
+    """解析配置文件；mtime参与缓存键，文件修改后自动重新解析"""
+    # 在首次解析时才导入yaml，只导入模块（如 --help）时不加载
+    import yaml
+
+    try:
+        from yaml import CSafeLoader as SafeLoader  # libyaml C实现
+    except ImportError:
+        from yaml import SafeLoader
+
+    with open(config_path, "r", encoding="utf-8") as f:
+        return yaml.load(f, Loader=SafeLoader) or {}
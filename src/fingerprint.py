@@ -0,0 +1,42 @@
+"""
+PDF文件指纹
+流式计算文件内容的BLAKE2b摘要，不把整个文件读入内存；同一文件未修改时只计算一次
+"""
+
+import hashlib
+import mmap
+import os
+from functools import lru_cache
+
+
+# 旧版本Python没有hashlib.file_digest时，按此大小分块哈希
+CHUNK_SIZE = 1 << 20
+
+
+def pdf_fingerprint(pdf_path: str) -> str:
+    """
+    计算PDF文件内容指纹
+
+    Args:
+        pdf_path: PDF文件路径
+
+    Returns:
+        十六进制BLAKE2b摘要
+    """
+    stat = os.stat(pdf_path)
+    return _fingerprint_cached(os.path.realpath(pdf_path), stat.st_mtime_ns, stat.st_size)
+
+
+@lru_cache(maxsize=256)
+def _fingerprint_cached(pdf_path: str, mtime_ns: int, size: int) -> str:
+    """计算文件摘要；修改时间与大小参与缓存键，文件变化后重新计算"""
+    with open(pdf_path, "rb") as f:
+        if hasattr(hashlib, "file_digest"):
+            return hashlib.file_digest(f, "blake2b").hexdigest()
+
+        digest = hashlib.blake2b()
+        if size:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                for offset in range(0, size, CHUNK_SIZE):
+                    digest.update(mm[offset:offset + CHUNK_SIZE])
+        return digest.hexdigest()
@@ -8,6 +8,10 @@ import logging
 from typing import List, Dict, Any, Optional
 from collections import Counter
 
+import numpy as np
+
+from .tools.text_extractor import TextBlockArray
+
 
 logger = logging.getLogger(__name__)
 
@@ -85,10 +89,19 @@ class HeadingDetector:
         self.numbering_config = self.detector_config.get("numbering", {})
 
         # 编译编号模式
-        self.numbering_patterns = [
-            re.compile(pattern)
-            for pattern in self.numbering_config.get("patterns", [])
-        ]
+        patterns = self.numbering_config.get("patterns", [])
+        self.numbering_patterns = [re.compile(pattern) for pattern in patterns]
+
+        # 合并为一个按顺序尝试的分支正则，每段文本只需一次匹配；
+        # 多个模式带捕获组（合并后反向引用的组号会错位）或无法合并时退回逐个匹配
+        self._combined_numbering = None
+        if patterns and sum(1 for pattern in self.numbering_patterns if pattern.groups) <= 1:
+            try:
+                self._combined_numbering = re.compile(
+                    "|".join(f"(?:{pattern})" for pattern in patterns)
+                )
+            except re.error as e:
+                logger.debug(f"编号模式无法合并，逐个匹配: {e}")
 
     def detect(self, parsed_data: Dict[str, Any]) -> List[Heading]:
         """
@@ -116,7 +129,9 @@ class HeadingDetector:
         # 方法2: 基于内容分析
         if not headings or "bookmark" not in self.methods:
             logger.info("使用内容分析检测标题")
-            content_headings = self._detect_from_content(text_blocks)
+            content_headings = self._detect_from_content(
+                text_blocks, parsed_data.get("block_array")
+            )
             headings.extend(content_headings)
 
         # 构建标题树
@@ -141,25 +156,69 @@ class HeadingDetector:
 
         return headings
 
-    def _detect_from_content(self, text_blocks: List[Any]) -> List[Heading]:
-        """从内容中检测标题"""
+    def _detect_from_content(
+        self, text_blocks: List[Any], block_array: Optional[TextBlockArray] = None
+    ) -> List[Heading]:
+        """
+        从内容中检测标题
+
+        Args:
+            text_blocks: 文本块列表
+            block_array: 同一批文本块的列式存储（解析器已构建时直接复用，否则由文本块列表构建）
+        """
         headings = []
 
-        # 计算正文字体大小（中位数）
-        font_sizes = [block.font_size for block in text_blocks if block.font_size > 0]
-        if not font_sizes:
+        # 字体大小、粗体、左边距使用列式数组，数值判断全部向量化
+        n = len(text_blocks)
+        if block_array is None or len(block_array) != n:
+            block_array = TextBlockArray.from_blocks(text_blocks)
+        all_sizes = block_array.font_sizes
+
+        # 计算正文字体大小（中位数，取排序后第 len//2 个，与排序取值一致但为O(N)）
+        font_sizes = all_sizes[all_sizes > 0]
+        if not font_sizes.size:
             logger.warning("无法获取字体大小信息")
             return headings
 
-        body_font_size = sorted(font_sizes)[len(font_sizes) // 2]
+        # font_sizes 是布尔索引得到的副本，可直接原地选择，不再复制
+        k = font_sizes.size // 2
+        font_sizes.partition(k)
+        body_font_size = float(font_sizes[k])
         min_heading_size = body_font_size * self.thresholds.get("heading_size_ratio", 1.15)
 
         logger.info(f"正文字体大小: {body_font_size}, 标题最小字体: {min_heading_size}")
 
-        # 分析每个文本块
+        # 字体大小得分及其对应的层级估计
+        use_numbering = "numbering" in self.methods
+        size_match = all_sizes >= min_heading_size
+        if "font_size" not in self.methods:
+            size_match = np.zeros(n, dtype=bool)
+        ratios = all_sizes / body_font_size
+        size_levels = np.select([ratios >= 1.8, ratios >= 1.5, ratios >= 1.2], [1, 2, 3], default=4)
+
+        # 字体粗细、位置（左对齐）判断
+        bold = np.zeros(n, dtype=bool)
+        if "font_weight" in self.methods:
+            bold = block_array.bold_mask
+        left_aligned = np.zeros(n, dtype=bool)
+        if "position" in self.methods:
+            left_aligned = block_array.bbox[:, 0] < 100  # 左边距小
+
+        # 只有加上编号得分后仍可能达到阈值、且能确定层级的文本块才需要逐个检查
+        # （编号需对文本做正则匹配，留在下面的循环中；留出浮点误差余量，精确判断也在循环中）
+        min_confidence = self.thresholds.get("min_confidence", 0.6)
+        max_level = self.thresholds.get("max_level", 6)
+        max_confidence = 0.3 * size_match + 0.2 * bold + 0.1 * left_aligned
+        if use_numbering:
+            candidates = np.flatnonzero(max_confidence + 0.5 >= min_confidence - 1e-9)
+        else:
+            candidates = np.flatnonzero(size_match & (max_confidence >= min_confidence - 1e-9))
+
+        # 分析候选文本块
         processed_texts = set()  # 避免重复
 
-        for block in text_blocks:
+        for i in candidates.tolist():
+            block = text_blocks[i]
             text = block.text.strip()
 
             # 跳过空文本和重复文本
@@ -175,37 +234,27 @@ class HeadingDetector:
 
             # 检测编号模式
             numbering, numbering_level = self._detect_numbering(text)
-            if numbering and "numbering" in self.methods:
+            if numbering and use_numbering:
                 confidence += 0.5
                 level = numbering_level
 
             # 检测字体大小
-            if "font_size" in self.methods and block.font_size >= min_heading_size:
+            if size_match[i]:
                 confidence += 0.3
                 # 根据字体大小估计层级
-                size_ratio = block.font_size / body_font_size
                 if level == 0:
-                    if size_ratio >= 1.8:
-                        level = 1
-                    elif size_ratio >= 1.5:
-                        level = 2
-                    elif size_ratio >= 1.2:
-                        level = 3
-                    else:
-                        level = 4
+                    level = int(size_levels[i])
 
             # 检测字体粗细
-            if "font_weight" in self.methods and block.is_bold:
+            if bold[i]:
                 confidence += 0.2
 
             # 检测位置（左对齐，有间距）
-            if "position" in self.methods and block.x0 < 100:  # 左边距小
+            if left_aligned[i]:
                 confidence += 0.1
 
             # 判断是否为标题
-            min_confidence = self.thresholds.get("min_confidence", 0.6)
             if confidence >= min_confidence and level > 0:
-                max_level = self.thresholds.get("max_level", 6)
                 level = min(level, max_level)
 
                 heading = Heading(
@@ -229,13 +278,16 @@ class HeadingDetector:
         Returns:
             (编号字符串, 层级)
         """
-        for pattern in self.numbering_patterns:
-            match = pattern.match(text)
-            if match:
-                numbering = match.group(0)
-                # 根据编号推断层级
-                level = self._infer_level_from_numbering(numbering)
-                return numbering, level
+        if self._combined_numbering is not None:
+            match = self._combined_numbering.match(text)
+        else:
+            match = next(filter(None, (pattern.match(text) for pattern in self.numbering_patterns)), None)
+
+        if match:
+            numbering = match.group(0)
+            # 根据编号推断层级
+            level = self._infer_level_from_numbering(numbering)
+            return numbering, level
 
         return "", 0
 
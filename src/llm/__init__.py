@@ -4,6 +4,6 @@ LLM模块初始化
 
 from .llm_client import LLMClient
 from .prompts import PromptManager
-from .response_parser import ResponseParser
+from .response_parser import ResponseParser, JSONArrayStream
 
-__all__ = ["LLMClient", "PromptManager", "ResponseParser"]
+__all__ = ["LLMClient", "PromptManager", "ResponseParser", "JSONArrayStream"]
@@ -4,13 +4,203 @@ LLM客户端模块
 """
 
 import os
-from typing import Dict, Any, Optional, List
+import json
+import asyncio
+import hashlib
+import random
+import threading
+import time
+import weakref
+from contextlib import asynccontextmanager
+from email.utils import parsedate_to_datetime
+from typing import AsyncIterator, Dict, Any, Optional, List
 import logging
-from anthropic import Anthropic
+from collections import OrderedDict
+from functools import lru_cache
+from anthropic import (
+    Anthropic,
+    AsyncAnthropic,
+    APIConnectionError,
+    APIStatusError,
+    DefaultAsyncHttpxClient,
+    DefaultHttpxClient,
+)
+
+from .response_cache import ResponseCache
+from .response_parser import ResponseParser
+
+try:
+    # SDK所用HTTP库（新版本为httpx2，旧版本为httpx）的Limits类型，连接池参数必须使用同一个库的对象
+    from anthropic._constants import DEFAULT_CONNECTION_LIMITS
+
+    ConnectionLimits = type(DEFAULT_CONNECTION_LIMITS)
+except ImportError:  # 未找到时使用SDK默认的连接池配置
+    ConnectionLimits = None
+
+try:
+    import tiktoken
+except ImportError:  # 可选：未安装时按字符数估算token数
+    tiktoken = None
+
+try:
+    import h2  # noqa: F401  httpx启用HTTP/2所需
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
 
 
 logger = logging.getLogger(__name__)
 
+# count_tokens 结果缓存的条目上限
+TOKEN_COUNT_CACHE_SIZE = 65536
+
+
+@lru_cache(maxsize=None)
+def _get_tokenizer(model: str) -> Any:
+    """获取模型对应的tiktoken编码器（非OpenAI模型使用cl100k_base近似），不可用时返回None"""
+    if tiktoken is None:
+        return None
+
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        pass
+
+    try:
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:  # 编码文件需首次下载，离线环境可能失败
+        logger.warning(f"加载tiktoken编码失败: {e}，使用估算方法")
+        return None
+
+
+@lru_cache(maxsize=8)
+def _shared_client(
+    api_key: str, base_url: Optional[str], timeout: float, max_retries: int, max_connections: int
+) -> Anthropic:
+    """
+    按连接参数缓存的同步SDK客户端
+
+    同一进程内的多个LLMClient（如批量处理时的多个Agent）共用一个客户端及其连接池，
+    复用keep-alive连接，避免每个实例重新进行TCP/TLS握手。
+    """
+    client_kwargs = {"api_key": api_key, "timeout": timeout, "max_retries": max_retries}
+    if base_url:
+        client_kwargs["base_url"] = base_url
+
+    if ConnectionLimits is not None:
+        client_kwargs["http_client"] = DefaultHttpxClient(
+            http2=HTTP2_AVAILABLE, limits=_connection_limits(max_connections)
+        )
+
+    return Anthropic(**client_kwargs)
+
+
+def _connection_limits(max_connections: int) -> Any:
+    """连接池上限（同步/异步客户端相同）"""
+    return ConnectionLimits(
+        max_connections=max_connections,
+        max_keepalive_connections=max(1, max_connections // 2),
+    )
+
+
+def _is_retryable(error: Exception) -> bool:
+    """是否为可重试的错误：连接错误/超时、408/409/429、5xx（含529过载）"""
+    if isinstance(error, APIConnectionError):
+        return True
+    if isinstance(error, APIStatusError):
+        return error.status_code in (408, 409, 429) or error.status_code >= 500
+    return False
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    """从错误响应的 retry-after-ms / retry-after 头中读取服务端要求的等待秒数"""
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+
+    headers = response.headers
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        value = headers.get("retry-after")
+        if not value:
+            return None
+        try:
+            return float(value)
+        except ValueError:
+            return parsedate_to_datetime(value).timestamp() - time.time()
+    except (TypeError, ValueError):
+        return None
+
+
+class _RateGovernor:
+    """
+    进程级限流器：并发数上限 + 每分钟请求数（rpm）/ token数（tpm）令牌桶，0表示不限制
+
+    状态由 threading.Lock 保护、按 time.monotonic() 计算，不绑定事件循环；
+    等待通过 asyncio.sleep 进行，因此不同线程、不同事件循环（每次 asyncio.run）的调用共用同一份额度。
+    """
+
+    # 并发数已满时重新检查的间隔（秒）
+    POLL_INTERVAL = 0.05
+
+    def __init__(self, concurrency: int, rpm: int, tpm: int):
+        self.concurrency = concurrency
+        self.rpm = rpm
+        self.tpm = tpm
+        self._requests = float(rpm)
+        self._tokens = float(tpm)
+        self._in_flight = 0
+        self._clock = time.monotonic
+        self._sleep = asyncio.sleep
+        self._updated = self._clock()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = self._clock()
+        elapsed = now - self._updated
+        self._updated = now
+        if self.rpm:
+            self._requests = min(self.rpm, self._requests + elapsed * self.rpm / 60)
+        if self.tpm:
+            self._tokens = min(self.tpm, self._tokens + elapsed * self.tpm / 60)
+
+    async def acquire(self, tokens: int):
+        """等待直到可以发出一个消耗约 tokens 个token的请求，并占用一个并发名额"""
+        tokens = min(tokens, self.tpm) if self.tpm else 0
+        while True:
+            with self._lock:
+                self._refill()
+                wait = 0.0
+                if self.concurrency and self._in_flight >= self.concurrency:
+                    wait = self.POLL_INTERVAL
+                if self.rpm and self._requests < 1:
+                    wait = max(wait, (1 - self._requests) * 60 / self.rpm)
+                if self.tpm and self._tokens < tokens:
+                    wait = max(wait, (tokens - self._tokens) * 60 / self.tpm)
+                if wait <= 0:
+                    if self.rpm:
+                        self._requests -= 1
+                    if self.tpm:
+                        self._tokens -= tokens
+                    self._in_flight += 1
+                    return
+            logger.debug(f"触发客户端限流，等待 {wait:.2f} 秒")
+            await self._sleep(wait)
+
+    def release(self):
+        """请求结束，释放并发名额"""
+        with self._lock:
+            self._in_flight -= 1
+
+
+@lru_cache(maxsize=8)
+def _shared_governor(
+    api_key: str, base_url: Optional[str], concurrency: int, rpm: int, tpm: int
+) -> _RateGovernor:
+    """按API密钥和端点共用的限流器：同一进程内所有LLMClient（含Agent池中的各Agent）共享额度"""
+    return _RateGovernor(concurrency, rpm, tpm)
+
 
 class LLMClient:
     """LLM客户端封装类（基于 Anthropic SDK）"""
@@ -26,14 +216,50 @@ class LLMClient:
         self.llm_config = config.get("llm", {})
         self.provider = self.llm_config.get("provider", "openai")
         self.model = self.llm_config.get("model", "gpt-4")
+        # 快速模型：用于标题识别、层级判定等输出简短JSON的调用，未配置时使用主模型
+        self.model_fast = self.llm_config.get("model_fast") or self.model
         self.base_url = self.llm_config.get("base_url")
         self.temperature = self.llm_config.get("temperature", 0.1)
         self.max_tokens = self.llm_config.get("max_tokens", 4000)
         self.timeout = self.llm_config.get("timeout", 60)
         self.max_retries = self.llm_config.get("max_retries", 3)
+        # 重试退避：第n次重试前等待 [0, min(max_backoff, initial_backoff * 2^n)) 内的随机秒数
+        self.initial_backoff = self.llm_config.get("initial_backoff", 1.0)
+        self.max_backoff = self.llm_config.get("max_backoff", 60.0)
+        self.max_connections = self.llm_config.get("max_connections", 64)
+        self.prompt_caching = self.llm_config.get("prompt_caching", True)
+
+        # 异步调用的客户端限流（0表示不限制；429等可重试错误按max_retries退避重试）
+        self.concurrency_limit = self.llm_config.get("concurrency_limit", 0)
+        self.rpm = self.llm_config.get("rpm", 0)
+        self.tpm = self.llm_config.get("tpm", 0)
+
+        # 响应缓存：相同的 (模型, 参数, 系统提示词, 消息) 直接返回上次的响应
+        self.enable_cache = config.get("performance", {}).get("enable_cache", True)
+        self.response_cache = ResponseCache(config)
 
         # 初始化主LLM客户端
         self.client = self._init_client()
+        # 消息调用由 _create_with_retry 负责重试，SDK自身不再重试，避免两层重试叠加
+        self._request_client = self.client.with_options(max_retries=0)
+
+        # 异步客户端绑定到创建它的事件循环，按事件循环分别创建
+        self._async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncAnthropic]" = (
+            weakref.WeakKeyDictionary()
+        )
+
+        # 进程级限流器（未配置任何限制时为None）
+        self._governor = (
+            _shared_governor(
+                self._get_api_key(), self.base_url, self.concurrency_limit, self.rpm, self.tpm
+            )
+            if (self.concurrency_limit or self.rpm or self.tpm)
+            else None
+        )
+
+        # token计数缓存：(模型, 文本摘要) -> token数，按最近使用淘汰
+        self._token_counts: "OrderedDict[tuple, int]" = OrderedDict()
+        self._token_count_lock = threading.Lock()
 
         # 初始化备用LLM客户端
         fallback_model = self.llm_config.get("fallback_model")
@@ -45,22 +271,118 @@ class LLMClient:
             logger.info(f"使用自定义API端点: {self.base_url}")
 
     def _init_client(self) -> Anthropic:
-        """初始化 Anthropic 客户端"""
+        """获取 Anthropic 客户端（相同连接参数的实例共用）"""
+        return _shared_client(
+            self._get_api_key(), self.base_url, self.timeout, self.max_retries, self.max_connections
+        )
+
+    def _client_kwargs(self) -> Dict[str, Any]:
+        """构建SDK客户端参数（同步/异步客户端共用）"""
         api_key = self._get_api_key()
 
         # 使用 Anthropic SDK，支持自定义 base_url
         client_kwargs = {
             "api_key": api_key,
             "timeout": self.timeout,
-            "max_retries": self.max_retries,
+            "max_retries": 0,  # 由 _acreate_with_retry 负责重试
         }
 
         # 如果有自定义 base_url，添加到参数中
         if self.base_url:
             client_kwargs["base_url"] = self.base_url
-            logger.info(f"使用自定义API端点: {self.base_url}")
 
-        return Anthropic(**client_kwargs)
+        return client_kwargs
+
+    def _retry_delay(self, attempt: int, error: Exception) -> float:
+        """第 attempt 次重试前的等待秒数：优先遵循Retry-After，否则指数退避加随机抖动"""
+        retry_after = _retry_after(error)
+        if retry_after is not None and 0 <= retry_after <= self.max_backoff:
+            return retry_after
+        return random.uniform(0, min(self.max_backoff, self.initial_backoff * 2 ** attempt))
+
+    def _create_with_retry(self, **params: Any) -> Any:
+        """
+        同步调用 messages.create，可重试的错误最多重试 max_retries 次
+
+        Args:
+            params: messages.create 的参数
+
+        Returns:
+            SDK响应对象
+        """
+        for attempt in range(self.max_retries + 1):
+            try:
+                return self._request_client.messages.create(**params)
+            except Exception as e:
+                if attempt == self.max_retries or not _is_retryable(e):
+                    raise
+                delay = self._retry_delay(attempt, e)
+                logger.warning(f"LLM调用失败: {e}，{delay:.1f}秒后重试 ({attempt + 1}/{self.max_retries})")
+                time.sleep(delay)
+
+    async def _acreate_with_retry(
+        self, client: AsyncAnthropic, system_prompt: str, messages: List[Dict[str, Any]], **params: Any
+    ) -> Any:
+        """
+        异步调用 messages.create（经过限流），可重试的错误最多重试 max_retries 次
+
+        退避等待在限流区之外进行，不占用并发名额。
+
+        Args:
+            client: 异步SDK客户端
+            system_prompt: 系统提示词（用于限流估算）
+            messages: 消息列表
+            params: messages.create 的其他参数
+
+        Returns:
+            SDK响应对象
+        """
+        for attempt in range(self.max_retries + 1):
+            try:
+                async with self._throttle(system_prompt, messages):
+                    return await client.messages.create(messages=messages, **params)
+            except Exception as e:
+                if attempt == self.max_retries or not _is_retryable(e):
+                    raise
+                delay = self._retry_delay(attempt, e)
+                logger.warning(f"LLM调用失败: {e}，{delay:.1f}秒后重试 ({attempt + 1}/{self.max_retries})")
+                await asyncio.sleep(delay)
+
+    def _get_async_client(self) -> AsyncAnthropic:
+        """获取当前事件循环的异步客户端（不存在时创建）"""
+        loop = asyncio.get_running_loop()
+        client = self._async_clients.get(loop)
+        if client is None:
+            client_kwargs = self._client_kwargs()
+            # 与同步客户端相同的连接池上限和HTTP/2设置，事件循环内的并发请求复用连接
+            if ConnectionLimits is not None:
+                client_kwargs["http_client"] = DefaultAsyncHttpxClient(
+                    http2=HTTP2_AVAILABLE, limits=_connection_limits(self.max_connections)
+                )
+            client = AsyncAnthropic(**client_kwargs)
+            self._async_clients[loop] = client
+        return client
+
+    @asynccontextmanager
+    async def _throttle(self, system_prompt: str, messages: List[Dict[str, Any]]):
+        """异步调用前的限流：并发数上限 + rpm/tpm令牌桶（token数按字符数粗略估算）"""
+        governor = self._governor
+        if governor is None:
+            yield
+            return
+
+        chars = len(system_prompt) + sum(len(str(m["content"])) for m in messages)
+        await governor.acquire(chars // 4 + self.max_tokens)
+        try:
+            yield
+        finally:
+            governor.release()
+
+    async def aclose(self):
+        """关闭当前事件循环的异步客户端（在 asyncio.run 结束前调用，释放连接；限流器为进程级，不受影响）"""
+        client = self._async_clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.close()
 
     def _get_api_key(self) -> str:
         """获取API密钥"""
@@ -80,11 +402,101 @@ class LLMClient:
 
         return api_key
 
+    def build_system(self, system_prompt: str, system_suffix: Optional[str] = None) -> Any:
+        """
+        构建system参数
+
+        启用Prompt缓存时以带 cache_control 的文本块发送，系统提示词相同的调用
+        可命中服务端前缀缓存（系统提示词须保持逐字节一致）。附加文本（如输出格式
+        schema）作为第二个文本块并设置单独的缓存断点：附加文本不同的调用仍可
+        共享系统提示词部分的缓存。
+
+        Args:
+            system_prompt: 系统提示词
+            system_suffix: 追加在系统提示词之后的固定文本
+
+        Returns:
+            传给 messages.create 的 system 参数
+        """
+        if not self.prompt_caching:
+            if system_suffix:
+                return f"{system_prompt}\n\n{system_suffix}"
+            return system_prompt
+
+        blocks = [system_prompt] + ([system_suffix] if system_suffix else [])
+        return [
+            {
+                "type": "text",
+                "text": text,
+                "cache_control": {"type": "ephemeral"},
+            }
+            for text in blocks
+        ]
+
+    def _log_usage(self, response: Any):
+        """记录Token用量（含Prompt缓存命中/写入情况）"""
+        usage = getattr(response, "usage", None)
+        if usage is None:
+            return
+
+        cache_read = getattr(usage, "cache_read_input_tokens", None) or 0
+        cache_creation = getattr(usage, "cache_creation_input_tokens", None) or 0
+        logger.debug(
+            f"Token用量: 输入 {usage.input_tokens}，缓存命中 {cache_read}，"
+            f"缓存写入 {cache_creation}，输出 {usage.output_tokens}"
+        )
+
+    def _build_messages(
+        self, user_message: str, context: Optional[List[Dict]] = None
+    ) -> List[Dict[str, Any]]:
+        """构建消息列表（Anthropic SDK 格式）"""
+        messages = []
+
+        # 添加历史对话
+        if context:
+            for msg in context:
+                if msg["role"] in ["user", "assistant"]:
+                    messages.append({
+                        "role": msg["role"],
+                        "content": msg["content"]
+                    })
+
+        # 添加当前用户消息
+        messages.append({
+            "role": "user",
+            "content": user_message
+        })
+
+        return messages
+
+    def _response_cache_key(
+        self, model: str, system_prompt: str, messages: List[Dict[str, Any]]
+    ) -> str:
+        """计算响应缓存键（模型和生成参数变化都会使缓存失效）"""
+        return self.response_cache.make_key(
+            model,
+            f"{self.temperature}:{self.max_tokens}",
+            system_prompt,
+            json.dumps(messages, ensure_ascii=False, sort_keys=True),
+        )
+
+    def _semantic_scope(
+        self, model: str, system_prompt: str, context: Optional[List[Dict]]
+    ) -> Optional[str]:
+        """计算语义缓存作用域键；未启用语义缓存或带对话历史时返回None"""
+        if self.response_cache.semantic_index is None or context:
+            return None
+        return self.response_cache.make_key(
+            model, f"{self.temperature}:{self.max_tokens}", system_prompt
+        )
+
     def invoke(
         self,
         system_prompt: str,
         user_message: str,
         context: Optional[List[Dict]] = None,
+        model: Optional[str] = None,
+        system_suffix: Optional[str] = None,
     ) -> str:
         """
         调用LLM
@@ -93,41 +505,41 @@ class LLMClient:
             system_prompt: 系统提示词
             user_message: 用户消息
             context: 对话历史上下文
+            model: 本次调用使用的模型，默认为主模型
+            system_suffix: 追加在系统提示词之后的固定文本（单独设置缓存断点）
 
         Returns:
             LLM响应文本
         """
-        try:
-            # 构建消息列表（Anthropic SDK 格式）
-            messages = []
-
-            # 添加历史对话
-            if context:
-                for msg in context:
-                    if msg["role"] in ["user", "assistant"]:
-                        messages.append({
-                            "role": msg["role"],
-                            "content": msg["content"]
-                        })
-
-            # 添加当前用户消息
-            messages.append({
-                "role": "user",
-                "content": user_message
-            })
+        messages = self._build_messages(user_message, context)
+        system = self.build_system(system_prompt, system_suffix)
+
+        model = model or self.model
+        full_prompt = f"{system_prompt}\n\n{system_suffix}" if system_suffix else system_prompt
+        cache_key = self._response_cache_key(model, full_prompt, messages)
+        scope = self._semantic_scope(model, full_prompt, context)
+        if self.enable_cache:
+            cached = self.response_cache.get(cache_key, scope, user_message)
+            if cached is not None:
+                return cached
 
+        try:
             # 调用 Anthropic API
-            logger.debug(f"调用LLM: {self.model}")
-            response = self.client.messages.create(
-                model=self.model,
+            logger.debug(f"调用LLM: {model}")
+            response = self._create_with_retry(
+                model=model,
                 max_tokens=self.max_tokens,
                 temperature=self.temperature,
-                system=system_prompt,
+                system=system,
                 messages=messages
             )
+            self._log_usage(response)
 
             # 提取响应文本
-            return response.content[0].text
+            text = response.content[0].text
+            if self.enable_cache:
+                self.response_cache.set(cache_key, text, scope, user_message)
+            return text
 
         except Exception as e:
             logger.error(f"LLM调用失败: {e}")
@@ -136,19 +548,163 @@ class LLMClient:
             if self.fallback_model:
                 logger.info("尝试使用备用模型...")
                 try:
-                    response = self.client.messages.create(
+                    response = self._create_with_retry(
                         model=self.fallback_model,
                         max_tokens=self.max_tokens,
                         temperature=self.temperature,
-                        system=system_prompt,
+                        system=system,
                         messages=messages
                     )
+                    self._log_usage(response)
+                    return response.content[0].text
+                except Exception as fallback_e:
+                    logger.error(f"备用模型也失败: {fallback_e}")
+
+            raise Exception(f"LLM调用失败: {str(e)}")
+
+    async def ainvoke(
+        self,
+        system_prompt: str,
+        user_message: str,
+        context: Optional[List[Dict]] = None,
+        model: Optional[str] = None,
+    ) -> str:
+        """
+        异步调用LLM（多个调用可通过 asyncio.gather 并发等待）
+
+        Args:
+            system_prompt: 系统提示词
+            user_message: 用户消息
+            context: 对话历史上下文
+            model: 本次调用使用的模型，默认为主模型
+
+        Returns:
+            LLM响应文本
+        """
+        client = self._get_async_client()
+        messages = self._build_messages(user_message, context)
+
+        model = model or self.model
+        cache_key = self._response_cache_key(model, system_prompt, messages)
+        scope = self._semantic_scope(model, system_prompt, context)
+        if self.enable_cache:
+            cached = self.response_cache.get(cache_key, scope, user_message)
+            if cached is not None:
+                return cached
+
+        try:
+            logger.debug(f"异步调用LLM: {model}")
+            response = await self._acreate_with_retry(
+                client,
+                system_prompt,
+                messages,
+                model=model,
+                max_tokens=self.max_tokens,
+                temperature=self.temperature,
+                system=self.build_system(system_prompt),
+            )
+            self._log_usage(response)
+
+            text = response.content[0].text
+            if self.enable_cache:
+                self.response_cache.set(cache_key, text, scope, user_message)
+            return text
+
+        except Exception as e:
+            logger.error(f"LLM调用失败: {e}")
+
+            # 尝试使用备用模型
+            if self.fallback_model:
+                logger.info("尝试使用备用模型...")
+                try:
+                    response = await self._acreate_with_retry(
+                        client,
+                        system_prompt,
+                        messages,
+                        model=self.fallback_model,
+                        max_tokens=self.max_tokens,
+                        temperature=self.temperature,
+                        system=self.build_system(system_prompt),
+                    )
+                    self._log_usage(response)
                     return response.content[0].text
                 except Exception as fallback_e:
                     logger.error(f"备用模型也失败: {fallback_e}")
 
             raise Exception(f"LLM调用失败: {str(e)}")
 
+    async def astream(
+        self,
+        system_prompt: str,
+        user_message: str,
+        context: Optional[List[Dict]] = None,
+        model: Optional[str] = None,
+    ) -> AsyncIterator[str]:
+        """
+        异步流式调用LLM，边接收边产出文本片段（调用方可在响应结束前开始解析）
+
+        命中响应缓存时一次性产出完整响应；主模型在产出任何片段前失败时尝试备用模型。
+
+        Args:
+            system_prompt: 系统提示词
+            user_message: 用户消息
+            context: 对话历史上下文
+            model: 本次调用使用的模型，默认为主模型
+
+        Yields:
+            响应文本片段
+        """
+        client = self._get_async_client()
+        messages = self._build_messages(user_message, context)
+
+        model = model or self.model
+        cache_key = self._response_cache_key(model, system_prompt, messages)
+        scope = self._semantic_scope(model, system_prompt, context)
+        if self.enable_cache:
+            cached = self.response_cache.get(cache_key, scope, user_message)
+            if cached is not None:
+                yield cached
+                return
+
+        models = [model] + ([self.fallback_model] if self.fallback_model else [])
+        index, retries = 0, 0
+        while True:
+            stream_model = models[index]
+            parts = []
+            try:
+                logger.debug(f"流式调用LLM: {stream_model}")
+                async with self._throttle(system_prompt, messages), client.messages.stream(
+                    model=stream_model,
+                    max_tokens=self.max_tokens,
+                    temperature=self.temperature,
+                    system=self.build_system(system_prompt),
+                    messages=messages
+                ) as stream:
+                    async for text in stream.text_stream:
+                        parts.append(text)
+                        yield text
+                    self._log_usage(await stream.get_final_message())
+
+            except Exception as e:
+                # 已产出部分内容时无法重试或切换模型重来
+                if not parts and _is_retryable(e) and retries < self.max_retries:
+                    delay = self._retry_delay(retries, e)
+                    retries += 1
+                    logger.warning(f"LLM调用失败: {e}，{delay:.1f}秒后重试 ({retries}/{self.max_retries})")
+                    await asyncio.sleep(delay)
+                    continue
+
+                logger.error(f"LLM调用失败: {e}")
+                if parts or index == len(models) - 1:
+                    raise Exception(f"LLM调用失败: {str(e)}")
+                logger.info("尝试使用备用模型...")
+                index, retries = index + 1, 0
+                continue
+
+            if self.enable_cache and stream_model == model:
+                self.response_cache.set(cache_key, "".join(parts), scope, user_message)
+            return
+
     def invoke_structured(
         self,
         system_prompt: str,
@@ -166,43 +722,29 @@ class LLMClient:
         Returns:
             结构化数据（字典）
         """
-        import json
-
-        # 在系统提示词中添加输出格式要求
-        structured_prompt = f"""{system_prompt}
-
-请严格按照以下JSON格式输出结果:
+        # 在系统提示词后添加输出格式要求（作为单独的缓存块，schema相同的调用可命中缓存）
+        format_prompt = f"""请严格按照以下JSON格式输出结果:
 {json.dumps(output_schema, indent=2, ensure_ascii=False)}
 
 重要: 只返回JSON对象，不要包含任何其他文字说明。
 """
 
-        response_text = self.invoke(structured_prompt, user_message)
+        response_text = self.invoke(system_prompt, user_message, system_suffix=format_prompt)
 
-        # 解析JSON
-        try:
-            # 提取JSON（可能包含markdown代码块）
-            if "```json" in response_text:
-                json_start = response_text.find("```json") + 7
-                json_end = response_text.find("```", json_start)
-                json_text = response_text[json_start:json_end].strip()
-            elif "```" in response_text:
-                json_start = response_text.find("```") + 3
-                json_end = response_text.find("```", json_start)
-                json_text = response_text[json_start:json_end].strip()
-            else:
-                json_text = response_text.strip()
-
-            return json.loads(json_text)
-
-        except json.JSONDecodeError as e:
-            logger.error(f"JSON解析失败: {e}")
+        # 解析JSON（可能包含markdown代码块）
+        result = ResponseParser.extract_json_from_text(response_text)
+        if result is None:
             logger.error(f"原始响应: {response_text}")
             raise ValueError(f"LLM返回的不是有效的JSON格式")
 
+        return result
+
     def count_tokens(self, text: str) -> int:
         """
-        计算文本的token数
+        计算文本的token数（本地计算，不发起网络请求）
+
+        使用tiktoken分词（Claude等非OpenAI模型为近似值），未安装时按字符数估算；
+        结果按文本摘要缓存，重复文本不再重新分词。
 
         Args:
             text: 文本内容
@@ -210,12 +752,22 @@ class LLMClient:
         Returns:
             token数量
         """
-        try:
-            # 使用 Anthropic 的 token 计数方法
-            count_response = self.client.count_tokens(text)
-            return count_response
-
-        except Exception as e:
-            logger.warning(f"Token计数失败: {e}，使用估算方法")
+        tokenizer = _get_tokenizer(self.model)
+        if tokenizer is None:
             # 简单估算: 1个token约等于4个字符
             return len(text) // 4
+
+        key = (self.model, hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest())
+        with self._token_count_lock:
+            count = self._token_counts.get(key)
+            if count is not None:
+                self._token_counts.move_to_end(key)
+                return count
+
+        count = len(tokenizer.encode(text, disallowed_special=()))
+
+        with self._token_count_lock:
+            self._token_counts[key] = count
+            if len(self._token_counts) > TOKEN_COUNT_CACHE_SIZE:
+                self._token_counts.popitem(last=False)
+        return count
@@ -2,56 +2,23 @@
 Prompt模板管理模块
 """
 
+import hashlib
+import json
+import mmap
 import os
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple
 import logging
 
 
 logger = logging.getLogger(__name__)
 
 
-class PromptManager:
-    """Prompt模板管理器"""
-
-    def __init__(self, config: Dict[str, Any]):
-        """
-        初始化Prompt管理器
-
-        Args:
-            config: 配置字典
-        """
-        self.config = config
-        self.prompt_config = config.get("prompts", {})
-        self.language = self.prompt_config.get("language", "chinese")
-        self.style = self.prompt_config.get("style", "professional")
-        self.use_cot = self.prompt_config.get("use_cot", True)
-        self.num_examples = self.prompt_config.get("num_examples", 3)
-
-        # 加载自定义Prompts
-        custom_dir = self.prompt_config.get("custom_prompts_dir", "prompts/")
-        self.custom_prompts = self._load_custom_prompts(custom_dir)
-
-        logger.info(f"Prompt管理器初始化完成: {self.language}/{self.style}")
-
-    def _load_custom_prompts(self, custom_dir: str) -> Dict[str, str]:
-        """加载自定义Prompt文件"""
-        prompts = {}
-        prompt_path = Path(custom_dir)
-
-        if prompt_path.exists():
-            for file in prompt_path.glob("*.txt"):
-                prompt_name = file.stem
-                with open(file, "r", encoding="utf-8") as f:
-                    prompts[prompt_name] = f.read()
-                logger.info(f"加载自定义Prompt: {prompt_name}")
-
-        return prompts
-
-    def get_system_prompt(self) -> str:
-        """获取系统角色Prompt"""
-        if self.language == "chinese":
-            return """你是一个专业的PDF文档分析专家，擅长识别和提取文档中的标题结构。
+# Prompt模板（按语言）：*_head/*_item 等用 str.format_map 填充，*_suffix 为固定文本
+PROMPT_TEMPLATES: Dict[str, Dict[str, str]] = {
+    "chinese": {
+        "system": """你是一个专业的PDF文档分析专家，擅长识别和提取文档中的标题结构。
 
 你的能力包括:
 1. 准确识别PDF文档中的各级标题
@@ -64,46 +31,13 @@ class PromptManager:
 - 保持标题的完整性和准确性
 - 正确判断层级关系
 - 对不确定的情况给出置信度评估
-"""
-        else:
-            return """You are a professional PDF document analyst, skilled at identifying and extracting heading structures from documents.
-
-Your capabilities include:
-1. Accurately identify headings at all levels in PDF documents
-2. Understand semantic and hierarchical relationships of headings
-3. Distinguish headings from regular body text
-4. Build complete heading tree structures
-
-Your working principles:
-- Base analysis on contextual understanding, not just formatting
-- Maintain completeness and accuracy of headings
-- Correctly determine hierarchical relationships
-- Provide confidence assessments for uncertain cases
-"""
-
-    def get_heading_identification_prompt(
-        self, text_block: str, context: Optional[str] = None
-    ) -> str:
-        """
-        获取标题识别Prompt
-
-        Args:
-            text_block: 待分析的文本块
-            context: 上下文（前后文）
-
-        Returns:
-            完整的Prompt
-        """
-        if self.language == "chinese":
-            prompt = f"""任务: 判断以下文本是否为标题
+""",
+        "heading_head": """任务: 判断以下文本是否为标题
 
 文本: "{text_block}"
-"""
-            if context:
-                prompt += f"\n上下文:\n{context}\n"
-
-            if self.use_cot:
-                prompt += """
+""",
+        "heading_context": "\n上下文:\n{context}\n",
+        "heading_suffix_cot": """
 请按照以下步骤进行分析:
 1. 观察文本特征（长度、格式、编号等）
 2. 分析语义内容（是否为概括性描述）
@@ -117,55 +51,44 @@ Your working principles:
     "level_guess": 1-6 (如果是标题),
     "reasoning": "你的分析过程"
 }
-"""
-            else:
-                prompt += """
+""",
+        "heading_suffix": """
 输出格式:
 {
     "is_heading": true/false,
     "confidence": 0.0-1.0,
     "level_guess": 1-6 (如果是标题)
 }
-"""
-        else:
-            # English version
-            prompt = f"""Task: Determine if the following text is a heading
-
-Text: "{text_block}"
-"""
-            if context:
-                prompt += f"\nContext:\n{context}\n"
-
-            prompt += """
-Output format:
+""",
+        "batch_head": "任务: 逐条判断以下编号文本是否为标题\n",
+        "batch_item": '\n[{n}] 文本: "{text_block}"\n',
+        "batch_context": "上下文:\n{context}\n",
+        "batch_cot": """
+分析每条文本时请考虑:
+1. 文本特征（长度、格式、编号等）
+2. 语义内容（是否为概括性描述）
+3. 上下文关系
+""",
+        # {reasoning_field} 在初始化时按是否启用CoT替换
+        "batch_suffix": """
+输出格式（results中每个编号各一项，index与上方编号对应）:
 {
-    "is_heading": true/false,
-    "confidence": 0.0-1.0,
-    "level_guess": 1-6 (if is heading)
+    "results": [
+        {
+            "index": 编号,
+            "is_heading": true/false,
+            "confidence": 0.0-1.0,
+            "level_guess": 1-6 (如果是标题){reasoning_field}
+        },
+        ...
+    ]
 }
-"""
-
-        return prompt
-
-    def get_level_determination_prompt(self, headings: List[Dict[str, Any]]) -> str:
-        """
-        获取层级判定Prompt
-
-        Args:
-            headings: 已识别的标题列表
-
-        Returns:
-            完整的Prompt
-        """
-        if self.language == "chinese":
-            prompt = """任务: 为以下标题确定准确的层级（1-6级）
+""",
+        "level_head": """任务: 为以下标题确定准确的层级（1-6级）
 
 标题列表:
-"""
-            for i, heading in enumerate(headings, 1):
-                prompt += f"{i}. {heading.get('text', '')}\n"
-
-            prompt += """
+""",
+        "level_suffix": """
 分析要点:
 1. 标题的编号模式（如1, 1.1, 1.1.1）
 2. 标题的语义范围（越概括层级越高）
@@ -183,51 +106,12 @@ Output format:
         ...
     ]
 }
-"""
-        else:
-            # English version
-            prompt = """Task: Determine accurate levels (1-6) for the following headings
-
-Headings:
-"""
-            for i, heading in enumerate(headings, 1):
-                prompt += f"{i}. {heading.get('text', '')}\n"
-
-            prompt += """
-Output format:
-{
-    "headings": [
-        {
-            "text": "heading text",
-            "level": 1-6,
-            "reasoning": "reason for level determination"
-        },
-        ...
-    ]
-}
-"""
-
-        return prompt
-
-    def get_relationship_building_prompt(self, headings: List[Dict[str, Any]]) -> str:
-        """
-        获取关系构建Prompt
-
-        Args:
-            headings: 带层级的标题列表
-
-        Returns:
-            完整的Prompt
-        """
-        if self.language == "chinese":
-            prompt = """任务: 构建标题之间的父子关系
+""",
+        "relationship_head": """任务: 构建标题之间的父子关系
 
 标题列表（按出现顺序）:
-"""
-            for i, heading in enumerate(headings):
-                prompt += f"{i}. [L{heading['level']}] {heading['text']}\n"
-
-            prompt += """
+""",
+        "relationship_suffix": """
 规则:
 1. 子标题紧跟在父标题之后
 2. 子标题的层级必须比父标题高（数字更大）
@@ -245,45 +129,8 @@ Output format:
         ...
     ]
 }
-"""
-        else:
-            # English version (similar structure)
-            prompt = """Task: Build parent-child relationships between headings
-
-Headings (in order):
-"""
-            for i, heading in enumerate(headings):
-                prompt += f"{i}. [L{heading['level']}] {heading['text']}\n"
-
-            prompt += """
-Output format:
-{
-    "tree": [
-        {
-            "id": 0,
-            "text": "heading text",
-            "level": 1,
-            "children": [1, 2]
-        },
-        ...
-    ]
-}
-"""
-
-        return prompt
-
-    def get_reflection_prompt(self, result: Dict[str, Any]) -> str:
-        """
-        获取反思验证Prompt
-
-        Args:
-            result: 当前提取结果
-
-        Returns:
-            完整的Prompt
-        """
-        if self.language == "chinese":
-            prompt = f"""任务: 反思和验证标题提取结果
+""",
+        "reflection": """任务: 反思和验证标题提取结果
 
 当前提取的标题结构:
 {result}
@@ -302,10 +149,89 @@ Output format:
     "suggestions": "改进建议",
     "confidence": 0.0-1.0
 }}
-"""
-        else:
-            # English version
-            prompt = f"""Task: Reflect on and validate heading extraction results
+""",
+    },
+    "english": {
+        "system": """You are a professional PDF document analyst, skilled at identifying and extracting heading structures from documents.
+
+Your capabilities include:
+1. Accurately identify headings at all levels in PDF documents
+2. Understand semantic and hierarchical relationships of headings
+3. Distinguish headings from regular body text
+4. Build complete heading tree structures
+
+Your working principles:
+- Base analysis on contextual understanding, not just formatting
+- Maintain completeness and accuracy of headings
+- Correctly determine hierarchical relationships
+- Provide confidence assessments for uncertain cases
+""",
+        "heading_head": """Task: Determine if the following text is a heading
+
+Text: "{text_block}"
+""",
+        "heading_context": "\nContext:\n{context}\n",
+        "heading_suffix": """
+Output format:
+{
+    "is_heading": true/false,
+    "confidence": 0.0-1.0,
+    "level_guess": 1-6 (if is heading)
+}
+""",
+        "batch_head": "Task: For each numbered text below, determine whether it is a heading\n",
+        "batch_item": '\n[{n}] Text: "{text_block}"\n',
+        "batch_context": "Context:\n{context}\n",
+        "batch_suffix": """
+Output format (one entry per number above, index matching the number):
+{
+    "results": [
+        {
+            "index": number,
+            "is_heading": true/false,
+            "confidence": 0.0-1.0,
+            "level_guess": 1-6 (if is heading)
+        },
+        ...
+    ]
+}
+""",
+        "level_head": """Task: Determine accurate levels (1-6) for the following headings
+
+Headings:
+""",
+        "level_suffix": """
+Output format:
+{
+    "headings": [
+        {
+            "text": "heading text",
+            "level": 1-6,
+            "reasoning": "reason for level determination"
+        },
+        ...
+    ]
+}
+""",
+        "relationship_head": """Task: Build parent-child relationships between headings
+
+Headings (in order):
+""",
+        "relationship_suffix": """
+Output format:
+{
+    "tree": [
+        {
+            "id": 0,
+            "text": "heading text",
+            "level": 1,
+            "children": [1, 2]
+        },
+        ...
+    ]
+}
+""",
+        "reflection": """Task: Reflect on and validate heading extraction results
 
 Current heading structure:
 {result}
@@ -324,56 +250,241 @@ Output format:
     "suggestions": "improvement suggestions",
     "confidence": 0.0-1.0
 }}
-"""
+""",
+    },
+}
+
+
+# 超过该大小的Prompt文件通过mmap读取
+PROMPT_MMAP_THRESHOLD = 64 * 1024
+
+
+def _read_prompt_file(path: Path) -> str:
+    """读取Prompt文件（大文件通过mmap读取，换行符与文本模式读取一样统一为LF）"""
+    if path.stat().st_size <= PROMPT_MMAP_THRESHOLD:
+        with open(path, "r", encoding="utf-8") as f:
+            return f.read()
+
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        text = mm[:].decode("utf-8")
+    return text.replace("\r\n", "\n").replace("\r", "\n")
+
+
+# Few-shot示例（按语言），所有PromptManager实例共享
+FEW_SHOT_EXAMPLES: Dict[str, Tuple[Dict[str, Any], ...]] = {
+    "chinese": (
+        {
+            "input": "1. 引言",
+            "output": {
+                "is_heading": True,
+                "level": 1,
+                "reasoning": "有明确编号1.，内容简洁概括，是一级标题",
+            },
+        },
+        {
+            "input": "1.1 研究背景",
+            "output": {
+                "is_heading": True,
+                "level": 2,
+                "reasoning": "编号1.1表示是1的子标题，为二级标题",
+            },
+        },
+        {
+            "input": "本文研究了机器学习在自然语言处理中的应用，通过实验验证了模型的有效性。",
+            "output": {
+                "is_heading": False,
+                "reasoning": "文本较长，是完整的句子描述，不是标题",
+            },
+        },
+    ),
+    "english": (
+        {
+            "input": "1. Introduction",
+            "output": {
+                "is_heading": True,
+                "level": 1,
+                "reasoning": "Clear numbering 1., concise content, first-level heading",
+            },
+        },
+        {
+            "input": "1.1 Background",
+            "output": {
+                "is_heading": True,
+                "level": 2,
+                "reasoning": "Numbering 1.1 indicates sub-heading of 1, second-level heading",
+            },
+        },
+    ),
+}
 
-        return prompt
 
-    def get_few_shot_examples(self) -> List[Dict[str, Any]]:
-        """获取Few-shot示例"""
+class PromptManager:
+    """Prompt模板管理器"""
+
+    def __init__(self, config: Dict[str, Any]):
+        """
+        初始化Prompt管理器
+
+        Args:
+            config: 配置字典
+        """
+        self.config = config
+        self.prompt_config = config.get("prompts", {})
+        self.language = self.prompt_config.get("language", "chinese")
+        self.style = self.prompt_config.get("style", "professional")
+        self.use_cot = self.prompt_config.get("use_cot", True)
+        self.num_examples = self.prompt_config.get("num_examples", 3)
+
+        # 按语言选定模板，并预先拼好与调用参数无关的部分（CoT说明、输出格式）
+        self._templates = PROMPT_TEMPLATES["chinese" if self.language == "chinese" else "english"]
         if self.language == "chinese":
-            examples = [
-                {
-                    "input": "1. 引言",
-                    "output": {
-                        "is_heading": True,
-                        "level": 1,
-                        "reasoning": "有明确编号1.，内容简洁概括，是一级标题",
-                    },
-                },
-                {
-                    "input": "1.1 研究背景",
-                    "output": {
-                        "is_heading": True,
-                        "level": 2,
-                        "reasoning": "编号1.1表示是1的子标题，为二级标题",
-                    },
-                },
-                {
-                    "input": "本文研究了机器学习在自然语言处理中的应用，通过实验验证了模型的有效性。",
-                    "output": {
-                        "is_heading": False,
-                        "reasoning": "文本较长，是完整的句子描述，不是标题",
-                    },
-                },
+            self._heading_suffix = self._templates[
+                "heading_suffix_cot" if self.use_cot else "heading_suffix"
             ]
+            reasoning_field = ',\n            "reasoning": "简要理由"' if self.use_cot else ""
+            self._batch_suffix = (
+                (self._templates["batch_cot"] if self.use_cot else "")
+                + self._templates["batch_suffix"].replace("{reasoning_field}", reasoning_field)
+            )
         else:
-            examples = [
-                {
-                    "input": "1. Introduction",
-                    "output": {
-                        "is_heading": True,
-                        "level": 1,
-                        "reasoning": "Clear numbering 1., concise content, first-level heading",
-                    },
-                },
-                {
-                    "input": "1.1 Background",
-                    "output": {
-                        "is_heading": True,
-                        "level": 2,
-                        "reasoning": "Numbering 1.1 indicates sub-heading of 1, second-level heading",
-                    },
-                },
-            ]
+            self._heading_suffix = self._templates["heading_suffix"]
+            self._batch_suffix = self._templates["batch_suffix"]
+
+        # 加载自定义Prompts
+        custom_dir = self.prompt_config.get("custom_prompts_dir", "prompts/")
+        self.custom_prompts = self._load_custom_prompts(custom_dir)
+
+        self._fingerprint: Optional[str] = None
+
+        logger.info(f"Prompt管理器初始化完成: {self.language}/{self.style}")
+
+    def fingerprint(self) -> str:
+        """
+        计算全部Prompt内容的指纹（模板、Few-shot示例、自定义Prompt及Prompt配置），
+        任一Prompt修改后指纹随之变化，供结果缓存键使用
+
+        Returns:
+            十六进制摘要
+        """
+        if self._fingerprint is None:
+            payload = {
+                "templates": self._templates,
+                "few_shot": self.get_few_shot_examples(),
+                "custom": self.custom_prompts,
+                "config": self.prompt_config,
+            }
+            self._fingerprint = hashlib.blake2b(
+                json.dumps(payload, ensure_ascii=False, sort_keys=True, default=str).encode("utf-8"),
+                digest_size=16,
+            ).hexdigest()
+        return self._fingerprint
+
+    def _load_custom_prompts(self, custom_dir: str) -> Dict[str, str]:
+        """加载自定义Prompt文件"""
+        prompts = {}
+        prompt_path = Path(custom_dir)
+
+        if prompt_path.exists():
+            files = list(prompt_path.glob("*.txt"))
+            # 并行读取，I/O等待互相重叠；map保持glob顺序
+            with ThreadPoolExecutor(max_workers=min(8, len(files) or 1)) as executor:
+                for file, content in zip(files, executor.map(_read_prompt_file, files)):
+                    prompts[file.stem] = content
+                    logger.info(f"加载自定义Prompt: {file.stem}")
+
+        return prompts
+
+    def get_system_prompt(self) -> str:
+        """获取系统角色Prompt"""
+        return self._templates["system"]
+
+    def get_heading_identification_prompt(
+        self, text_block: str, context: Optional[str] = None
+    ) -> str:
+        """
+        获取标题识别Prompt
+
+        Args:
+            text_block: 待分析的文本块
+            context: 上下文（前后文）
+
+        Returns:
+            完整的Prompt
+        """
+        templates = self._templates
+        parts = [templates["heading_head"].format_map({"text_block": text_block})]
+        if context:
+            parts.append(templates["heading_context"].format_map({"context": context}))
+        parts.append(self._heading_suffix)
+        return "".join(parts)
+
+    def get_batch_heading_identification_prompt(
+        self, items: List[Tuple[str, Optional[str]]]
+    ) -> str:
+        """
+        获取批量标题识别Prompt（一次判断多个文本块）
+
+        Args:
+            items: (待分析的文本块, 上下文) 列表，按1开始编号
+
+        Returns:
+            完整的Prompt
+        """
+        templates = self._templates
+        item_template = templates["batch_item"]
+        context_template = templates["batch_context"]
+
+        parts = [templates["batch_head"]]
+        for n, (text_block, context) in enumerate(items, 1):
+            parts.append(item_template.format_map({"n": n, "text_block": text_block}))
+            if context:
+                parts.append(context_template.format_map({"context": context}))
+        parts.append(self._batch_suffix)
+        return "".join(parts)
+
+    def get_level_determination_prompt(self, headings: List[Dict[str, Any]]) -> str:
+        """
+        获取层级判定Prompt
+
+        Args:
+            headings: 已识别的标题列表
+
+        Returns:
+            完整的Prompt
+        """
+        templates = self._templates
+        lines = "".join(f"{i}. {heading.get('text', '')}\n" for i, heading in enumerate(headings, 1))
+        return f"{templates['level_head']}{lines}{templates['level_suffix']}"
+
+    def get_relationship_building_prompt(self, headings: List[Dict[str, Any]]) -> str:
+        """
+        获取关系构建Prompt
+
+        Args:
+            headings: 带层级的标题列表
+
+        Returns:
+            完整的Prompt
+        """
+        templates = self._templates
+        lines = "".join(
+            f"{i}. [L{heading['level']}] {heading['text']}\n" for i, heading in enumerate(headings)
+        )
+        return f"{templates['relationship_head']}{lines}{templates['relationship_suffix']}"
+
+    def get_reflection_prompt(self, result: Dict[str, Any]) -> str:
+        """
+        获取反思验证Prompt
+
+        Args:
+            result: 当前提取结果
+
+        Returns:
+            完整的Prompt
+        """
+        return self._templates["reflection"].format_map({"result": result})
 
+    def get_few_shot_examples(self) -> Tuple[Dict[str, Any], ...]:
+        """获取Few-shot示例（模块级共享对象，调用方不应修改）"""
+        examples = FEW_SHOT_EXAMPLES["chinese" if self.language == "chinese" else "english"]
         return examples[: self.num_examples]
@@ -0,0 +1,204 @@
+"""
+LLM响应缓存
+在磁盘结果缓存之前加一层进程内LRU缓存：页眉页脚、"摘要"、"参考文献"等重复文本块
+产生的相同调用直接在内存中命中；可选的语义缓存对近似重复的请求复用已有响应
+"""
+
+import logging
+import re
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from ..memory.result_cache import ResultCache
+
+
+logger = logging.getLogger(__name__)
+
+# 进程内缓存的条目上限（同一进程内的LLMClient实例共用）
+MEMORY_CACHE_SIZE = 10_000
+
+_memory_cache: "OrderedDict[str, str]" = OrderedDict()
+_memory_cache_lock = threading.Lock()
+
+# 参与语义缓存的用户消息长度上限：长消息中个别条目的差异在向量上几乎体现不出来
+SEMANTIC_MAX_CHARS = 300
+
+# 编号列表条目（"1. xxx"、"2) xxx"、"3、xxx"），出现多条时视为多条目消息
+_LIST_ITEM_RE = re.compile(r"^\s*\d+[.)、]", re.M)
+
+
+@lru_cache(maxsize=None)
+def _load_encoder(model_name: str) -> Any:
+    """加载 sentence-transformers 模型（同一进程内每个模型只加载一次）"""
+    from sentence_transformers import SentenceTransformer
+
+    return SentenceTransformer(model_name)
+
+
+class SemanticIndex:
+    """语义缓存索引 - 同一作用域（模型、参数、系统提示词相同）内按用户消息的向量相似度查找"""
+
+    def __init__(self, model_name: str, threshold: float, max_entries: int = MEMORY_CACHE_SIZE):
+        """
+        初始化语义索引
+
+        Args:
+            model_name: sentence-transformers 模型名称
+            threshold: 余弦相似度阈值，达到该值才视为命中
+            max_entries: 每个作用域保留的条目上限，超出时淘汰最早写入的条目
+
+        Raises:
+            ImportError: 未安装 sentence-transformers
+        """
+        self.encoder = _load_encoder(model_name)
+        self.threshold = threshold
+        self.max_entries = max_entries
+        # 作用域 -> (归一化向量列表, 响应列表)
+        self._scopes: Dict[str, tuple] = {}
+        self._lock = threading.Lock()
+
+    def _embed(self, text: str) -> np.ndarray:
+        """计算归一化向量（内积即余弦相似度）"""
+        return np.asarray(
+            self.encoder.encode(text, normalize_embeddings=True), dtype=np.float32
+        )
+
+    def get(self, scope: str, query: str) -> Optional[str]:
+        """
+        查找与 query 最相似的已缓存响应
+
+        Args:
+            scope: 作用域键
+            query: 用户消息
+
+        Returns:
+            相似度达到阈值的响应，否则返回None
+        """
+        with self._lock:
+            entry = self._scopes.get(scope)
+            if not entry or not entry[0]:
+                return None
+            vectors, values = np.stack(entry[0]), list(entry[1])
+
+        scores = vectors @ self._embed(query)
+        best = int(np.argmax(scores))
+        if scores[best] < self.threshold:
+            return None
+
+        logger.debug(f"命中语义缓存: 相似度 {scores[best]:.3f}")
+        return values[best]
+
+    def add(self, scope: str, query: str, value: str):
+        """
+        写入一条响应
+
+        Args:
+            scope: 作用域键
+            query: 用户消息
+            value: 响应文本
+        """
+        vector = self._embed(query)
+        with self._lock:
+            vectors, values = self._scopes.setdefault(scope, ([], []))
+            vectors.append(vector)
+            values.append(value)
+            if len(values) > self.max_entries:
+                del vectors[0], values[0]
+
+
+class ResponseCache:
+    """分层响应缓存：进程内LRU -> 磁盘缓存 -> 语义索引（可选）"""
+
+    make_key = staticmethod(ResultCache.make_key)
+
+    def __init__(self, config: Dict[str, Any]):
+        """
+        初始化响应缓存
+
+        Args:
+            config: 配置字典
+        """
+        cache_config = config.get("llm", {}).get("cache", {})
+        self.exact = cache_config.get("exact", True)
+        self.disk_cache = ResultCache(config, namespace="llm_responses")
+
+        self.semantic_index = None
+        if cache_config.get("semantic", False):
+            try:
+                self.semantic_index = SemanticIndex(
+                    cache_config.get("embedding_model", "all-MiniLM-L6-v2"),
+                    cache_config.get("semantic_threshold", 0.97),
+                )
+            except ImportError:
+                logger.warning("未安装 sentence-transformers，语义缓存未启用")
+
+    def get(self, key: str, scope: Optional[str] = None, query: Optional[str] = None) -> Optional[str]:
+        """
+        读取缓存
+
+        Args:
+            key: 精确缓存键
+            scope: 语义缓存作用域键，为None时不查语义缓存
+            query: 参与语义匹配的用户消息
+
+        Returns:
+            缓存的响应，未命中返回None
+        """
+        if self.exact:
+            with _memory_cache_lock:
+                value = _memory_cache.get(key)
+                if value is not None:
+                    _memory_cache.move_to_end(key)
+                    return value
+
+        value = self.disk_cache.get(key)
+        if value is not None:
+            if self.exact:
+                self._remember(key, value)
+            return value
+
+        if self._use_semantic(scope, query):
+            return self.semantic_index.get(scope, query)
+        return None
+
+    def set(self, key: str, value: str, scope: Optional[str] = None, query: Optional[str] = None):
+        """
+        写入缓存
+
+        Args:
+            key: 精确缓存键
+            value: 响应文本
+            scope: 语义缓存作用域键，为None时不写语义缓存
+            query: 参与语义匹配的用户消息
+        """
+        if self.exact:
+            self._remember(key, value)
+        if self._use_semantic(scope, query):
+            self.semantic_index.add(scope, query, value)
+        self.disk_cache.set(key, value)
+
+    def _use_semantic(self, scope: Optional[str], query: Optional[str]) -> bool:
+        """
+        判断本次请求是否走语义缓存
+
+        只对短的单条目消息启用：编号列表等多条目消息即使只有一条不同，整体向量仍高度相似，
+        复用响应会得到错误结果
+        """
+        if self.semantic_index is None or scope is None or not query:
+            return False
+        if len(query) > SEMANTIC_MAX_CHARS:
+            return False
+        return len(_LIST_ITEM_RE.findall(query)) < 2
+
+    @staticmethod
+    def _remember(key: str, value: str):
+        """写入进程内LRU缓存"""
+        with _memory_cache_lock:
+            _memory_cache[key] = value
+            _memory_cache.move_to_end(key)
+            if len(_memory_cache) > MEMORY_CACHE_SIZE:
+                _memory_cache.popitem(last=False)
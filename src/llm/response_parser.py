@@ -4,11 +4,26 @@ LLM响应解析模块
 
 import json
 import logging
+import re
 from typing import Dict, Any, List, Optional
 
+try:
+    import orjson
+except ImportError:  # 可选依赖，未安装时使用标准库json
+    orjson = None
+
 
 logger = logging.getLogger(__name__)
 
+# orjson.JSONDecodeError 是 json.JSONDecodeError 的子类，调用处的异常处理无需区分
+_json_loads = orjson.loads if orjson is not None else json.loads
+
+# markdown代码块（可带json语言标记）
+_FENCE_RE = re.compile(r"```(?:json)?(.*?)```", re.S)
+
+# JSON值可能的首字符
+_JSON_VALUE_START = frozenset('{["-0123456789tfn')
+
 
 class ResponseParser:
     """LLM响应解析器"""
@@ -25,7 +40,7 @@ class ResponseParser:
             解析后的结构化数据
         """
         try:
-            data = json.loads(response)
+            data = _json_loads(response)
             return {
                 "is_heading": data.get("is_heading", False),
                 "confidence": data.get("confidence", 0.0),
@@ -36,6 +51,32 @@ class ResponseParser:
             logger.error(f"解析标题识别响应失败: {e}")
             return {"is_heading": False, "confidence": 0.0}
 
+    @staticmethod
+    def parse_batch_heading_identification(response: str) -> Dict[int, Dict[str, Any]]:
+        """
+        解析批量标题识别响应
+
+        Args:
+            response: LLM响应文本
+
+        Returns:
+            编号 -> 识别结果；解析失败返回空字典
+        """
+        data = ResponseParser.extract_json_from_text(response)
+        if isinstance(data, dict):
+            data = data.get("results", [])
+        if not isinstance(data, list):
+            logger.error("解析批量标题识别响应失败: 缺少results列表")
+            return {}
+
+        results = {}
+        for item in data:
+            try:
+                results[int(item["index"])] = item
+            except (KeyError, TypeError, ValueError):
+                logger.warning(f"忽略无效的识别结果: {item}")
+        return results
+
     @staticmethod
     def parse_level_determination(response: str) -> List[Dict[str, Any]]:
         """
@@ -48,7 +89,7 @@ class ResponseParser:
             标题列表
         """
         try:
-            data = json.loads(response)
+            data = _json_loads(response)
             return data.get("headings", [])
         except json.JSONDecodeError as e:
             logger.error(f"解析层级判定响应失败: {e}")
@@ -66,7 +107,7 @@ class ResponseParser:
             标题树结构
         """
         try:
-            data = json.loads(response)
+            data = _json_loads(response)
             return data.get("tree", [])
         except json.JSONDecodeError as e:
             logger.error(f"解析关系构建响应失败: {e}")
@@ -84,7 +125,7 @@ class ResponseParser:
             反思结果
         """
         try:
-            data = json.loads(response)
+            data = _json_loads(response)
             return {
                 "is_complete": data.get("is_complete", True),
                 "missing_headings": data.get("missing_headings", []),
@@ -107,33 +148,83 @@ class ResponseParser:
         Returns:
             解析后的字典，失败返回None
         """
-        try:
-            # 尝试直接解析
-            return json.loads(text.strip())
-        except json.JSONDecodeError:
-            pass
-
-        # 尝试提取markdown代码块中的JSON
-        if "```json" in text:
-            json_start = text.find("```json") + 7
-            json_end = text.find("```", json_start)
-            if json_end != -1:
-                json_text = text[json_start:json_end].strip()
-                try:
-                    return json.loads(json_text)
-                except json.JSONDecodeError:
-                    pass
-
-        # 尝试提取普通代码块中的JSON
-        if "```" in text:
-            json_start = text.find("```") + 3
-            json_end = text.find("```", json_start)
-            if json_end != -1:
-                json_text = text[json_start:json_end].strip()
-                try:
-                    return json.loads(json_text)
-                except json.JSONDecodeError:
-                    pass
+        # 首字符可能开始一个JSON值时才尝试直接解析；以代码块或说明文字开头的响应直接查找代码块
+        stripped = text.strip()
+        if stripped[:1] in _JSON_VALUE_START:
+            try:
+                return _json_loads(stripped)
+            except json.JSONDecodeError:
+                pass
+
+        # 尝试提取markdown代码块（```json 或普通 ```）中的JSON，依次尝试每个代码块
+        for match in _FENCE_RE.finditer(text):
+            try:
+                return _json_loads(match.group(1).strip())
+            except json.JSONDecodeError:
+                continue
 
         logger.warning(f"无法从文本中提取有效的JSON: {text[:100]}...")
         return None
+
+
+class JSONArrayStream:
+    """
+    增量解析流式响应中的 "key": [...] 数组
+
+    每次喂入一段文本，返回其中新完成的数组元素；响应未结束即可开始处理已完成的元素。
+    """
+
+    _WHITESPACE = re.compile(r"[\s,]*")
+
+    def __init__(self, key: str):
+        """
+        Args:
+            key: 数组所在的键名（如 "headings"）
+        """
+        self._decoder = json.JSONDecoder()
+        self._start = re.compile(r'"%s"\s*:\s*\[' % re.escape(key))
+        self._buffer = ""
+        self.found = False  # 是否已遇到数组开头
+        self.closed = False  # 是否已遇到数组结尾
+
+    def feed(self, chunk: str) -> List[Any]:
+        """
+        喂入一段响应文本
+
+        Args:
+            chunk: 新到达的文本片段
+
+        Returns:
+            本次新解析出的数组元素
+        """
+        if self.closed:
+            return []
+
+        self._buffer += chunk
+        if not self.found:
+            match = self._start.search(self._buffer)
+            if not match:
+                return []
+            self.found = True
+            self._buffer = self._buffer[match.end():]
+
+        items = []
+        pos = 0
+        while True:
+            pos = self._WHITESPACE.match(self._buffer, pos).end()
+            if pos >= len(self._buffer):
+                break
+            if self._buffer[pos] == "]":
+                self.closed = True
+                break
+            try:
+                item, end = self._decoder.raw_decode(self._buffer, pos)
+            except json.JSONDecodeError:
+                break  # 元素尚未接收完整
+            if end >= len(self._buffer):
+                break  # 末尾的数字等可能还未结束，等待后续文本
+            items.append(item)
+            pos = end
+
+        self._buffer = self._buffer[pos:]
+        return items
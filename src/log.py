@@ -0,0 +1,48 @@
+"""
+命令行输出日志
+CLI的进度与结果统一经由logging输出到stderr：--quiet 只保留警告和错误，--pretty 使用rich美化
+"""
+
+import logging
+import sys
+
+
+# CLI专用logger，不向根logger传播，避免与Agent的日志配置（文件/控制台）重复输出
+logger = logging.getLogger("pdfhx.cli")
+logger.propagate = False
+
+
+def setup_cli_logging(
+    quiet: bool = False, pretty: bool = False, verbose: bool = False
+) -> logging.Logger:
+    """
+    配置CLI logger（可重复调用，后一次配置覆盖前一次）
+
+    Args:
+        quiet: 只输出警告和错误
+        pretty: 使用rich的RichHandler输出
+        verbose: 输出调试信息
+
+    Returns:
+        配置好的logger
+    """
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+
+    if pretty:
+        from rich.logging import RichHandler
+
+        handler = RichHandler(show_time=False, show_path=False, markup=False)
+    else:
+        handler = logging.StreamHandler(sys.stderr)
+        handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(handler)
+
+    if quiet:
+        logger.setLevel(logging.WARNING)
+    elif verbose:
+        logger.setLevel(logging.DEBUG)
+    else:
+        logger.setLevel(logging.INFO)
+
+    return logger
@@ -3,5 +3,6 @@
 """
 
 from .context_manager import ContextManager
+from .result_cache import ResultCache
 
-__all__ = ["ContextManager"]
+__all__ = ["ContextManager", "ResultCache"]
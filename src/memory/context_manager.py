@@ -2,7 +2,9 @@
 上下文管理模块
 """
 
-from typing import Dict, Any, List
+from collections import deque
+from types import MappingProxyType
+from typing import Dict, Any, Iterator, Mapping, Tuple
 import logging
 
 
@@ -22,12 +24,13 @@ class ContextManager:
         self.config = config
         self.memory_config = config.get("memory", {})
         self.max_tokens = self.memory_config.get("max_tokens", 2000)
+        self.max_items = self.memory_config.get("max_items", 1000)
 
         # 短期记忆（当前任务）
         self.short_term_memory = {}
 
-        # 工作记忆（中间结果）
-        self.working_memory = []
+        # 工作记忆（中间结果），超出条目上限时丢弃最早的条目
+        self.working_memory = deque(maxlen=self.max_items)
 
         logger.info("上下文管理器初始化完成")
 
@@ -54,17 +57,21 @@ class ContextManager:
         """
         return self.short_term_memory.get(key)
 
-    def get_all_context(self) -> Dict[str, Any]:
-        """获取所有上下文"""
-        return self.short_term_memory.copy()
+    def get_all_context(self) -> Mapping[str, Any]:
+        """获取所有上下文（只读视图，不复制）"""
+        return MappingProxyType(self.short_term_memory)
 
     def add_working_memory(self, item: Dict[str, Any]):
         """添加到工作记忆"""
         self.working_memory.append(item)
 
-    def get_working_memory(self) -> List[Dict[str, Any]]:
-        """获取工作记忆"""
-        return self.working_memory.copy()
+    def get_working_memory(self) -> Tuple[Dict[str, Any], ...]:
+        """获取工作记忆（不可变快照）"""
+        return tuple(self.working_memory)
+
+    def iter_working_memory(self) -> Iterator[Dict[str, Any]]:
+        """按添加顺序遍历工作记忆（只读，遍历期间不能添加条目）"""
+        return iter(self.working_memory)
 
     def clear(self):
         """清空记忆"""
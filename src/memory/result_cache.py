@@ -0,0 +1,99 @@
+"""
+结果缓存模块
+以内容指纹为键，将Agent的提取结果持久化到磁盘，避免重复调用LLM
+"""
+
+import hashlib
+import json
+import logging
+import os
+import time
+from typing import Dict, Any, Optional
+
+from ..config import get_cache_dir
+
+
+logger = logging.getLogger(__name__)
+
+
+class ResultCache:
+    """磁盘结果缓存 - 每个键对应缓存目录下的一个JSON文件"""
+
+    def __init__(self, config: Dict[str, Any], namespace: str = "results"):
+        """
+        初始化结果缓存
+
+        Args:
+            config: 配置字典
+            namespace: 缓存子目录名，用于隔离不同类型的缓存
+        """
+        self.config = config
+        self.perf_config = config.get("performance", {})
+        self.ttl = self.perf_config.get("cache_ttl", 86400)
+        self.cache_dir = get_cache_dir(config) / namespace
+
+    @staticmethod
+    def make_key(*parts: str) -> str:
+        """
+        由若干字符串片段生成缓存键
+
+        Args:
+            parts: 参与计算的字符串片段
+
+        Returns:
+            十六进制缓存键
+        """
+        digest = hashlib.sha256()
+        for part in parts:
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        读取缓存
+
+        Args:
+            key: 缓存键
+
+        Returns:
+            缓存值，未命中或已过期返回None
+        """
+        cache_file = self.cache_dir / f"{key}.json"
+        if not cache_file.exists():
+            return None
+
+        try:
+            with open(cache_file, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"读取缓存失败: {cache_file}: {e}")
+            return None
+
+        if self.ttl and time.time() - entry.get("created_at", 0) > self.ttl:
+            logger.debug(f"缓存已过期: {key}")
+            return None
+
+        logger.debug(f"命中缓存: {key}")
+        return entry.get("value")
+
+    def set(self, key: str, value: Any):
+        """
+        写入缓存（先写临时文件再替换，避免并发读到半截文件）
+
+        Args:
+            key: 缓存键
+            value: 可JSON序列化的缓存值
+        """
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        cache_file = self.cache_dir / f"{key}.json"
+        tmp_file = cache_file.with_suffix(f".{os.getpid()}.tmp")
+
+        try:
+            with open(tmp_file, "w", encoding="utf-8") as f:
+                json.dump({"created_at": time.time(), "value": value}, f, ensure_ascii=False)
+            os.replace(tmp_file, cache_file)
+            logger.debug(f"写入缓存: {key}")
+        except (OSError, TypeError) as e:
+            logger.warning(f"写入缓存失败: {cache_file}: {e}")
+            tmp_file.unlink(missing_ok=True)
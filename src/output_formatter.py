@@ -5,13 +5,26 @@
 
 import json
 import csv
+import io
 import logging
-from typing import List, Dict, Any
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Union
 from pathlib import Path
 
+try:
+    import orjson
+except ImportError:  # 可选依赖，未安装时使用标准库json
+    orjson = None
+
 
 logger = logging.getLogger(__name__)
 
+# format_type="all" 时生成的格式
+ALL_FORMATS = ("json", "markdown", "txt", "csv")
+
+# 二进制输出文件的写缓冲区大小
+WRITE_BUFFER_SIZE = 1 << 20
+
 
 class OutputFormatter:
     """输出格式化器"""
@@ -40,7 +53,8 @@ class OutputFormatter:
         pdf_name: str,
         total_pages: int,
         format_type: str = None,
-    ) -> str:
+        as_bytes: bool = False,
+    ) -> Union[str, bytes]:
         """
         格式化输出
 
@@ -49,34 +63,43 @@ class OutputFormatter:
             pdf_name: PDF文件名
             total_pages: 总页数
             format_type: 输出格式，如果为None则使用配置中的格式
+            as_bytes: 返回UTF-8字节（直接写文件时使用，JSON格式省去一次str转换）
 
         Returns:
-            格式化后的字符串
+            格式化后的字符串（as_bytes为True时为字节）
         """
         format_type = format_type or self.format
 
         logger.info(f"格式化输出为 {format_type} 格式")
 
         if format_type == "json":
+            if as_bytes:
+                return self._format_json_bytes(headings, pdf_name, total_pages)
             return self._format_json(headings, pdf_name, total_pages)
         elif format_type == "markdown":
-            return self._format_markdown(headings, pdf_name, total_pages)
+            content = self._format_markdown(headings, pdf_name, total_pages)
         elif format_type == "txt":
-            return self._format_txt(headings, pdf_name, total_pages)
+            content = self._format_txt(headings, pdf_name, total_pages)
         elif format_type == "csv":
-            return self._format_csv(headings, pdf_name, total_pages)
+            content = self._format_csv(headings, pdf_name, total_pages)
         elif format_type == "all":
-            # 生成所有格式
-            results = {}
-            for fmt in ["json", "markdown", "txt", "csv"]:
-                results[fmt] = self.format_output(headings, pdf_name, total_pages, fmt)
-            return results
+            # 生成所有格式（各格式互不依赖，并行生成）
+            with ThreadPoolExecutor(max_workers=len(ALL_FORMATS)) as executor:
+                futures = {
+                    fmt: executor.submit(
+                        self.format_output, headings, pdf_name, total_pages, fmt, as_bytes
+                    )
+                    for fmt in ALL_FORMATS
+                }
+            return {fmt: future.result() for fmt, future in futures.items()}
         else:
             raise ValueError(f"不支持的输出格式: {format_type}")
 
+        return content.encode("utf-8") if as_bytes else content
+
     def save_output(
         self,
-        content: str,
+        content: Union[str, bytes],
         pdf_name: str,
         format_type: str = None,
     ) -> str:
@@ -84,73 +107,146 @@ class OutputFormatter:
         保存输出到文件
 
         Args:
-            content: 内容
+            content: 内容（字节按原样写入）
             pdf_name: PDF文件名
             format_type: 输出格式
 
         Returns:
             输出文件路径
         """
-        format_type = format_type or self.format
-        base_name = Path(pdf_name).stem
-        extension = format_type
+        output_path = self._output_path(pdf_name, format_type or self.format)
+
+        if isinstance(content, bytes):
+            self._write_bytes(output_path, content)
+        else:
+            with open(output_path, "w", encoding="utf-8") as f:
+                f.write(content)
 
-        if format_type == "markdown":
-            extension = "md"
+        logger.info(f"输出已保存到: {output_path}")
+        return str(output_path)
 
-        output_path = self.output_dir / f"{base_name}_headings.{extension}"
+    def save_all(self, headings: List[Any], pdf_name: str, total_pages: int) -> Dict[str, str]:
+        """
+        生成并保存所有格式（每个格式的序列化与写文件在同一线程内完成，各格式并行）
 
-        with open(output_path, "w", encoding="utf-8") as f:
-            f.write(content)
+        Args:
+            headings: 标题列表
+            pdf_name: PDF文件名
+            total_pages: 总页数
+
+        Returns:
+            格式 -> 输出文件路径
+        """
+
+        def format_and_save(fmt: str) -> str:
+            content = self.format_output(headings, pdf_name, total_pages, fmt, as_bytes=True)
+            return self.save_output(content, pdf_name, fmt)
+
+        with ThreadPoolExecutor(max_workers=len(ALL_FORMATS)) as executor:
+            futures = {fmt: executor.submit(format_and_save, fmt) for fmt in ALL_FORMATS}
+        return {fmt: future.result() for fmt, future in futures.items()}
+
+    def save_output_bytes(self, headings: List[Any], pdf_name: str, total_pages: int) -> str:
+        """
+        将标题直接序列化为JSON字节并保存（不经过中间字符串）
+
+        Args:
+            headings: 标题列表
+            pdf_name: PDF文件名
+            total_pages: 总页数
+
+        Returns:
+            输出文件路径
+        """
+        output_path = self._output_path(pdf_name, "json")
+        self._write_bytes(output_path, self._format_json_bytes(headings, pdf_name, total_pages))
 
         logger.info(f"输出已保存到: {output_path}")
         return str(output_path)
 
-    def _format_json(self, headings: List[Any], pdf_name: str, total_pages: int) -> str:
-        """格式化为JSON"""
-        json_config = self.output_config.get("json", {})
-        indent = json_config.get("indent", 2)
-        ensure_ascii = json_config.get("ensure_ascii", False)
+    @staticmethod
+    def _write_bytes(output_path: Path, content: bytes):
+        """以二进制方式写文件（大缓冲区，减少分块写入的系统调用）"""
+        with open(output_path, "wb", buffering=WRITE_BUFFER_SIZE) as f:
+            f.write(content)
 
-        data = {
+    def _output_path(self, pdf_name: str, format_type: str) -> Path:
+        """输出文件路径：<输出目录>/<PDF文件名>_headings.<扩展名>"""
+        extension = "md" if format_type == "markdown" else format_type
+        return self.output_dir / f"{Path(pdf_name).stem}_headings.{extension}"
+
+    def _json_data(self, headings: List[Any], pdf_name: str, total_pages: int) -> Dict[str, Any]:
+        """构造JSON输出的数据"""
+        include_confidence = self.include_confidence
+        include_font_info = self.include_font_info
+        return {
             "document": pdf_name,
             "total_pages": total_pages,
-            "headings": [
-                h.to_dict(self.include_confidence, self.include_font_info)
-                for h in headings
-            ],
+            "headings": [h.to_dict(include_confidence, include_font_info) for h in headings],
         }
 
+    def _orjson_option(self):
+        """
+        当前JSON配置对应的orjson选项
+
+        Returns:
+            orjson选项；未安装orjson或配置无法用orjson表达（缩进不是0/2、ensure_ascii）时返回None
+        """
+        if orjson is None:
+            return None
+
+        json_config = self.output_config.get("json", {})
+        indent = json_config.get("indent", 2)
+        if json_config.get("ensure_ascii", False) or indent not in (None, 0, 2):
+            return None
+        return orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if indent else 0)
+
+    def _format_json(self, headings: List[Any], pdf_name: str, total_pages: int) -> str:
+        """格式化为JSON"""
+        data = self._json_data(headings, pdf_name, total_pages)
+
+        option = self._orjson_option()
+        if option is not None:
+            return orjson.dumps(data, option=option).decode("utf-8")
+
+        json_config = self.output_config.get("json", {})
+        indent = json_config.get("indent", 2)
+        ensure_ascii = json_config.get("ensure_ascii", False)
         return json.dumps(data, indent=indent, ensure_ascii=ensure_ascii)
 
+    def _format_json_bytes(self, headings: List[Any], pdf_name: str, total_pages: int) -> bytes:
+        """格式化为UTF-8编码的JSON字节"""
+        option = self._orjson_option()
+        if option is not None:
+            return orjson.dumps(self._json_data(headings, pdf_name, total_pages), option=option)
+        return self._format_json(headings, pdf_name, total_pages).encode("utf-8")
+
     def _format_markdown(self, headings: List[Any], pdf_name: str, total_pages: int) -> str:
         """格式化为Markdown"""
         markdown_config = self.output_config.get("markdown", {})
         show_page_numbers = markdown_config.get("show_page_numbers", True)
         page_format = markdown_config.get("page_number_format", "(p.{page})")
 
+        # 循环内不变的配置提前取出
+        show_pages = show_page_numbers and self.include_page_numbers
+        format_page = page_format.format
+
         lines = [f"# {pdf_name} - 目录\n"]
         lines.append(f"总页数: {total_pages}\n")
         lines.append("---\n")
+        append = lines.append
 
-        def format_heading(heading: Any, indent_level: int = 0):
-            # Markdown标题符号
-            prefix = "#" * heading.level
-
-            # 页码
-            page_info = ""
-            if show_page_numbers and self.include_page_numbers:
-                page_info = " " + page_format.format(page=heading.page)
-
-            line = f"{prefix} {heading.text}{page_info}\n"
-            lines.append(line)
+        # 显式栈先序遍历（子标题逆序入栈以保持原顺序）
+        stack = list(reversed(headings))
+        while stack:
+            heading = stack.pop()
 
-            # 递归处理子标题
-            for child in heading.children:
-                format_heading(child, indent_level + 1)
-
-        for heading in headings:
-            format_heading(heading)
+            # Markdown标题符号 + 页码
+            if show_pages:
+                append(f"{'#' * heading.level} {heading.text} {format_page(page=heading.page)}\n")
+            else:
+                append(f"{'#' * heading.level} {heading.text}\n")
+            stack.extend(reversed(heading.children))
 
         return "".join(lines)
 
@@ -161,37 +257,43 @@ class OutputFormatter:
         lines.append(f"总页数: {total_pages}\n")
         lines.append("=" * 60 + "\n\n")
 
-        def format_heading(heading: Any, indent_level: int = 0):
-            indent = "  " * indent_level
-            page_info = ""
-            if self.include_page_numbers:
-                page_info = f" [p.{heading.page}]"
-
-            line = f"{indent}{'└─ ' if indent_level > 0 else ''}{heading.text}{page_info}\n"
-            lines.append(line)
+        include_page_numbers = self.include_page_numbers
+        append = lines.append
 
-            # 递归处理子标题
-            for child in heading.children:
-                format_heading(child, indent_level + 1)
+        # 显式栈先序遍历：(标题, 缩进层级)
+        stack = [(heading, 0) for heading in reversed(headings)]
+        while stack:
+            heading, indent_level = stack.pop()
+            indent = "  " * indent_level
+            page_info = f" [p.{heading.page}]" if include_page_numbers else ""
 
-        for heading in headings:
-            format_heading(heading)
+            append(f"{indent}{'└─ ' if indent_level > 0 else ''}{heading.text}{page_info}\n")
+            stack.extend((child, indent_level + 1) for child in reversed(heading.children))
 
         return "".join(lines)
 
     def _format_csv(self, headings: List[Any], pdf_name: str, total_pages: int) -> str:
         """格式化为CSV"""
-        rows = [["Level", "Text", "Page", "Numbering"]]
+        include_confidence = self.include_confidence
+        include_font_info = self.include_font_info
 
-        if self.include_confidence:
-            rows[0].append("Confidence")
+        header = ["Level", "Text", "Page", "Numbering"]
 
-        if self.include_font_info:
-            rows[0].extend(["Font Size", "Font Name"])
+        if include_confidence:
+            header.append("Confidence")
 
-        def flatten_headings(heading: Any, parent_path: str = ""):
-            path = f"{parent_path}/{heading.text}" if parent_path else heading.text
+        if include_font_info:
+            header.extend(["Font Size", "Font Name"])
 
+        output = io.StringIO()
+        writer = csv.writer(output)
+        writer.writerow(header)
+        writerow = writer.writerow
+
+        # 显式栈先序遍历，逐行写入
+        stack = list(reversed(headings))
+        while stack:
+            heading = stack.pop()
             row = [
                 heading.level,
                 heading.text,
@@ -199,24 +301,13 @@ class OutputFormatter:
                 heading.numbering or "",
             ]
 
-            if self.include_confidence:
+            if include_confidence:
                 row.append(f"{heading.confidence:.2f}")
 
-            if self.include_font_info:
+            if include_font_info:
                 row.extend([heading.font_size, heading.font_name])
 
-            rows.append(row)
-
-            for child in heading.children:
-                flatten_headings(child, path)
+            writerow(row)
+            stack.extend(reversed(heading.children))
 
-        for heading in headings:
-            flatten_headings(heading)
-
-        # 转换为CSV字符串
-        import io
-
-        output = io.StringIO()
-        writer = csv.writer(output)
-        writer.writerows(rows)
         return output.getvalue()
@@ -0,0 +1,141 @@
+"""
+PDF解析缓存
+以PDF文件内容指纹为键，将解析结果（PDF信息、文本块）用pickle持久化到磁盘，
+同一文件重复解析时直接加载，跳过PyMuPDF解析
+"""
+
+import functools
+import hashlib
+import logging
+import os
+import pickle
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+try:
+    import pymupdf as fitz  # PyMuPDF
+except ImportError:  # PyMuPDF 1.24.3 之前只有 fitz 模块名（新版本导入 fitz 会在stdout输出弃用警告）
+    import fitz
+
+from .config import get_cache_dir
+from .fingerprint import pdf_fingerprint
+
+
+logger = logging.getLogger(__name__)
+
+# 缓存格式版本，解析结果结构变化时递增使旧缓存失效
+CACHE_VERSION = 2
+
+
+class ParseCache:
+    """PDF解析结果的磁盘缓存 - 每个键对应缓存目录下的一个pickle文件"""
+
+    def __init__(self, config: Dict[str, Any]):
+        """
+        初始化解析缓存
+
+        Args:
+            config: 配置字典
+        """
+        self.config = config
+        self.perf_config = config.get("performance", {})
+        self.enabled = self.perf_config.get("enable_cache", True)
+        self.cache_dir = get_cache_dir(config) / "parse"
+
+    def make_key(self, pdf_path: str, *parts: Any) -> str:
+        """
+        生成缓存键：文件内容指纹 + PyMuPDF版本 + 缓存版本 + 调用参数
+
+        Args:
+            pdf_path: PDF文件路径
+            parts: 影响解析结果的其他参数
+
+        Returns:
+            十六进制缓存键
+        """
+        digest = hashlib.sha256()
+        for part in (pdf_fingerprint(pdf_path), fitz.VersionBind, CACHE_VERSION, *parts):
+            digest.update(repr(part).encode("utf-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        读取缓存
+
+        Args:
+            key: 缓存键
+
+        Returns:
+            缓存值，未命中返回None
+        """
+        cache_file = self.cache_dir / f"{key}.pkl"
+        if not cache_file.exists():
+            return None
+
+        try:
+            with open(cache_file, "rb") as f:
+                value = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError) as e:
+            logger.warning(f"读取解析缓存失败: {cache_file}: {e}")
+            return None
+
+        logger.debug(f"命中解析缓存: {key}")
+        return value
+
+    def set(self, key: str, value: Any):
+        """
+        写入缓存（先写临时文件再替换，避免并发读到半截文件）
+
+        Args:
+            key: 缓存键
+            value: 可pickle的缓存值
+        """
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        cache_file = self.cache_dir / f"{key}.pkl"
+        tmp_file = cache_file.with_suffix(f".{os.getpid()}.tmp")
+
+        try:
+            with open(tmp_file, "wb") as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_file, cache_file)
+            logger.debug(f"写入解析缓存: {key}")
+        except (OSError, pickle.PicklingError) as e:
+            logger.warning(f"写入解析缓存失败: {cache_file}: {e}")
+            tmp_file.unlink(missing_ok=True)
+
+
+def pdf_cached(method: Optional[Callable] = None, *, config_key: str = "pdf") -> Callable:
+    """
+    工具方法装饰器：按PDF内容缓存解析结果
+
+    被装饰的方法签名须为 method(self, pdf_path, *args, **kwargs)，
+    且所属对象有 config 属性；config[config_key] 配置与调用参数一并计入缓存键。
+    可直接使用 @pdf_cached，或通过 @pdf_cached(config_key="parser") 指定配置段。
+    """
+    if method is None:
+        return functools.partial(pdf_cached, config_key=config_key)
+
+    @functools.wraps(method)
+    def wrapper(self, pdf_path: str, *args, **kwargs):
+        cache = getattr(self, "_parse_cache", None)
+        if cache is None:
+            cache = self._parse_cache = ParseCache(self.config)
+
+        if not cache.enabled or not Path(pdf_path).is_file():
+            return method(self, pdf_path, *args, **kwargs)
+
+        key = cache.make_key(
+            pdf_path,
+            method.__qualname__,
+            args,
+            sorted(kwargs.items()),
+            sorted(self.config.get(config_key, {}).items()),
+        )
+        result = cache.get(key)
+        if result is None:
+            result = method(self, pdf_path, *args, **kwargs)
+            cache.set(key, result)
+        return result
+
+    return wrapper
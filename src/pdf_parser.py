@@ -3,56 +3,165 @@ PDF解析器模块
 负责解析PDF文件，提取文本内容、字体信息和布局数据
 """
 
-import fitz  # PyMuPDF
+try:
+    import pymupdf as fitz  # PyMuPDF
+except ImportError:  # PyMuPDF 1.24.3 之前只有 fitz 模块名（新版本导入 fitz 会在stdout输出弃用警告）
+    import fitz
 import pdfplumber
-from typing import List, Dict, Any, Optional
 import logging
+import math
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import islice
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Tuple
+
+import numpy as np
+
+from .parse_cache import pdf_cached
+from .tools.text_extractor import STORE_SHRINK_INTERVAL, TEXT_DICT_FLAGS, TextBlock, TextBlockArray
 
 
 logger = logging.getLogger(__name__)
 
+# 页数达到该值才分发到多进程解析（进程启动和结果传输的开销在小文档上得不偿失）
+PARALLEL_MIN_PAGES = 16
+
+# PDFParser 支持的解析模式
+PARSE_MODES = ("full", "structure_only", "text_only")
+
+# GIL探测使用的页数（按奇偶页拆分到两个线程）
+GIL_PROBE_PAGES = 4
+
+# 双线程解析耗时低于顺序解析的该比例时才认为多线程有效
+GIL_PROBE_SPEEDUP = 0.8
+
+# span元组: (text, page, bbox, font_name, font_size, font_flags, font_color)
+SpanTuple = Tuple[str, int, tuple, str, float, int, Any]
+
+
+def _extract_spans(doc: fitz.Document, start: int, end: int) -> List[SpanTuple]:
+    """提取 [start, end) 页中的非空span（页码从0开始），返回可pickle的轻量元组"""
+    return list(_iter_spans(doc, start, end))
+
+
+def _iter_spans(doc: fitz.Document, start: int, end: int) -> Iterator[SpanTuple]:
+    """逐页产出 [start, end) 页中的非空span（页码从0开始），内存占用只与单页内容有关"""
+    # 文档中的字体和颜色种类很少：字体名驻留、颜色值去重，重复值共用同一对象
+    intern = sys.intern
+    colors: Dict[Any, Any] = {}
+    for page_num in range(start, end):
+        page = doc[page_num]
+
+        # 提取文本块及其字体信息
+        blocks = page.get_text("dict", flags=TEXT_DICT_FLAGS)["blocks"]
+
+        for block in blocks:
+            for line in block.get("lines", []):
+                for span in line.get("spans", []):
+                    text = span["text"].strip()
+                    if not text:
+                        continue
+
+                    color = span.get("color", (0, 0, 0))
+                    yield (
+                        text,
+                        page_num + 1,
+                        span["bbox"],
+                        intern(span.get("font", "")),
+                        span.get("size", 0),
+                        span.get("flags", 0),
+                        colors.setdefault(color, color),
+                    )
+
+        if (page_num + 1) % STORE_SHRINK_INTERVAL == 0:
+            fitz.TOOLS.store_shrink(100)
+
+
+def chunked(iterable: Iterable[Any], size: int = 5000) -> Iterator[List[Any]]:
+    """
+    将迭代器按固定大小分批（配合 PDFParser.parse_iter 使用，最后一批可能不足 size 个）
+
+    Args:
+        iterable: 任意可迭代对象
+        size: 每批的元素个数
+
+    Returns:
+        依次产出各批元素列表的迭代器
+    """
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+# GIL探测结果（每个进程只探测一次）
+_releases_gil: Optional[bool] = None
 
-class TextBlock:
-    """文本块数据结构"""
-
-    def __init__(
-        self,
-        text: str,
-        page: int,
-        bbox: tuple,
-        font_name: str = "",
-        font_size: float = 0,
-        font_flags: int = 0,
-        font_color: tuple = (0, 0, 0),
-    ):
-        self.text = text.strip()
-        self.page = page
-        self.bbox = bbox  # (x0, y0, x1, y1)
-        self.font_name = font_name
-        self.font_size = font_size
-        self.font_flags = font_flags
-        self.font_color = font_color
-
-    @property
-    def is_bold(self) -> bool:
-        """判断是否为粗体"""
-        return bool(self.font_flags & 2**4)
-
-    @property
-    def is_italic(self) -> bool:
-        """判断是否为斜体"""
-        return bool(self.font_flags & 2**1)
-
-    @property
-    def x0(self) -> float:
-        return self.bbox[0]
-
-    @property
-    def y0(self) -> float:
-        return self.bbox[1]
-
-    def __repr__(self):
-        return f"TextBlock(text='{self.text[:30]}...', page={self.page}, font_size={self.font_size})"
+
+def _get_text_releases_gil(pdf_path: str) -> bool:
+    """
+    探测多线程解析能否加速当前PyMuPDF构建（用文档的前几页探测，每个进程只探测一次）
+
+    同一组页面先在一个线程中顺序解析，再拆分到两个线程（各自打开文档）并行解析；
+    get_text 期间释放GIL时并行的耗时明显缩短，持有GIL时两者相当。
+    """
+    global _releases_gil
+    if _releases_gil is None:
+        _releases_gil = _probe_gil(pdf_path)
+    return _releases_gil
+
+
+def _probe_gil(pdf_path: str) -> bool:
+    """执行一次GIL探测：并行耗时低于顺序耗时的 GIL_PROBE_SPEEDUP 倍才判定为可并行"""
+    if (os.cpu_count() or 1) < 2:
+        return False
+
+    docs = [fitz.open(pdf_path) for _ in range(3)]
+    try:
+        pages = list(range(min(docs[0].page_count, GIL_PROBE_PAGES)))
+        if len(pages) < 2:
+            return False
+
+        def extract(doc: fitz.Document, page_nums: List[int]):
+            for page_num in page_nums:
+                doc.load_page(page_num).get_text("dict", flags=TEXT_DICT_FLAGS)
+
+        start = time.perf_counter()
+        extract(docs[0], pages)
+        sequential = time.perf_counter() - start
+
+        barrier = threading.Barrier(2)
+
+        def run(doc: fitz.Document, page_nums: List[int]):
+            barrier.wait()
+            extract(doc, page_nums)
+
+        threads = [
+            threading.Thread(target=run, args=(docs[1], pages[0::2])),
+            threading.Thread(target=run, args=(docs[2], pages[1::2])),
+        ]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        parallel = time.perf_counter() - start
+
+        logger.debug(f"GIL探测: 顺序 {sequential:.4f}s, 双线程 {parallel:.4f}s")
+        return parallel < sequential * GIL_PROBE_SPEEDUP
+    finally:
+        for doc in docs:
+            doc.close()
+
+
+def _parse_pages_worker(pdf_path: str, start: int, end: int) -> List[SpanTuple]:
+    """子进程入口：单独打开文档并提取 [start, end) 页的span"""
+    with fitz.open(pdf_path) as doc:
+        return _extract_spans(doc, start, end)
 
 
 class PDFParser:
@@ -69,10 +178,42 @@ class PDFParser:
         self.engine = config.get("parser", {}).get("engine", "pymupdf")
         self.extract_fonts = config.get("parser", {}).get("extract_fonts", True)
         self.extract_layout = config.get("parser", {}).get("extract_layout", True)
-
+        # 解析模式: full（全部）、structure_only（只取书签/页数/元数据）、text_only（只取文本块）
+        self.parse_mode = config.get("parser", {}).get("parse_mode", "full")
+        if self.parse_mode not in PARSE_MODES:
+            raise ValueError(f"不支持的解析模式: {self.parse_mode}")
+        # PyMuPDF解析的进程/线程数（get_text 执行期间持有GIL时多线程无法并行）
+        self.workers = config.get("parser", {}).get("workers") or min(os.cpu_count() or 1, 8)
+        # pymupdf_threaded 引擎：每个任务处理的页数、同时未取回的任务结果上限
+        self.chunk_pages = config.get("parser", {}).get("chunk_pages", 8)
+        self.max_pending = config.get("parser", {}).get("max_pending", 32)
+
+        # 在 with 语句内使用时，已打开的文档在多次调用间复用，退出时统一关闭
+        self._docs: Optional[Dict[str, fitz.Document]] = None
+
+    def __enter__(self) -> "PDFParser":
+        self._docs = {}
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        for doc in self._docs.values():
+            doc.close()
+        self._docs = None
+
+    def _open(self, pdf_path: str) -> fitz.Document:
+        """打开文档；在 with 语句内时返回复用的文档"""
+        if self._docs is None:
+            return fitz.open(pdf_path)
+
+        doc = self._docs.get(pdf_path)
+        if doc is None:
+            doc = self._docs[pdf_path] = fitz.open(pdf_path)
+        return doc
+
+    @pdf_cached(config_key="parser")
     def parse(self, pdf_path: str) -> Dict[str, Any]:
         """
-        解析PDF文件
+        解析PDF文件（同一文件内容与解析配置的结果缓存在磁盘上）
 
         Args:
             pdf_path: PDF文件路径
@@ -82,92 +223,230 @@ class PDFParser:
         """
         logger.info(f"开始解析PDF: {pdf_path}, 使用引擎: {self.engine}")
 
+        if self.parse_mode == "structure_only":
+            return self._parse_structure(pdf_path)
+
         if self.engine == "pymupdf":
             return self._parse_with_pymupdf(pdf_path)
+        elif self.engine == "pymupdf_threaded":
+            return self._parse_with_pymupdf(pdf_path, threaded=True)
         elif self.engine == "pdfplumber":
             return self._parse_with_pdfplumber(pdf_path)
         else:
             raise ValueError(f"不支持的解析引擎: {self.engine}")
 
-    def _parse_with_pymupdf(self, pdf_path: str) -> Dict[str, Any]:
-        """使用PyMuPDF解析"""
-        doc = fitz.open(pdf_path)
-        text_blocks = []
-        bookmarks = self._extract_bookmarks(doc)
+    def parse_iter(self, pdf_path: str) -> Iterator[TextBlock]:
+        """
+        流式解析PDF文件：逐页产出文本块，不在内存中保留整份文档的结果
+
+        适合超大文件或只需顺序处理文本块的场景；不读取书签与元数据，也不使用解析缓存
+        和多进程/多线程解析。需要分批处理时可配合 chunked(parser.parse_iter(path), 5000)。
+
+        Args:
+            pdf_path: PDF文件路径
+
+        Returns:
+            按页序产出 TextBlock 的迭代器
+        """
+        if self.parse_mode == "structure_only":
+            return
+
+        if self.engine == "pdfplumber":
+            with pdfplumber.open(pdf_path) as pdf:
+                yield from self._iter_pdfplumber_blocks(pdf)
+            return
+        if self.engine not in ("pymupdf", "pymupdf_threaded"):
+            raise ValueError(f"不支持的解析引擎: {self.engine}")
+
+        doc = self._open(pdf_path)
+        try:
+            for span in _iter_spans(doc, 0, doc.page_count):
+                yield TextBlock(*span)
+        finally:
+            if self._docs is None:
+                doc.close()
+
+    def _parse_with_pymupdf(self, pdf_path: str, threaded: bool = False) -> Dict[str, Any]:
+        """
+        使用PyMuPDF解析
+
+        Args:
+            pdf_path: PDF文件路径
+            threaded: 优先使用多线程解析（探测到多线程无法加速时退回多进程）
+        """
+        doc = self._open(pdf_path)
+        bookmarks = self._extract_bookmarks(doc) if self.parse_mode == "full" else []
+        page_count = doc.page_count
+
+        workers = min(self.workers, page_count)
+        if workers > 1 and page_count >= PARALLEL_MIN_PAGES:
+            if threaded and _get_text_releases_gil(pdf_path):
+                spans = self._parse_pages_threaded(pdf_path, page_count, workers)
+            else:
+                if threaded:
+                    logger.info("多线程解析无加速（get_text 期间持有GIL），改用多进程解析")
+                spans = self._parse_pages_parallel(pdf_path, page_count, workers)
+        else:
+            spans = _extract_spans(doc, 0, page_count)
+
+        text_blocks = [TextBlock(*span) for span in spans]
+        block_array = self._to_block_array(spans)
+        metadata = doc.metadata
 
-        for page_num in range(len(doc)):
-            page = doc[page_num]
-
-            # 提取文本块及其字体信息
-            blocks = page.get_text("dict")["blocks"]
-
-            for block in blocks:
-                if block["type"] == 0:  # 文本块
-                    for line in block.get("lines", []):
-                        for span in line.get("spans", []):
-                            text = span["text"].strip()
-                            if not text:
-                                continue
-
-                            text_block = TextBlock(
-                                text=text,
-                                page=page_num + 1,
-                                bbox=span["bbox"],
-                                font_name=span.get("font", ""),
-                                font_size=span.get("size", 0),
-                                font_flags=span.get("flags", 0),
-                                font_color=span.get("color", (0, 0, 0)),
-                            )
-                            text_blocks.append(text_block)
-
-        doc.close()
+        if self._docs is None:
+            doc.close()
 
         logger.info(f"解析完成，共提取 {len(text_blocks)} 个文本块")
 
         return {
             "text_blocks": text_blocks,
+            "block_array": block_array,
             "bookmarks": bookmarks,
-            "total_pages": len(doc),
+            "total_pages": page_count,
             "metadata": {
-                "title": doc.metadata.get("title", ""),
-                "author": doc.metadata.get("author", ""),
+                "title": metadata.get("title", ""),
+                "author": metadata.get("author", ""),
             },
         }
 
-    def _parse_with_pdfplumber(self, pdf_path: str) -> Dict[str, Any]:
-        """使用pdfplumber解析"""
-        text_blocks = []
+    def _parse_structure(self, pdf_path: str) -> Dict[str, Any]:
+        """只读取书签、页数和元数据，不提取文本块（与引擎无关）"""
+        doc = self._open(pdf_path)
+        bookmarks = self._extract_bookmarks(doc)
+        page_count = doc.page_count
+        metadata = doc.metadata
 
-        with pdfplumber.open(pdf_path) as pdf:
-            for page_num, page in enumerate(pdf.pages):
-                # 提取文本和字符信息
-                chars = page.chars
+        if self._docs is None:
+            doc.close()
 
-                for char in chars:
-                    text = char["text"].strip()
-                    if not text:
-                        continue
+        return {
+            "text_blocks": [],
+            "block_array": self._to_block_array([]),
+            "bookmarks": bookmarks,
+            "total_pages": page_count,
+            "metadata": {
+                "title": metadata.get("title", ""),
+                "author": metadata.get("author", ""),
+            },
+        }
 
-                    text_block = TextBlock(
-                        text=text,
-                        page=page_num + 1,
-                        bbox=(char["x0"], char["top"], char["x1"], char["bottom"]),
-                        font_name=char.get("fontname", ""),
-                        font_size=char.get("size", 0),
-                    )
-                    text_blocks.append(text_block)
+    def _parse_pages_parallel(self, pdf_path: str, page_count: int, workers: int) -> List[SpanTuple]:
+        """
+        按连续页段分发到多个进程解析，结果按页序拼接
+
+        Args:
+            pdf_path: PDF文件路径
+            page_count: 总页数
+            workers: 进程数
+
+        Returns:
+            全部页的span元组
+        """
+        chunk = math.ceil(page_count / workers)
+        starts = list(range(0, page_count, chunk))
+        ends = [min(start + chunk, page_count) for start in starts]
+
+        # macOS上fork不安全（系统框架），使用spawn
+        mp_context = multiprocessing.get_context("spawn") if sys.platform == "darwin" else None
+        with ProcessPoolExecutor(max_workers=len(starts), mp_context=mp_context) as executor:
+            results = executor.map(_parse_pages_worker, [pdf_path] * len(starts), starts, ends)
+            return [span for spans in results for span in spans]
+
+    def _parse_pages_threaded(self, pdf_path: str, page_count: int, workers: int) -> List[SpanTuple]:
+        """
+        按小页段分发到线程池解析（每个线程单独打开文档，不共享Document对象）
 
+        按页序取回结果，未取回的任务结果不超过 max_pending 个，限制内存占用。
+
+        Args:
+            pdf_path: PDF文件路径
+            page_count: 总页数
+            workers: 线程数
+
+        Returns:
+            全部页的span元组
+        """
+        local = threading.local()
+        opened = []
+        opened_lock = threading.Lock()
+
+        def parse_range(start: int, end: int) -> List[SpanTuple]:
+            doc = getattr(local, "doc", None)
+            if doc is None:
+                doc = local.doc = fitz.open(pdf_path)
+                with opened_lock:
+                    opened.append(doc)
+            return _extract_spans(doc, start, end)
+
+        spans = []
+        pending = deque()
+        try:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                for start in range(0, page_count, self.chunk_pages):
+                    if len(pending) >= self.max_pending:
+                        spans.extend(pending.popleft().result())
+                    end = min(start + self.chunk_pages, page_count)
+                    pending.append(executor.submit(parse_range, start, end))
+                while pending:
+                    spans.extend(pending.popleft().result())
+        finally:
+            for doc in opened:
+                doc.close()
+
+        return spans
+
+    @staticmethod
+    def _to_block_array(spans: List[SpanTuple]) -> TextBlockArray:
+        """将span元组按列转置为列式存储的文本块（供结构分析向量化统计）"""
+        if not spans:
+            return TextBlockArray(
+                [], np.empty(0, np.int32), np.empty((0, 4)), np.empty(0), np.empty(0, np.int32)
+            )
+
+        texts, pages, bboxes, _, sizes, flags, _ = zip(*spans)
+        return TextBlockArray(
+            list(texts),
+            np.array(pages, dtype=np.int32),
+            np.array(bboxes, dtype=np.float64),
+            np.array(sizes, dtype=np.float64),
+            np.array(flags, dtype=np.int32),
+        )
+
+    def _parse_with_pdfplumber(self, pdf_path: str) -> Dict[str, Any]:
+        """使用pdfplumber解析"""
+        with pdfplumber.open(pdf_path) as pdf:
+            text_blocks = list(self._iter_pdfplumber_blocks(pdf))
             total_pages = len(pdf.pages)
 
         logger.info(f"解析完成，共提取 {len(text_blocks)} 个文本块")
 
         return {
             "text_blocks": text_blocks,
+            "block_array": TextBlockArray.from_blocks(text_blocks),
             "bookmarks": [],
             "total_pages": total_pages,
             "metadata": {},
         }
 
+    @staticmethod
+    def _iter_pdfplumber_blocks(pdf: "pdfplumber.PDF") -> Iterator[TextBlock]:
+        """使用pdfplumber逐页产出已打开文档的文本块"""
+        for page_num, page in enumerate(pdf.pages):
+            # 按词提取（同一词内字体或字号变化时拆分），每个词一个文本块
+            words = page.extract_words(extra_attrs=["fontname", "size"])
+
+            for word in words:
+                yield TextBlock(
+                    text=word["text"],
+                    page=page_num + 1,
+                    bbox=(word["x0"], word["top"], word["x1"], word["bottom"]),
+                    font_name=word["fontname"],
+                    font_size=word["size"],
+                )
+
+            # 释放该页缓存的字符等对象，内存不随页数累积
+            page.close()
+
     def _extract_bookmarks(self, doc: fitz.Document) -> List[Dict[str, Any]]:
         """提取PDF书签"""
         bookmarks = []
@@ -2,11 +2,16 @@
 PDF读取工具
 """
 
-import fitz  # PyMuPDF
+try:
+    import pymupdf as fitz  # PyMuPDF
+except ImportError:  # PyMuPDF 1.24.3 之前只有 fitz 模块名（新版本导入 fitz 会在stdout输出弃用警告）
+    import fitz
 from typing import Dict, Any, List
 import logging
 from pathlib import Path
 
+from ..parse_cache import pdf_cached
+
 
 logger = logging.getLogger(__name__)
 
@@ -38,27 +43,12 @@ class PDFReaderTool:
             raise FileNotFoundError(f"PDF文件不存在: {pdf_path}")
 
         try:
-            doc = fitz.open(pdf_path)
-
             info = {
                 "file_path": pdf_path,
                 "file_name": Path(pdf_path).name,
-                "total_pages": len(doc),
-                "metadata": {
-                    "title": doc.metadata.get("title", ""),
-                    "author": doc.metadata.get("author", ""),
-                    "subject": doc.metadata.get("subject", ""),
-                    "keywords": doc.metadata.get("keywords", ""),
-                },
-                "has_toc": len(doc.get_toc()) > 0,
+                **self._read_document_info(pdf_path),
             }
 
-            # 提取书签/目录
-            if self.pdf_config.get("extract_bookmarks", True):
-                info["bookmarks"] = self._extract_bookmarks(doc)
-
-            doc.close()
-
             logger.info(f"成功读取PDF信息: {pdf_path} ({info['total_pages']}页)")
 
             return info
@@ -67,6 +57,33 @@ class PDFReaderTool:
             logger.error(f"读取PDF失败: {e}")
             raise
 
+    @pdf_cached
+    def _read_document_info(self, pdf_path: str) -> Dict[str, Any]:
+        """读取与文件路径无关的PDF信息（按文件内容缓存）"""
+        doc = fitz.open(pdf_path)
+        metadata = doc.metadata  # 每次访问都会重新构建字典，只取一次
+
+        info = {
+            "total_pages": doc.page_count,
+            "metadata": {
+                "title": metadata.get("title", ""),
+                "author": metadata.get("author", ""),
+                "subject": metadata.get("subject", ""),
+                "keywords": metadata.get("keywords", ""),
+            },
+        }
+
+        # 提取书签/目录；不需要书签时只检查大纲是否存在，不遍历整个目录
+        if self.pdf_config.get("extract_bookmarks", True):
+            info["bookmarks"] = self._extract_bookmarks(doc)
+            info["has_toc"] = len(info["bookmarks"]) > 0
+        else:
+            info["has_toc"] = doc.outline is not None
+
+        doc.close()
+
+        return info
+
     def _extract_bookmarks(self, doc: fitz.Document) -> List[Dict[str, Any]]:
         """提取PDF书签"""
         bookmarks = []
@@ -96,7 +113,7 @@ class PDFReaderTool:
         """
         try:
             doc = fitz.open(pdf_path)
-            page_count = len(doc)
+            page_count = doc.page_count
             doc.close()
             return page_count
         except Exception as e:
@@ -2,18 +2,54 @@
 结构分析工具
 """
 
-from typing import Dict, Any, List
-from collections import Counter
+from typing import Dict, Any, List, Union
 import logging
 import re
 
+import numpy as np
+
+from .text_extractor import TextBlockArray
+
 
 logger = logging.getLogger(__name__)
 
+# 编号模式: (正则, 名称)，按优先级排列
+NUMBERING_PATTERNS = (
+    (r"^\d+\.", "数字点号"),
+    (r"^\d+\.\d+\.?", "两级编号"),
+    (r"^\d+\.\d+\.\d+\.?", "三级编号"),
+    (r"^第[一二三四五六七八九十百]+章", "章节"),
+    (r"^[A-Z]\.", "字母编号"),
+    (r"^\([一二三四五六七八九十]+\)", "括号编号"),
+)
+
+
+def _most_common(values: np.ndarray, n: int = None) -> Dict[float, int]:
+    """
+    统计取值出现次数，按次数降序排列（次数相同按首次出现顺序，与Counter.most_common一致）
+
+    Args:
+        values: 一维数组
+        n: 只保留前n项，None表示全部
+
+    Returns:
+        取值 -> 次数
+    """
+    uniques, first_index, counts = np.unique(values, return_index=True, return_counts=True)
+    order = np.lexsort((first_index, -counts))[:n]
+    return dict(zip(uniques[order].tolist(), counts[order].tolist()))
+
 
 class StructureAnalyzerTool:
     """结构分析工具 - 分析PDF的结构特征"""
 
+    # 编号模式合并为一个正则（类加载时编译一次，所有实例共用），每个文本块只匹配一次；
+    # 分支按列表顺序尝试，命中的分支与逐个模式匹配时第一个命中的模式相同
+    _numbering_names = tuple(name for _, name in NUMBERING_PATTERNS)
+    _numbering_re = re.compile(
+        "|".join(f"(?P<g{i}>{pattern})" for i, (pattern, _) in enumerate(NUMBERING_PATTERNS))
+    )
+
     def __init__(self, config: Dict[str, Any]):
         """
         初始化结构分析工具
@@ -23,112 +59,173 @@ class StructureAnalyzerTool:
         """
         self.config = config
 
-    def analyze_font_statistics(self, text_blocks: List[Any]) -> Dict[str, Any]:
+    def analyze_all(self, text_blocks: Union[List[Any], TextBlockArray]) -> Dict[str, Any]:
         """
-        分析字体统计信息
+        一次性完成字体统计、编号检测和布局分析（文本块只转换一次为列式存储）
 
         Args:
-            text_blocks: 文本块列表
+            text_blocks: 文本块列表或列式存储的文本块
 
         Returns:
-            字体统计信息
+            {"font_statistics": ..., "numbering_patterns": ..., "layout_features": ...}
         """
-        font_sizes = [block.font_size for block in text_blocks if block.font_size > 0]
-
-        if not font_sizes:
-            return {}
-
-        size_counter = Counter(font_sizes)
-        most_common_size = size_counter.most_common(1)[0][0]
-
+        blocks = self._as_array(text_blocks)
         return {
-            "body_font_size": most_common_size,
-            "font_size_distribution": dict(size_counter.most_common()),
-            "min_size": min(font_sizes),
-            "max_size": max(font_sizes),
-            "avg_size": sum(font_sizes) / len(font_sizes),
+            "font_statistics": self._font_statistics(blocks.font_sizes),
+            "numbering_patterns": self._numbering_patterns(blocks),
+            "layout_features": self._layout_features(blocks),
         }
 
-    def detect_numbering_patterns(self, text_blocks: List[Any]) -> List[Dict[str, Any]]:
+    def analyze_font_statistics(
+        self, text_blocks: Union[List[Any], TextBlockArray]
+    ) -> Dict[str, Any]:
+        """
+        分析字体统计信息
+
+        Args:
+            text_blocks: 文本块列表或列式存储的文本块
+
+        Returns:
+            字体统计信息
+        """
+        if isinstance(text_blocks, TextBlockArray):
+            font_sizes = text_blocks.font_sizes
+        else:
+            # 只需要字体大小一列，不构建完整的列式存储
+            font_sizes = np.fromiter(
+                (block.font_size for block in text_blocks), dtype=np.float64, count=len(text_blocks)
+            )
+        return self._font_statistics(font_sizes)
+
+    def detect_numbering_patterns(
+        self, text_blocks: Union[List[Any], TextBlockArray]
+    ) -> List[Dict[str, Any]]:
         """
         检测编号模式
 
         Args:
-            text_blocks: 文本块列表
+            text_blocks: 文本块列表或列式存储的文本块
 
         Returns:
             编号模式列表
         """
-        patterns = [
-            (r"^\d+\.", "数字点号"),
-            (r"^\d+\.\d+\.?", "两级编号"),
-            (r"^\d+\.\d+\.\d+\.?", "三级编号"),
-            (r"^第[一二三四五六七八九十百]+章", "章节"),
-            (r"^[A-Z]\.", "字母编号"),
-            (r"^\([一二三四五六七八九十]+\)", "括号编号"),
-        ]
+        if not len(text_blocks):
+            return []
+        if isinstance(text_blocks, TextBlockArray):
+            return self._numbering_patterns(text_blocks)
 
         detected = []
+        match = self._numbering_re.match
+        names = self._numbering_names
 
         for block in text_blocks:
-            for pattern, name in patterns:
-                if re.match(pattern, block.text):
-                    detected.append(
-                        {
-                            "text": block.text,
-                            "pattern": name,
-                            "page": block.page,
-                        }
-                    )
-                    break
+            m = match(block.text)
+            if m:
+                detected.append(
+                    {
+                        "text": block.text,
+                        "pattern": names[int(m.lastgroup[1:])],
+                        "page": block.page,
+                    }
+                )
 
         return detected
 
-    def analyze_layout_features(self, text_blocks: List[Any]) -> Dict[str, Any]:
+    def analyze_layout_features(
+        self, text_blocks: Union[List[Any], TextBlockArray]
+    ) -> Dict[str, Any]:
         """
         分析布局特征
 
         Args:
-            text_blocks: 文本块列表
+            text_blocks: 文本块列表或列式存储的文本块
 
         Returns:
             布局特征
         """
-        if not text_blocks:
+        if not len(text_blocks):
+            return {}
+        return self._layout_features(self._as_array(text_blocks))
+
+    @staticmethod
+    def _font_statistics(font_sizes: np.ndarray) -> Dict[str, Any]:
+        """字体统计（字体大小数组）"""
+        font_sizes = font_sizes[font_sizes > 0]
+
+        if not font_sizes.size:
+            return {}
+
+        distribution = _most_common(font_sizes)
+
+        return {
+            "body_font_size": next(iter(distribution)),
+            "font_size_distribution": distribution,
+            "min_size": float(font_sizes.min()),
+            "max_size": float(font_sizes.max()),
+            "avg_size": float(font_sizes.mean()),
+        }
+
+    def _numbering_patterns(self, blocks: TextBlockArray) -> List[Dict[str, Any]]:
+        """编号检测（列式存储）"""
+        detected = []
+        match = self._numbering_re.match
+        names = self._numbering_names
+
+        for text, page in zip(blocks.texts, blocks.page.tolist()):
+            m = match(text)
+            if m:
+                detected.append(
+                    {
+                        "text": text,
+                        "pattern": names[int(m.lastgroup[1:])],
+                        "page": page,
+                    }
+                )
+
+        return detected
+
+    @staticmethod
+    def _layout_features(blocks: TextBlockArray) -> Dict[str, Any]:
+        """布局分析（列式存储）"""
+        if not len(blocks):
             return {}
 
-        # 左边距统计
-        left_margins = [block.bbox[0] for block in text_blocks]
-        left_margin_counter = Counter([round(m, -1) for m in left_margins])  # 取整到10
+        # 左边距统计（取整到10）
+        left_margins = np.round(blocks.bbox[:, 0], -1)
 
-        # 行间距分析（简化版）
-        line_gaps = []
-        for i in range(1, len(text_blocks)):
-            if text_blocks[i].page == text_blocks[i - 1].page:
-                gap = text_blocks[i].bbox[1] - text_blocks[i - 1].bbox[3]
-                if gap > 0:
-                    line_gaps.append(gap)
+        # 行间距分析（简化版）：同一页相邻文本块的上下间距
+        same_page = blocks.page[1:] == blocks.page[:-1]
+        gaps = blocks.bbox[1:, 1] - blocks.bbox[:-1, 3]
+        line_gaps = gaps[same_page & (gaps > 0)]
 
         return {
-            "common_left_margins": dict(left_margin_counter.most_common(5)),
-            "avg_line_gap": sum(line_gaps) / len(line_gaps) if line_gaps else 0,
+            "common_left_margins": _most_common(left_margins, 5),
+            "avg_line_gap": float(line_gaps.mean()) if line_gaps.size else 0,
         }
 
+    @staticmethod
+    def _as_array(text_blocks: Union[List[Any], TextBlockArray]) -> TextBlockArray:
+        """统一转换为列式存储"""
+        if isinstance(text_blocks, TextBlockArray):
+            return text_blocks
+        return TextBlockArray.from_blocks(text_blocks)
+
     def get_document_summary(
-        self, pdf_info: Dict[str, Any], text_blocks: List[Any]
+        self, pdf_info: Dict[str, Any], text_blocks: Union[List[Any], TextBlockArray]
     ) -> str:
         """
         获取文档摘要（用于LLM）
 
         Args:
             pdf_info: PDF基本信息
-            text_blocks: 文本块列表
+            text_blocks: 文本块列表或列式存储的文本块
 
         Returns:
             文档摘要文本
         """
-        font_stats = self.analyze_font_statistics(text_blocks)
-        numbering = self.detect_numbering_patterns(text_blocks)
+        analysis = self.analyze_all(text_blocks)
+        font_stats = analysis["font_statistics"]
+        numbering = analysis["numbering_patterns"]
 
         summary = f"""文档信息:
 - 文件名: {pdf_info.get('file_name', '')}
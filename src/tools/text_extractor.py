@@ -2,18 +2,36 @@
 文本提取工具
 """
 
-import fitz  # PyMuPDF
-from typing import Dict, Any, List
+try:
+    import pymupdf as fitz  # PyMuPDF
+except ImportError:  # PyMuPDF 1.24.3 之前只有 fitz 模块名（新版本导入 fitz 会在stdout输出弃用警告）
+    import fitz
+from typing import Dict, Any, List, Optional, Sequence
 from dataclasses import dataclass
 import logging
+import sys
+
+import numpy as np
+
+from ..parse_cache import pdf_cached
 
 
 logger = logging.getLogger(__name__)
 
+# get_text("dict") 的提取选项：不生成图片块（只需要文本块，图片块的构建开销较大）
+TEXT_DICT_FLAGS = fitz.TEXTFLAGS_DICT & ~fitz.TEXT_PRESERVE_IMAGES
+
+# 每解析多少页清空一次MuPDF资源缓存（默认缓存不设上限，大文档的内存会持续增长）
+STORE_SHRINK_INTERVAL = 20
+
+# span字体标志位
+FLAG_ITALIC = 1 << 1
+FLAG_BOLD = 1 << 4
+
 
-@dataclass
+@dataclass(slots=True)
 class TextBlock:
-    """文本块数据结构"""
+    """文本块数据结构（使用 __slots__，大量文本块时内存占用更小）"""
 
     text: str
     page: int
@@ -21,16 +39,87 @@ class TextBlock:
     font_name: str = ""
     font_size: float = 0.0
     font_flags: int = 0
+    font_color: Any = (0, 0, 0)
 
     @property
     def is_bold(self) -> bool:
         """是否为粗体"""
-        return bool(self.font_flags & 2**4)
+        return bool(self.font_flags & FLAG_BOLD)
 
     @property
     def is_italic(self) -> bool:
         """是否为斜体"""
-        return bool(self.font_flags & 2**1)
+        return bool(self.font_flags & FLAG_ITALIC)
+
+    @property
+    def x0(self) -> float:
+        return self.bbox[0]
+
+    @property
+    def y0(self) -> float:
+        return self.bbox[1]
+
+
+class TextBlockArray:
+    """
+    文本块的列式存储（SoA）- 数值字段存为连续的NumPy数组，供统计分析做向量化计算
+
+    Attributes:
+        texts: 文本列表
+        page: 页码 int32[N]
+        bbox: 边界框 float64[N, 4]，每行 (x0, y0, x1, y1)
+        font_sizes: 字体大小 float64[N]（保持原始精度，统计结果与逐块计算一致）
+        font_flags: 字体标志 int32[N]
+    """
+
+    __slots__ = ("texts", "page", "bbox", "font_sizes", "font_flags")
+
+    def __init__(
+        self,
+        texts: List[str],
+        page: np.ndarray,
+        bbox: np.ndarray,
+        font_sizes: np.ndarray,
+        font_flags: np.ndarray,
+    ):
+        self.texts = texts
+        self.page = page
+        self.bbox = bbox
+        self.font_sizes = font_sizes
+        self.font_flags = font_flags
+
+    def __len__(self) -> int:
+        return len(self.texts)
+
+    @property
+    def bold_mask(self) -> np.ndarray:
+        """各文本块是否为粗体 bool[N]（与 TextBlock.is_bold 一致）"""
+        return (self.font_flags & FLAG_BOLD) != 0
+
+    @property
+    def italic_mask(self) -> np.ndarray:
+        """各文本块是否为斜体 bool[N]（与 TextBlock.is_italic 一致）"""
+        return (self.font_flags & FLAG_ITALIC) != 0
+
+    @classmethod
+    def from_blocks(cls, blocks: Sequence[Any]) -> "TextBlockArray":
+        """
+        由文本块对象列表构建（对象需有 text/page/bbox/font_size/font_flags 属性）
+
+        Args:
+            blocks: 文本块列表
+
+        Returns:
+            列式存储的文本块
+        """
+        count = len(blocks)
+        return cls(
+            [block.text for block in blocks],
+            np.fromiter((block.page for block in blocks), dtype=np.int32, count=count),
+            np.array([block.bbox for block in blocks], dtype=np.float64).reshape(count, 4),
+            np.fromiter((block.font_size for block in blocks), dtype=np.float64, count=count),
+            np.fromiter((block.font_flags for block in blocks), dtype=np.int32, count=count),
+        )
 
 
 class TextExtractorTool:
@@ -47,6 +136,10 @@ class TextExtractorTool:
         self.pdf_config = config.get("pdf", {})
         self.batch_size = self.pdf_config.get("batch_size", 10)
 
+        # 上下文查询用的文本列表缓存：(文本块列表, 块数, 各块文本)
+        self._texts_cache: Optional[tuple] = None
+
+    @pdf_cached
     def extract_text_blocks(
         self, pdf_path: str, start_page: int = 0, end_page: int = None
     ) -> List[TextBlock]:
@@ -65,30 +158,34 @@ class TextExtractorTool:
             doc = fitz.open(pdf_path)
             text_blocks = []
 
+            page_count = doc.page_count
             if end_page is None:
-                end_page = len(doc)
+                end_page = page_count
 
-            for page_num in range(start_page, min(end_page, len(doc))):
+            for page_num in range(start_page, min(end_page, page_count)):
                 page = doc[page_num]
-                blocks = page.get_text("dict")["blocks"]
+                blocks = page.get_text("dict", flags=TEXT_DICT_FLAGS)["blocks"]
 
                 for block in blocks:
-                    if block["type"] == 0:  # 文本块
-                        for line in block.get("lines", []):
-                            for span in line.get("spans", []):
-                                text = span["text"].strip()
-                                if not text:
-                                    continue
-
-                                text_block = TextBlock(
-                                    text=text,
-                                    page=page_num + 1,
-                                    bbox=span["bbox"],
-                                    font_name=span.get("font", ""),
-                                    font_size=span.get("size", 0),
-                                    font_flags=span.get("flags", 0),
-                                )
-                                text_blocks.append(text_block)
+                    for line in block.get("lines", []):
+                        for span in line.get("spans", []):
+                            text = span["text"].strip()
+                            if not text:
+                                continue
+
+                            text_block = TextBlock(
+                                text=text,
+                                page=page_num + 1,
+                                bbox=span["bbox"],
+                                # 字体名在全文中大量重复，驻留后共用同一字符串对象
+                                font_name=sys.intern(span.get("font", "")),
+                                font_size=span.get("size", 0),
+                                font_flags=span.get("flags", 0),
+                            )
+                            text_blocks.append(text_block)
+
+                if (page_num + 1) % STORE_SHRINK_INTERVAL == 0:
+                    fitz.TOOLS.store_shrink(100)
 
             doc.close()
 
@@ -100,23 +197,26 @@ class TextExtractorTool:
             logger.error(f"文本提取失败: {e}")
             raise
 
-    def extract_page_text(self, pdf_path: str, page_num: int) -> str:
+    def extract_page_text(
+        self, pdf_path: str, page_num: int, doc: Optional[fitz.Document] = None
+    ) -> str:
         """
         提取指定页的纯文本
 
         Args:
             pdf_path: PDF文件路径
             page_num: 页码（1-based）
+            doc: 已打开的文档（逐页提取多页时由调用方打开一次复用），为None时临时打开
 
         Returns:
             页面文本
         """
         try:
-            doc = fitz.open(pdf_path)
-            page = doc[page_num - 1]
-            text = page.get_text()
-            doc.close()
-            return text
+            if doc is not None:
+                return doc[page_num - 1].get_text()
+
+            with fitz.open(pdf_path) as doc:
+                return doc[page_num - 1].get_text()
         except Exception as e:
             logger.error(f"提取页面文本失败: {e}")
             return ""
@@ -135,11 +235,35 @@ class TextExtractorTool:
         Returns:
             上下文文本
         """
+        texts = self._block_texts(text_blocks)
         start = max(0, current_index - window)
-        end = min(len(text_blocks), current_index + window + 1)
+        return "\n".join(texts[start:current_index + window + 1])
 
-        context_blocks = text_blocks[start:end]
-        return "\n".join([block.text for block in context_blocks])
+    def get_contexts(
+        self, text_blocks: List[TextBlock], indices: List[int], window: int = 2
+    ) -> Dict[int, str]:
+        """
+        批量获取多个文本块的上下文
+
+        Args:
+            text_blocks: 文本块列表
+            indices: 需要上下文的文本块索引
+            window: 上下文窗口大小
+
+        Returns:
+            索引 -> 上下文文本（与 get_context 结果相同）
+        """
+        texts = self._block_texts(text_blocks)
+        return {i: "\n".join(texts[max(0, i - window):i + window + 1]) for i in indices}
+
+    def _block_texts(self, text_blocks: List[TextBlock]) -> List[str]:
+        """返回各文本块的文本；同一文本块列表只构建一次，逐候选查询上下文时只需切片"""
+        cache = self._texts_cache
+        if cache is None or cache[0] is not text_blocks or cache[1] != len(text_blocks):
+            cache = self._texts_cache = (
+                text_blocks, len(text_blocks), [block.text for block in text_blocks]
+            )
+        return cache[2]
 
     def __str__(self):
         return "文本提取工具：从PDF中提取文本块及其字体、位置等元数据"
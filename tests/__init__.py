@@ -5,12 +5,21 @@
 import pytest
 import sys
 from pathlib import Path
+from types import SimpleNamespace
+
+import yaml
+from anthropic import APIConnectionError, APIStatusError
 
 # 添加src到路径
 sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
 
 from src.agent import PDFHeadingExtractorAgent
 from src.heading_detector import HeadingDetector
+from src.async_utils import run_sync
+from src.llm import llm_client as llm_client_module
+from src.llm.llm_client import LLMClient
+from src.llm.response_parser import JSONArrayStream
+from src.llm.response_cache import ResponseCache, SEMANTIC_MAX_CHARS
 
 
 class TestPDFHeadingExtractorAgent:
@@ -36,6 +45,63 @@ class TestPDFHeadingExtractorAgent:
         assert "output" in agent.config
 
 
+
+class TestResultCacheKey:
+    """测试结果缓存键随影响结果的设置变化"""
+
+    PDF_INFO = {"total_pages": 1}
+    TEXT_BLOCKS = [SimpleNamespace(text="第一章 总则"), SimpleNamespace(text="1.1 目的")]
+
+    @pytest.fixture
+    def make_agent(self, tmp_path, monkeypatch):
+        """按仓库配置创建Agent，缓存、日志和自定义Prompt目录都放在临时目录中"""
+        monkeypatch.chdir(tmp_path)
+        base_config = yaml.safe_load(
+            (Path(__file__).parent.parent / "config.yaml").read_text(encoding="utf-8")
+        )
+        base_config["llm"]["api_key"] = "cache-key-test"
+        base_config["prompts"]["custom_prompts_dir"] = str(tmp_path / "prompts")
+        base_config["performance"]["cache_dir"] = str(tmp_path / "cache")
+        base_config["logging"]["file"] = str(tmp_path / "agent.log")
+
+        def make(batch_size=None):
+            config = dict(base_config, pdf=dict(base_config["pdf"]))
+            if batch_size is not None:
+                config["pdf"]["batch_size"] = batch_size
+            config_path = tmp_path / f"config_{batch_size}.yaml"
+            config_path.write_text(yaml.safe_dump(config, allow_unicode=True), encoding="utf-8")
+            return PDFHeadingExtractorAgent(config_path=str(config_path))
+
+        return make
+
+    def _key(self, agent):
+        return agent._get_cache_key(self.PDF_INFO, self.TEXT_BLOCKS)
+
+    def test_identical_rerun_hits(self, make_agent):
+        """相同配置重新运行时缓存键相同，能读到上次的结果"""
+        first = make_agent()
+        key = self._key(first)
+        first.result_cache.set(key, [{"text": "第一章 总则", "level": 1}])
+
+        second = make_agent()
+        assert self._key(second) == key
+        assert second.result_cache.get(key) == [{"text": "第一章 总则", "level": 1}]
+
+    def test_settings_change_misses(self, make_agent, tmp_path):
+        """反思开关、Prompt文件或流程设置变化时缓存键不同"""
+        agent = make_agent()
+        key = self._key(agent)
+
+        agent.enable_reflection = not agent.enable_reflection
+        assert self._key(agent) != key
+
+        assert self._key(make_agent(batch_size=5)) != key
+
+        (tmp_path / "prompts").mkdir()
+        (tmp_path / "prompts" / "heading_identification.txt").write_text("自定义提示", encoding="utf-8")
+        assert self._key(make_agent()) != key
+
+
 class TestHeadingDetector:
     """测试标题检测器"""
 
@@ -87,5 +153,207 @@ class TestHeadingDetector:
             assert level == expected_level, f"Failed for: {numbering}"
 
 
+
+class TestLLMClientRateLimit:
+    """测试进程级限流"""
+
+    def test_rpm_shared_across_event_loops_and_clients(self):
+        """两次 run_sync（各自新建事件循环）和两个客户端共用同一份rpm额度"""
+        config = {"llm": {"api_key": "rate-limit-test", "rpm": 2, "max_tokens": 10}}
+        first, second = LLMClient(config), LLMClient(config)
+        governor = first._governor
+        assert governor is second._governor
+
+        # 用假时钟代替真实等待：sleep 只推进时钟并记录等待时长
+        now = [0.0]
+        waits = []
+
+        async def fake_sleep(seconds):
+            waits.append(seconds)
+            now[0] += seconds
+
+        governor._clock = lambda: now[0]
+        governor._sleep = fake_sleep
+        governor._updated = 0.0
+
+        async def call(client, count):
+            for _ in range(count):
+                async with client._throttle("", [{"content": "x"}]):
+                    pass
+
+        run_sync(call(first, 2))
+        assert waits == []  # 额度内的请求不等待
+
+        run_sync(call(second, 2))
+        # 超出rpm的两次请求各等待一个补充周期（60 / rpm 秒）
+        assert sum(waits) >= 60 - 1e-6
+        assert now[0] >= 60 - 1e-6
+
+
+
+class TestResponseCacheSemantic:
+    """测试语义缓存的适用范围"""
+
+    def test_only_short_single_item_messages(self):
+        """长消息和编号列表消息不走语义缓存"""
+        cache = ResponseCache({})
+        cache.semantic_index = object()  # 只检查适用范围，不加载向量模型
+
+        assert cache._use_semantic("scope", "第一章 总则")
+        assert not cache._use_semantic(None, "第一章 总则")
+        assert not cache._use_semantic("scope", "x" * (SEMANTIC_MAX_CHARS + 1))
+        assert not cache._use_semantic("scope", "1. 第一章 总则\n2. 第二章 释义")
+
+
+
+class TestJSONArrayStream:
+    """测试流式响应中数组元素的增量解析"""
+
+    @staticmethod
+    def _feed_all(stream, chunks):
+        """逐段喂入，返回每次喂入后新解析出的元素"""
+        return [stream.feed(chunk) for chunk in chunks]
+
+    def test_key_split_across_chunks(self):
+        """键名被拆在两段中也能找到数组开头"""
+        stream = JSONArrayStream("headings")
+        results = self._feed_all(stream, ['{"head', 'ings": [{"t": 1}, ', '{"t": 2}]}'])
+
+        assert results == [[], [{"t": 1}], [{"t": 2}]]
+        assert stream.closed
+
+    def test_strings_with_delimiters(self):
+        """字符串中的 ]、逗号和转义引号不会被当作数组结构"""
+        response = '{"headings": ["a]b", "c,d", "e\\"]f"]}'
+        stream = JSONArrayStream("headings")
+        items = [item for chunk in response for item in stream.feed(chunk)]
+
+        assert items == ["a]b", "c,d", 'e"]f']
+        assert stream.closed
+
+    def test_number_cut_at_chunk_boundary(self):
+        """段末尾的数字等到后续文本到达后才输出"""
+        stream = JSONArrayStream("headings")
+        results = self._feed_all(stream, ['{"headings": [1, 2', '3]}'])
+
+        assert results == [[1], [23]]
+        assert stream.closed
+
+    def test_array_never_closed(self):
+        """响应中断时不输出不完整的元素，closed 保持为False"""
+        stream = JSONArrayStream("headings")
+        items = []
+        for chunk in ['{"headings": [{"t": 1}, ', '{"t": 2', '}, {"t"']:
+            items.extend(stream.feed(chunk))
+
+        assert items == [{"t": 1}, {"t": 2}]
+        assert stream.found
+        assert not stream.closed
+
+
+
+def _status_error(status_code, headers=None):
+    """构造SDK的HTTP状态错误（响应对象只需提供状态码和响应头）"""
+    response = SimpleNamespace(request=None, status_code=status_code, headers=headers or {})
+    return APIStatusError(f"HTTP {status_code}", response=response, body=None)
+
+
+class TestLLMClientRetry:
+    """测试LLM调用的重试策略"""
+
+    def _make_client(self, monkeypatch, **llm_config):
+        """创建不写缓存、不真正等待的客户端，返回客户端和记录的等待时长"""
+        llm_config = {"api_key": "retry-test", "max_retries": 2, **llm_config}
+        client = LLMClient({"llm": llm_config, "performance": {"enable_cache": False}})
+        delays = []
+
+        async def fake_async_sleep(seconds):
+            delays.append(seconds)
+
+        monkeypatch.setattr(llm_client_module.time, "sleep", delays.append)
+        monkeypatch.setattr(llm_client_module.asyncio, "sleep", fake_async_sleep)
+        return client, delays
+
+    def test_retry_after_only_within_max_backoff(self, monkeypatch):
+        """Retry-After 不超过 max_backoff 时照办，否则按指数退避"""
+        client, _ = self._make_client(monkeypatch, max_backoff=10.0, initial_backoff=1.0)
+
+        assert client._retry_delay(0, _status_error(429, {"retry-after": "5"})) == 5.0
+        assert client._retry_delay(0, _status_error(429, {"retry-after-ms": "1500"})) == 1.5
+        for _ in range(20):
+            delay = client._retry_delay(0, _status_error(429, {"retry-after": "30"}))
+            assert 0 <= delay <= 1.0
+
+    def test_non_retryable_error_raised_immediately(self, monkeypatch):
+        """400等不可重试的错误不重试"""
+        client, delays = self._make_client(monkeypatch)
+        calls = []
+
+        def create(**params):
+            calls.append(params)
+            raise _status_error(400)
+
+        client._request_client = SimpleNamespace(messages=SimpleNamespace(create=create))
+        with pytest.raises(APIStatusError):
+            client._create_with_retry(model="m")
+
+        assert len(calls) == 1
+        assert delays == []
+
+    def test_attempts_are_max_retries_plus_one(self, monkeypatch):
+        """同步和异步调用都恰好尝试 max_retries + 1 次"""
+        client, delays = self._make_client(monkeypatch, max_retries=3)
+        calls = []
+
+        def create(**params):
+            calls.append(params)
+            raise _status_error(529)
+
+        async def acreate(**params):
+            create(**params)
+
+        client._request_client = SimpleNamespace(messages=SimpleNamespace(create=create))
+        with pytest.raises(APIStatusError):
+            client._create_with_retry(model="m")
+        assert len(calls) == 4
+        assert len(delays) == 3
+
+        calls.clear()
+        async_client = SimpleNamespace(messages=SimpleNamespace(create=acreate))
+        with pytest.raises(APIStatusError):
+            run_sync(client._acreate_with_retry(async_client, "sys", [{"role": "user", "content": "x"}]))
+        assert len(calls) == 4
+
+    def test_astream_does_not_retry_after_yielding(self, monkeypatch):
+        """已产出文本后连接中断，不再重试（否则调用方会收到重复的片段）"""
+        client, delays = self._make_client(monkeypatch)
+        opened = []
+
+        class FakeStream:
+            async def __aenter__(self):
+                opened.append(self)
+                return self
+
+            async def __aexit__(self, *exc_info):
+                return False
+
+            @property
+            async def text_stream(self):
+                yield "部分"
+                raise APIConnectionError(request=None)
+
+        async_client = SimpleNamespace(messages=SimpleNamespace(stream=lambda **params: FakeStream()))
+        monkeypatch.setattr(client, "_get_async_client", lambda: async_client)
+
+        async def consume():
+            return [text async for text in client.astream("sys", "x")]
+
+        with pytest.raises(Exception, match="LLM调用失败"):
+            run_sync(consume())
+
+        assert len(opened) == 1
+        assert delays == []
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
@@ -1,24 +1,34 @@
 import json
 import sys
 
-def print_tree(headings, heading_map, indent=0):
-    """递归打印标题树"""
-    for h in headings:
-        prefix = "  " * indent
+try:
+    import orjson
+except ImportError:  # 可选依赖，未安装时使用标准库json
+    orjson = None
+
+def print_tree(headings, children_of, indent=0):
+    """按深度优先顺序打印标题树（显式栈迭代，层级很深时也不会触及递归上限）"""
+    stack = [(h, indent) for h in reversed(headings)]
+    while stack:
+        h, depth = stack.pop()
+        prefix = "  " * depth
         level_marker = "■" * h.get("level", 1)
         print(f"{prefix}{level_marker} {h['text'][:80]} (页{h['page']})")
 
-        # 打印子标题
-        children_ids = h.get("children", [])
-        if children_ids:
-            children = [heading_map[cid] for cid in children_ids if cid in heading_map]
-            print_tree(children, heading_map, indent + 1)
+        # 子标题逆序入栈，出栈时保持原顺序
+        children = children_of.get(h["id"])
+        if children:
+            stack.extend((child, depth + 1) for child in reversed(children))
 
 if __name__ == "__main__":
     file_path = sys.argv[1] if len(sys.argv) > 1 else "output/海天味业：海天味业2024年年度报告_headings.json"
 
-    with open(file_path, "r", encoding="utf-8") as f:
-        data = json.load(f)
+    if orjson is not None:
+        with open(file_path, "rb") as f:
+            data = orjson.loads(f.read())
+    else:
+        with open(file_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
 
     print(f"\n{'='*80}")
     print(f"文档: {data['document']}")
@@ -29,12 +39,16 @@ if __name__ == "__main__":
     # 构建ID到标题的映射
     heading_map = {h["id"]: h for h in data["headings"]}
 
-    # 找出顶级标题（没有父节点的）
+    # 一次遍历建立父子邻接表，并找出顶级标题（没有父节点的）
+    children_of = {}
     all_children = set()
     for h in data["headings"]:
-        all_children.update(h.get("children", []))
+        children_ids = h.get("children", [])
+        if children_ids:
+            all_children.update(children_ids)
+            children_of[h["id"]] = [heading_map[cid] for cid in children_ids if cid in heading_map]
 
     top_level = [h for h in data["headings"] if h["id"] not in all_children]
 
     print(f"顶级标题数: {len(top_level)}\n")
-    print_tree(top_level, heading_map)
+    print_tree(top_level, children_of)